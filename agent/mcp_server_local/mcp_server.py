@@ -1,3 +1,5 @@
+from typing import List, Optional
+
 from fastmcp import FastMCP
 from tools.lockup.lockup_tool import register as register_lockup
 from tools.stock_info.stock_info_tool import register as register_stock_info
@@ -7,8 +9,13 @@ from tools.biz_perf.biz_perf_tool import register as register_biz_perf
 from tools.corp_info.corp_info_tool import register as register_corp_info
 from tools.lstm_model.lstm_model_tool import register as register_lstm_model
 from tools.paid_in_capital_increase.paid_in_capital_increase_tool import register as register_paid_in_list
+from warmup import WarmupState, register_readiness, warmup_components_from_env
 
-def create_app() -> FastMCP:
+def create_app(warmup: Optional[List[str]] = None) -> FastMCP:
+    """
+    warmup: warm-up 항목 ("lstm", "corp", "driver", 끝에 '?' 면 선택 항목), None 이면 MCP_WARMUP 환경변수.
+    warm-up 은 백그라운드에서 돌고, GET /ready 는 끝난 뒤에만 200 을 반환한다.
+    """
     # FastMCP 생성자에는 description 미지원 → name만 사용
     mcp = FastMCP(name="kbai-lockup")
     # 기능별 등록
@@ -20,6 +27,11 @@ def create_app() -> FastMCP:
     register_corp_info(mcp)
     register_lstm_model(mcp)
     register_paid_in_list(mcp)
+
+    state = WarmupState(warmup_components_from_env() if warmup is None else warmup)
+    register_readiness(mcp, state)
+    state.start()
+    mcp.warmup_state = state
     return mcp
 
 
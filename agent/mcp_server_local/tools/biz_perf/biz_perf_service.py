@@ -1,5 +1,6 @@
 import os
 import json
+import asyncio
 import requests
 import httpx
 import zipfile
@@ -10,10 +11,10 @@ from fastapi import HTTPException
 from typing import Optional, List, Dict
 from pydantic import BaseModel
 from dotenv import load_dotenv
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
 from bs4 import BeautifulSoup
 
+from ..browser.driver_pool import get_pool as get_driver_pool
+
 # =========================
 # .env 로드
 # =========================
@@ -130,27 +131,22 @@ async def get_corp_code_by_name_or_code(req: StockIdentifier) -> CorpCodeRespons
 
 
 def show_me_the_html(rcp_no: str) -> str:
-    # 셀레니움 설정
-    options = Options()
-    options.add_argument("--headless")  # 창 없이 실행
-    driver = webdriver.Chrome(options=options)
-
-    # 접수번호로 뷰어 페이지 접근
-    url = f"https://dart.fss.or.kr/dsaf001/main.do?rcpNo={rcp_no}"
-    driver.get(url)
+    # 공용 DriverPool 에서 headless 세션 대여 (반납 시 상태 초기화)
+    with get_driver_pool().driver() as driver:
+        # 접수번호로 뷰어 페이지 접근
+        url = f"https://dart.fss.or.kr/dsaf001/main.do?rcpNo={rcp_no}"
+        driver.get(url)
 
-    time.sleep(3)  # JavaScript 로딩 대기
+        time.sleep(3)  # JavaScript 로딩 대기
 
-    # 렌더링된 HTML 소스 가져오기
-    html = driver.page_source
-    src = extract_iframe_src(html)
-    absolute_src = f"https://dart.fss.or.kr{src}"
-    driver.get(absolute_src)
+        # 렌더링된 HTML 소스 가져오기
+        html = driver.page_source
+        src = extract_iframe_src(html)
+        absolute_src = f"https://dart.fss.or.kr{src}"
+        driver.get(absolute_src)
 
-    time.sleep(3)
-    final_html = driver.page_source
-    driver.quit()
-    return final_html
+        time.sleep(3)
+        return driver.page_source
 
 
 def extract_iframe_src(html: str) -> str:
@@ -243,7 +239,7 @@ async def get_biz_performance_tentative(corp_name: str) -> str:
         if data.get("status") == "000":
             for item in data.get("list", []):
                 if keyword in item.get("report_nm", ""):
-                    html = show_me_the_html(item["rcept_no"])
+                    html = await asyncio.to_thread(show_me_the_html, item["rcept_no"])
                     parsed_data_json = parse_financial_table(html)
                     results.append(parsed_data_json)
             return json.dumps(results, indent=2, ensure_ascii=False)
@@ -262,8 +258,6 @@ async def get_biz_performance_tentative(corp_name: str) -> str:
 # 테스트 main
 # =========================
 if __name__ == "__main__":
-    import asyncio
-
     test_corp_name = "삼성바이오로직스"
 
     async def main():
@@ -0,0 +1,513 @@
+# bench_crawl.py
+"""
+브라우저 프로필별 time-to-CSV 벤치마크 (로컬 서버, 네트워크 없음) + 실제 화면 캡처.
+
+사용법 (agent/mcp_server_local 에서):
+    # 1) 실제 KRX/Seibro 화면을 한 번 캡처 (네트워크 필요) → fixture 폴더
+    python -m tools.browser.bench_crawl --capture "https://data.krx.co.kr/contents/MDC/MDI/mdiLoader/index.cmd?menuId=MDC0201020103" \
+        --clicks "sel1,sel2,...,내보내기_selector" [--site tools/browser/fixtures/krx_mdc0201020103]
+    # 2) 캡처한 화면으로 측정 (fixture.json 의 시작 경로/클릭/내보내기 응답 사용)
+    python -m tools.browser.bench_crawl --site tools/browser/fixtures/krx_mdc0201020103 [--profiles full,crawl] [--runs 10]
+    # 대역 페이지(합성)로 측정 — 스모크 테스트용
+    python -m tools.browser.bench_crawl [--asset-latency 0.05] [--out bench.json]
+
+- --capture: full 프로필 Chrome 으로 화면을 열고 --clicks 를 차례로 클릭하면서 CDP Fetch 로 같은 origin 응답 본문을
+  모두 저장한다 (경로별 파일 + fixture.json 의 routes). 마지막 클릭의 내보내기 응답은 export.csv.
+  html/js/css/json 안의 절대 주소(https://data.krx.co.kr 등)는 상대 경로로 바꾼다. 다른 origin(CDN 등) 응답은
+  저장하지 않으므로 재생 때 404 가 된다. 같은 경로를 본문만 바꿔 여러 번 부르는 요청(getJsonData.cmd 등)은
+  마지막 응답만 재생한다.
+- --site: fixture.json 이 있으면 routes 를 그대로 재생하고, 없으면 '다른 이름으로 저장(전체)' 폴더를 정적 서빙
+  (--start, --clicks, --export-file 필요).
+- 기본(합성 대역 페이지): KRX 개별종목 시세 추이 화면과 같은 흐름(메뉴 3단계 → 다운로드 버튼 → CSV 링크)에
+  이미지/웹폰트/동영상/CSS 를 임의로 실은 페이지. 자원 구성이 실제 화면과 다르므로 결과는 측정 코드 점검용이고
+  프로필 비교 근거로 쓰지 않는다 (보고서 fixture="synthetic", speedup 미계산).
+- 정적 자원마다 asset-latency 만큼 지연. 프로필마다 별도 DriverPool(size=1): 기동 시간(launch_ms) + 요청별
+  time-to-CSV (페이지 진입 → CSV DataFrame) + 페이지 로드 반환 시간 + 서버가 실제로 보낸 정적 자원 수/바이트
+- 결과는 JSON (기본 tools/browser/bench/crawl_<시각>.json). 캡처 fixture 와 그 결과는 tools/browser/fixtures/ 에 둔다.
+
+아직 저장소에 캡처한 KRX/Seibro fixture 와 측정 결과가 없다. crawl 프로필의 time-to-CSV 개선은 위 1), 2) 로
+측정하기 전까지 확인되지 않은 것이다.
+"""
+import argparse
+import base64
+import io
+import json
+import os
+import platform
+import shutil
+import tempfile
+import threading
+import time
+from datetime import datetime
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+import numpy as np
+import pandas as pd
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from .cdp_capture import CDPConnection, DownloadCapture, page_ws_url
+from .driver_pool import PROFILES, DriverPool, full_options, launch_chrome
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(BASE_DIR))))
+DEFAULT_EXPORT = os.path.join(REPO_DIR, "model", "data", "anomaly_data.csv")
+EXPORT_PATH = "/comm/fileDn/download_csv/download.cmd"
+STANDIN_CLICKS = (
+    "a#menu-stock",
+    "a#menu-price",
+    'a[data-menu-id="MDC0201020103"]',
+    "button.CI-MDI-UNIT-DOWNLOAD",
+    'div[data-type="csv"] a',
+)
+FIXTURE_MANIFEST = "fixture.json"
+FIXTURES_DIR = os.path.join(BASE_DIR, "fixtures")
+# 절대 주소를 상대 경로로 바꿀 응답 (Content-Type 에 포함)
+TEXT_TYPES = ("html", "javascript", "css", "json", "xml")
+STATIC_EXT = (".png", ".jpg", ".gif", ".svg", ".woff", ".woff2", ".ttf", ".mp4", ".webm", ".css", ".js")
+
+
+# ----------------------------
+# 대역 페이지
+# ----------------------------
+def build_standin_site(root: str, n_images: int = 24, seed: int = 0) -> str:
+    """KRX 화면 흐름 + 무거운 정적 자원을 가진 페이지를 root 에 생성. 반환: 시작 경로."""
+    rng = np.random.default_rng(seed)
+    os.makedirs(os.path.join(root, "static"), exist_ok=True)
+
+    def _blob(name: str, size: int) -> None:
+        with open(os.path.join(root, "static", name), "wb") as f:
+            f.write(rng.integers(0, 256, size, dtype=np.uint8).tobytes())
+
+    for i in range(n_images):
+        _blob(f"banner{i}.png", 120_000)
+    for name in ("NanumGothic.woff2", "NanumGothicBold.woff2", "icons.woff"):
+        _blob(name, 180_000)
+    _blob("promo.mp4", 2_000_000)
+    with open(os.path.join(root, "static", "mdi.css"), "w", encoding="utf-8") as f:
+        f.write(
+            "@font-face{font-family:NG;src:url(NanumGothic.woff2)}\n"
+            "@font-face{font-family:NGB;src:url(NanumGothicBold.woff2)}\n"
+            "@font-face{font-family:IC;src:url(icons.woff)}\n"
+            "body{font-family:NG,sans-serif} h1{font-family:NGB} .ic{font-family:IC}\n"
+            ".hidden{display:none}\n"
+            + "".join(f".b{i}{{background:url(banner{i}.png)}}\n" for i in range(n_images))
+        )
+    images = "".join(f'<img src="static/banner{i}.png" width="120">' for i in range(n_images))
+    banners = "".join(f'<div class="b{i}">.</div>' for i in range(n_images))
+    html = f"""<!doctype html>
+<html lang="ko"><head><meta charset="utf-8"><title>개별종목 시세 추이</title>
+<link rel="stylesheet" href="static/mdi.css"></head>
+<body><h1>KRX 정보데이터시스템</h1><span class="ic">★</span>
+<nav><a id="menu-stock" href="#">주식</a>
+<div id="sub1" class="hidden"><a id="menu-price" href="#">종목시세</a></div>
+<div id="sub2" class="hidden"><a data-menu-id="MDC0201020103" href="#">개별종목 시세 추이</a></div></nav>
+<section id="screen" class="hidden">
+  <button class="CI-MDI-UNIT-DOWNLOAD">다운로드</button>
+  <div id="dl" class="hidden"><div data-type="csv"><a href="#">CSV</a></div></div>
+</section>
+<video src="static/promo.mp4" autoplay muted></video>
+{images}{banners}
+<form id="f" method="post" action="{EXPORT_PATH}" target="dlframe"><input type="hidden" name="code" value="otp"></form>
+<iframe name="dlframe" style="display:none"></iframe>
+<script>
+const show = id => document.getElementById(id).classList.remove('hidden');
+document.getElementById('menu-stock').onclick = e => {{ e.preventDefault(); show('sub1'); }};
+document.getElementById('menu-price').onclick = e => {{ e.preventDefault(); show('sub2'); }};
+document.querySelector('[data-menu-id]').onclick = e => {{ e.preventDefault(); setTimeout(() => show('screen'), 200); }};
+document.querySelector('.CI-MDI-UNIT-DOWNLOAD').onclick = () => show('dl');
+document.querySelector('[data-type="csv"] a').onclick = e => {{ e.preventDefault(); document.getElementById('f').submit(); }};
+</script></body></html>"""
+    with open(os.path.join(root, "index.html"), "w", encoding="utf-8") as f:
+        f.write(html)
+    return "/index.html"
+
+
+class SiteServer:
+    """
+    정적 사이트 + 내보내기 응답. 정적 자원마다 asset_latency 지연, 보낸 자원 수/바이트 집계.
+    routes(캡처 fixture): 경로 → {file, content_type} 를 메서드와 관계없이 그대로 재생.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        export_file: str,
+        export_path: str = EXPORT_PATH,
+        asset_latency: float = 0.05,
+        routes: Optional[Dict[str, dict]] = None,
+    ):
+        routes = routes or {}
+        self.stats = {"static_requests": 0, "static_bytes": 0, "exports": 0}
+        lock = threading.Lock()
+        with open(export_file, "rb") as f:
+            export_body = f.read()
+        server = self
+
+        class Handler(SimpleHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def __init__(self, *a, **kw):
+                super().__init__(*a, directory=root, **kw)
+
+            def _export(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                if length:
+                    self.rfile.read(length)
+                with lock:
+                    server.stats["exports"] += 1
+                self.send_response(200)
+                self.send_header("Content-Type", "application/octet-stream")
+                self.send_header("Content-Disposition", 'attachment; filename="data.csv"')
+                self.send_header("Content-Length", str(len(export_body)))
+                self.end_headers()
+                self.wfile.write(export_body)
+
+            def _count_static(self, path: str, full: str) -> None:
+                if path.lower().endswith(STATIC_EXT):
+                    if asset_latency:
+                        time.sleep(asset_latency)
+                    if os.path.exists(full):
+                        with lock:
+                            server.stats["static_requests"] += 1
+                            server.stats["static_bytes"] += os.path.getsize(full)
+
+            def _replay(self, path: str) -> None:
+                route = routes[path]
+                full = os.path.join(root, route["file"])
+                self._count_static(path, full)
+                with open(full, "rb") as f:
+                    body = f.read()
+                self.send_response(200)
+                self.send_header("Content-Type", route["content_type"])
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                path = self.path.split("?")[0]
+                length = int(self.headers.get("Content-Length") or 0)
+                if path == export_path:
+                    return self._export()
+                if length:
+                    self.rfile.read(length)
+                if path in routes:
+                    return self._replay(path)
+                self.send_error(404)
+
+            def do_GET(self):
+                path = self.path.split("?")[0]
+                if path == export_path:
+                    return self._export()
+                if path in routes:
+                    return self._replay(path)
+                self._count_static(path, self.translate_path(path))
+                return super().do_GET()
+
+            def log_message(self, fmt, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        threading.Thread(target=self.httpd.serve_forever, name="bench-site", daemon=True).start()
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def snapshot(self) -> Dict[str, int]:
+        return dict(self.stats)
+
+    def close(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+# ----------------------------
+# 실제 화면 캡처
+# ----------------------------
+def _local_path(path: str) -> str:
+    """URL 경로 → fixture 안의 상대 파일 경로."""
+    path = path or "/"
+    if path.endswith("/"):
+        path += "index.html"
+    return path.lstrip("/")
+
+
+def capture_site(
+    url: str, clicks: List[str], out_dir: str, export_path: str = EXPORT_PATH, timeout: float = 60.0
+) -> dict:
+    """
+    url 화면을 열어 clicks 를 차례로 클릭하면서 같은 origin 응답을 out_dir 에 저장하고 fixture.json 을 쓴다.
+    마지막 클릭의 내보내기 응답(export_path 포함 또는 attachment)은 export.csv. Returns: manifest
+    """
+    origin = urlsplit(url)
+    prefix = f"{origin.scheme}://{origin.netloc}"
+    routes: Dict[str, dict] = {}
+    counts = {"saved": 0, "bytes": 0, "cross_origin": 0}
+    lock = threading.Lock()
+    exported = threading.Event()
+    os.makedirs(out_dir, exist_ok=True)
+
+    driver = launch_chrome(full_options)
+    conn = None
+    try:
+        driver.get("about:blank")
+        conn = CDPConnection(page_ws_url(driver))
+
+        def _on_paused(p: dict) -> None:
+            rid = p["requestId"]
+            req_url = p.get("request", {}).get("url", "")
+            status = p.get("responseStatusCode") or 0
+            headers = {h["name"].lower(): h["value"] for h in p.get("responseHeaders") or []}
+            parts = urlsplit(req_url)
+            if parts.netloc != origin.netloc or not (200 <= status < 300):
+                if parts.netloc != origin.netloc:
+                    with lock:
+                        counts["cross_origin"] += 1
+                conn.send("Fetch.continueRequest", {"requestId": rid})
+                return
+            is_export = export_path in parts.path or "attachment" in headers.get("content-disposition", "").lower()
+
+            def _got_body(msg: dict) -> None:
+                if "error" in msg:
+                    print(f"[bench_crawl] 본문 받기 실패 {req_url}: {msg['error']}")
+                    conn.send("Fetch.continueRequest", {"requestId": rid})
+                    return
+                res = msg["result"]
+                raw = res.get("body", "")
+                body = base64.b64decode(raw) if res.get("base64Encoded") else raw.encode("utf-8")
+                ctype = headers.get("content-type", "application/octet-stream")
+                if is_export:
+                    rel = "export.csv"
+                else:
+                    rel = _local_path(parts.path)
+                    if any(t in ctype for t in TEXT_TYPES):
+                        body = body.replace(prefix.encode(), b"")
+                full = os.path.join(out_dir, rel)
+                os.makedirs(os.path.dirname(full) or ".", exist_ok=True)
+                with open(full, "wb") as f:
+                    f.write(body)
+                with lock:
+                    if not is_export:
+                        routes[parts.path or "/"] = {"file": rel, "content_type": ctype}
+                    counts["saved"] += 1
+                    counts["bytes"] += len(body)
+                if is_export:
+                    conn.send("Fetch.failRequest", {"requestId": rid, "errorReason": "Aborted"})
+                    exported.set()
+                else:
+                    conn.send("Fetch.continueRequest", {"requestId": rid})
+
+            conn.send("Fetch.getResponseBody", {"requestId": rid}, _got_body)
+
+        conn.on("Fetch.requestPaused", _on_paused)
+        conn.call("Fetch.enable", {"patterns": [{"urlPattern": "*", "requestStage": "Response"}]})
+
+        wait = WebDriverWait(driver, timeout)
+        driver.get(url)
+        for sel in clicks:
+            wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, sel))).click()
+        if not exported.wait(timeout):
+            raise RuntimeError(f"내보내기 응답 없음 ({timeout}s): 마지막 --clicks 가 내보내기인지 확인")
+    finally:
+        if conn is not None:
+            conn.close()
+        driver.quit()
+
+    start = origin.path or "/"
+    if origin.query:
+        start += "?" + origin.query
+    manifest = {
+        "source_url": url,
+        "captured_at": datetime.now().isoformat(timespec="seconds"),
+        "start": start,
+        "clicks": list(clicks),
+        "export_path": export_path,
+        "export_file": "export.csv",
+        "routes": routes,
+        "saved": counts["saved"],
+        "saved_kb": round(counts["bytes"] / 1024, 1),
+        "cross_origin_skipped": counts["cross_origin"],
+    }
+    with open(os.path.join(out_dir, FIXTURE_MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    print(f"[bench_crawl] 캡처 {counts['saved']}개 응답 {manifest['saved_kb']}KB → {out_dir}")
+    return manifest
+
+
+def load_fixture(site_dir: str) -> Optional[dict]:
+    path = os.path.join(site_dir, FIXTURE_MANIFEST)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+# ----------------------------
+# 측정
+# ----------------------------
+def time_to_csv(driver, url: str, clicks: List[str], export_path: str, timeout: float = 30.0) -> dict:
+    wait = WebDriverWait(driver, timeout)
+    t0 = time.perf_counter()
+    driver.get(url)
+    t_load = time.perf_counter() - t0
+    for sel in clicks[:-1]:
+        wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, sel))).click()
+    with DownloadCapture(driver, url_hint=export_path) as cap:
+        wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, clicks[-1]))).click()
+        body = cap.wait(timeout)
+    df = pd.read_csv(io.BytesIO(body), encoding="euc-kr")
+    return {
+        "time_to_csv_ms": (time.perf_counter() - t0) * 1000,
+        "page_load_ms": t_load * 1000,
+        "rows": int(len(df)),
+    }
+
+
+def bench_profile(profile: str, site: SiteServer, start: str, clicks: List[str], export_path: str, runs: int) -> dict:
+    options_factory, setup = PROFILES[profile]
+    pool = DriverPool(name=f"bench-{profile}", size=1, options_factory=options_factory, setup=setup)
+    try:
+        t0 = time.perf_counter()
+        pool.prelaunch(1)
+        launch_ms = (time.perf_counter() - t0) * 1000
+
+        url = site.url + start
+        with pool.driver() as d:  # 첫 요청 (디스크 캐시 채움)
+            first = time_to_csv(d, url, clicks, export_path)
+        before = site.snapshot()
+        samples = []
+        for _ in range(runs):
+            with pool.driver() as d:
+                samples.append(time_to_csv(d, url, clicks, export_path))
+        after = site.snapshot()
+    finally:
+        pool.close()
+
+    ttc = [s["time_to_csv_ms"] for s in samples]
+    load = [s["page_load_ms"] for s in samples]
+    return {
+        "profile": profile,
+        "launch_ms": round(launch_ms, 1),
+        "first_time_to_csv_ms": round(first["time_to_csv_ms"], 1),
+        "time_to_csv_p50_ms": round(float(np.percentile(ttc, 50)), 1),
+        "time_to_csv_p90_ms": round(float(np.percentile(ttc, 90)), 1),
+        "time_to_csv_mean_ms": round(float(np.mean(ttc)), 1),
+        "page_load_p50_ms": round(float(np.percentile(load, 50)), 1),
+        "static_requests_per_run": round((after["static_requests"] - before["static_requests"]) / runs, 1),
+        "static_kb_per_run": round((after["static_bytes"] - before["static_bytes"]) / runs / 1024, 1),
+        "rows": samples[-1]["rows"],
+        "runs": runs,
+    }
+
+
+def run(
+    profiles: List[str],
+    runs: int = 10,
+    asset_latency: float = 0.05,
+    site_dir: str = None,
+    start: str = None,
+    clicks: List[str] = None,
+    export_file: str = DEFAULT_EXPORT,
+    export_path: str = EXPORT_PATH,
+) -> dict:
+    tmp = None
+    fixture = None
+    if site_dir is None:
+        tmp = tempfile.mkdtemp(prefix="bench_crawl_")
+        site_dir = tmp
+        start = build_standin_site(tmp)
+        clicks = list(STANDIN_CLICKS)
+    else:
+        fixture = load_fixture(site_dir)
+        if fixture is not None:
+            start = start or fixture["start"]
+            clicks = clicks or fixture["clicks"]
+            export_path = fixture["export_path"]
+            export_file = os.path.join(site_dir, fixture["export_file"])
+        elif not (start and clicks):
+            raise ValueError("--site 에 fixture.json 이 없으면 --start, --clicks 가 필요합니다")
+
+    site = SiteServer(site_dir, export_file, export_path, asset_latency, (fixture or {}).get("routes"))
+    results = []
+    try:
+        for profile in profiles:
+            print(f"[bench_crawl] {profile} ...", flush=True)
+            res = bench_profile(profile, site, start, clicks, export_path, runs)
+            print(
+                f"[bench_crawl] {profile} launch={res['launch_ms']:.0f}ms "
+                f"time_to_csv p50={res['time_to_csv_p50_ms']:.0f}ms "
+                f"static={res['static_requests_per_run']}req/{res['static_kb_per_run']}KB"
+            )
+            results.append(res)
+    finally:
+        site.close()
+        if tmp:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    report = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "platform": platform.platform(),
+        "site": "standin" if tmp else site_dir,
+        # synthetic: 합성 대역 페이지 (측정 코드 점검용) | captured: --capture fixture | saved: 저장한 페이지 폴더
+        "fixture": "synthetic" if tmp else ("captured" if fixture is not None else "saved"),
+        "source_url": (fixture or {}).get("source_url"),
+        "asset_latency": asset_latency,
+        "results": results,
+    }
+    by = {r["profile"]: r for r in results}
+    if tmp:
+        print("[bench_crawl] 합성 대역 페이지 결과: 실제 KRX/Seibro 화면 수치가 아니므로 speedup 을 계산하지 않음")
+    elif "full" in by and "crawl" in by:
+        report["speedup_p50"] = round(by["full"]["time_to_csv_p50_ms"] / by["crawl"]["time_to_csv_p50_ms"], 2)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="브라우저 프로필별 time-to-CSV 벤치마크")
+    parser.add_argument("--profiles", default="full,crawl")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--asset-latency", type=float, default=0.05, help="정적 자원 응답 지연(초)")
+    parser.add_argument("--capture", default=None, help="이 URL 화면을 캡처해 --site 폴더에 fixture 로 저장 (측정 안 함)")
+    parser.add_argument("--site", default=None, help="캡처 fixture / 저장한 페이지 폴더 (기본: 합성 대역 페이지)")
+    parser.add_argument("--start", default=None, help="--site 의 시작 경로 (예: /index.html)")
+    parser.add_argument("--clicks", default=None, help="쉼표로 구분한 CSS selector, 마지막이 내보내기 (fixture 는 생략 가능)")
+    parser.add_argument("--export-file", default=DEFAULT_EXPORT, help="내보내기 응답으로 보낼 파일")
+    parser.add_argument("--export-path", default=EXPORT_PATH)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+
+    clicks = [c.strip() for c in args.clicks.split(",")] if args.clicks else None
+    if args.capture:
+        if not clicks:
+            parser.error("--capture 에는 --clicks 가 필요합니다")
+        site_dir = args.site or os.path.join(FIXTURES_DIR, f"capture_{datetime.now():%Y%m%d_%H%M%S}")
+        manifest = capture_site(args.capture, clicks, site_dir, args.export_path)
+        print(json.dumps({k: v for k, v in manifest.items() if k != "routes"}, ensure_ascii=False, indent=2))
+        raise SystemExit(0)
+
+    profiles = [p.strip() for p in args.profiles.split(",") if p.strip()]
+    unknown = set(profiles) - set(PROFILES)
+    if unknown:
+        parser.error(f"알 수 없는 프로필: {sorted(unknown)}")
+    report = run(
+        profiles,
+        runs=args.runs,
+        asset_latency=args.asset_latency,
+        site_dir=args.site,
+        start=args.start,
+        clicks=clicks,
+        export_file=args.export_file,
+        export_path=args.export_path,
+    )
+    out = args.out or os.path.join(BASE_DIR, "bench", f"crawl_{datetime.now():%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"[bench_crawl] → {out}")
+    print(json.dumps(report, ensure_ascii=False, indent=2))
@@ -0,0 +1,181 @@
+# cdp_capture.py
+"""
+DevTools(CDP) Fetch 가로채기로 브라우저의 내보내기(다운로드) 응답 본문을 메모리에서 받는다.
+
+다운로드 폴더를 0.5 초마다 훑어 mtime 이 가장 최근인 파일을 고르던 방식 대체:
+- 대여한 세션의 page target 에 CDP websocket 을 따로 연결 (chromedriver 의 debuggerAddress)
+- Fetch.enable(Response 단계) 후 클릭 → Fetch.requestPaused 이벤트에서 내보내기 응답을 골라
+  Fetch.getResponseBody 로 본문을 받고 Fetch.failRequest 로 중단 → 파일이 디스크에 쓰이지 않음
+- 이벤트 기반(threading.Event)이라 polling 이 없고, 세션(탭)마다 따로 잡으므로 동시 크롤링에도 섞이지 않음
+
+내보내기 응답 판정: 2xx 이면서 Content-Disposition: attachment 이거나 url 에 url_hint 포함.
+나머지 요청은 그대로 진행(Fetch.continueRequest).
+
+    with DownloadCapture(driver, url_hint="download.cmd") as cap:
+        driver.find_element(...).click()
+        body = cap.wait(timeout=90)
+    df = pd.read_csv(io.BytesIO(body), encoding="euc-kr")
+"""
+import base64
+import itertools
+import json
+import threading
+from typing import Callable, Dict, Optional
+
+import websocket
+from selenium.common.exceptions import TimeoutException
+
+
+def page_ws_url(driver) -> str:
+    """driver 의 현재 page target 에 붙는 DevTools websocket 주소."""
+    addr = (driver.capabilities.get("goog:chromeOptions") or {}).get("debuggerAddress")
+    if not addr:
+        raise RuntimeError("Chrome debuggerAddress 없음 (chromedriver 세션이 아님)")
+    target_id = driver.execute_cdp_cmd("Target.getTargetInfo", {})["targetInfo"]["targetId"]
+    return f"ws://{addr}/devtools/page/{target_id}"
+
+
+# ----------------------------
+# 최소 CDP 클라이언트
+# ----------------------------
+class CDPConnection:
+    """websocket 하나 + 수신 스레드. 응답은 id 별 callback, 이벤트는 method 별 handler 로 전달."""
+
+    def __init__(self, ws_url: str, timeout: float = 10.0):
+        # Origin 헤더를 빼야 --remote-allow-origins 없이 붙을 수 있다
+        self.ws = websocket.create_connection(ws_url, timeout=timeout, suppress_origin=True)
+        self.ws.settimeout(None)
+        self._ids = itertools.count(1)
+        self._send_lock = threading.Lock()
+        self._pending: Dict[int, Callable[[dict], None]] = {}
+        self._handlers: Dict[str, Callable[[dict], None]] = {}
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._read_loop, name="cdp-reader", daemon=True)
+        self._thread.start()
+
+    def on(self, method: str, handler: Callable[[dict], None]) -> None:
+        self._handlers[method] = handler
+
+    def send(self, method: str, params: Optional[dict] = None, callback=None) -> int:
+        msg_id = next(self._ids)
+        if callback is not None:
+            self._pending[msg_id] = callback
+        with self._send_lock:
+            self.ws.send(json.dumps({"id": msg_id, "method": method, "params": params or {}}))
+        return msg_id
+
+    def call(self, method: str, params: Optional[dict] = None, timeout: float = 10.0) -> dict:
+        done = threading.Event()
+        box: dict = {}
+
+        def _cb(msg):
+            box.update(msg)
+            done.set()
+
+        self.send(method, params, _cb)
+        if not done.wait(timeout):
+            raise TimeoutException(f"CDP {method} 응답 없음")
+        if "error" in box:
+            raise RuntimeError(f"CDP {method} 실패: {box['error']}")
+        return box.get("result", {})
+
+    def _read_loop(self) -> None:
+        while not self._closed.is_set():
+            try:
+                msg = json.loads(self.ws.recv())
+            except Exception:
+                break
+            try:
+                if "id" in msg:
+                    cb = self._pending.pop(msg["id"], None)
+                    if cb is not None:
+                        cb(msg)
+                else:
+                    handler = self._handlers.get(msg.get("method"))
+                    if handler is not None:
+                        handler(msg.get("params", {}))
+            except Exception as e:
+                print(f"[cdp_capture] 이벤트 처리 실패: {e}")
+        self._closed.set()
+
+    def close(self) -> None:
+        self._closed.set()
+        try:
+            self.ws.close()
+        except Exception:
+            pass
+        self._thread.join(timeout=2)
+
+
+# ----------------------------
+# 다운로드 캡처
+# ----------------------------
+class DownloadCapture:
+    def __init__(self, driver, url_hint: Optional[str] = None):
+        self.driver = driver
+        self.url_hint = url_hint
+        self.body: Optional[bytes] = None
+        self.url: Optional[str] = None
+        self.headers: Dict[str, str] = {}
+        self.error: Optional[str] = None
+        self._done = threading.Event()
+        self._conn: Optional[CDPConnection] = None
+
+    def _is_export(self, url: str, status: Optional[int], headers: Dict[str, str]) -> bool:
+        if status is None or not (200 <= status < 300):
+            return False
+        if "attachment" in headers.get("content-disposition", "").lower():
+            return True
+        return bool(self.url_hint and self.url_hint in url)
+
+    def _on_paused(self, p: dict) -> None:
+        conn = self._conn
+        rid = p["requestId"]
+        url = p.get("request", {}).get("url", "")
+        headers = {h["name"].lower(): h["value"] for h in p.get("responseHeaders") or []}
+        if self._done.is_set() or not self._is_export(url, p.get("responseStatusCode"), headers):
+            conn.send("Fetch.continueRequest", {"requestId": rid})
+            return
+
+        def _got_body(msg: dict) -> None:
+            if "error" in msg:
+                self.error = f"Fetch.getResponseBody 실패: {msg['error']}"
+            else:
+                res = msg["result"]
+                raw = res.get("body", "")
+                self.body = base64.b64decode(raw) if res.get("base64Encoded") else raw.encode("utf-8")
+                self.url, self.headers = url, headers
+            # 브라우저 쪽 다운로드는 중단 (파일 미생성)
+            conn.send("Fetch.failRequest", {"requestId": rid, "errorReason": "Aborted"})
+            self._done.set()
+
+        conn.send("Fetch.getResponseBody", {"requestId": rid}, _got_body)
+
+    def __enter__(self) -> "DownloadCapture":
+        self._conn = CDPConnection(page_ws_url(self.driver))
+        self._conn.on("Fetch.requestPaused", self._on_paused)
+        try:
+            self._conn.call(
+                "Fetch.enable", {"patterns": [{"urlPattern": "*", "requestStage": "Response"}]}
+            )
+        except Exception:
+            self._conn.close()
+            raise
+        return self
+
+    def wait(self, timeout: float = 60.0) -> bytes:
+        if not self._done.wait(timeout):
+            raise TimeoutException(f"내보내기 응답 대기 시간 초과 ({timeout}s)")
+        if self.body is None:
+            raise RuntimeError(self.error or "내보내기 응답 본문 없음")
+        return self.body
+
+    def __exit__(self, *exc) -> None:
+        try:
+            self._conn.call("Fetch.disable", timeout=2)
+        except Exception:
+            pass
+        self._conn.close()
+
+
+__all__ = ["CDPConnection", "DownloadCapture", "page_ws_url"]
@@ -0,0 +1,431 @@
+# driver_pool.py
+"""
+Selenium Chrome 세션 풀 (KRX / Seibro 보호예수 / DART 뷰어 크롤링 공용).
+
+호출마다 webdriver.Chrome(...) 을 새로 띄우고 quit 하던 것을 미리 띄워 둔 headless 세션을
+빌려 쓰고(checkout) 돌려주는(return) 방식으로 바꾼다. 풀은 브라우저 프로필마다 하나.
+- 동시 사용 상한: 풀 크기(size)만큼만 브라우저가 존재 → 동시 요청이 몰려도 메모리 상한 고정
+- checkout 시 health check (chromedriver 프로세스 + 'return 1' 왕복), 실패하면 버리고 새로 띄움
+- N 회 사용(max_uses) 또는 max_age 초가 지나면 재기동, 사용 중 WebDriverException 후 응답이 없으면 폐기
+- return 시 상태 초기화: 추가 창 닫기, 기본 frame, 쿠키 삭제, about:blank
+- 다운로드는 파일 대신 cdp_capture.DownloadCapture 로 응답 본문을 메모리에서 받는다
+
+BROWSER_PROFILE       : crawl (기본, 경량 headless 프로필) | full (일반 프로필)
+BROWSER_HEADLESS      : full 프로필 headless 여부 (기본 1, crawl 은 항상 headless)
+BROWSER_BLOCK         : crawl 프로필에서 차단할 요청 종류 (기본 image,font,media / css 추가 가능)
+BROWSER_POOL_SIZE     : 풀 크기 = 동시 브라우저 수 (기본 2)
+BROWSER_POOL_MAX_USES : 세션당 최대 사용 횟수 (기본 50)
+BROWSER_POOL_MAX_AGE  : 세션 최대 수명(초, 기본 1800)
+BROWSER_POOL_TIMEOUT  : 빈 세션 대기 한도(초, 기본 120)
+CHROMEDRIVER_PATH     : 지정하면 webdriver_manager 설치 확인 생략
+"""
+import atexit
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional
+
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+
+
+def _env_flag(name: str, default: str) -> bool:
+    return os.environ.get(name, default).strip().lower() in ("1", "true", "yes")
+
+
+# ----------------------------
+# Chrome 실행
+# ----------------------------
+_driver_path: Optional[str] = None
+_driver_path_lock = threading.Lock()
+
+
+def chromedriver_path() -> str:
+    """chromedriver 경로 (webdriver_manager 설치 확인은 프로세스당 1회)."""
+    global _driver_path
+    if _driver_path is None:
+        with _driver_path_lock:
+            if _driver_path is None:
+                path = os.environ.get("CHROMEDRIVER_PATH")
+                if not path:
+                    from webdriver_manager.chrome import ChromeDriverManager
+
+                    path = ChromeDriverManager().install()
+                _driver_path = path
+    return _driver_path
+
+
+def _download_prefs() -> dict:
+    return {
+        "download.prompt_for_download": False,
+        "download.directory_upgrade": True,
+        "safebrowsing.enabled": True,
+        "plugins.always_open_pdf_externally": True,
+    }
+
+
+def full_options() -> Options:
+    """일반 브라우저와 같은 프로필 (1920x1080, normal page load). 크롤링 화면 디버깅용."""
+    opts = webdriver.ChromeOptions()
+    if _env_flag("BROWSER_HEADLESS", "1"):
+        opts.add_argument("--headless=new")
+    opts.add_argument("--no-sandbox")
+    opts.add_argument("--disable-dev-shm-usage")
+    opts.add_argument("--window-size=1920,1080")
+    opts.add_argument("--lang=ko-KR")
+    opts.add_argument("--disable-gpu")
+    opts.add_experimental_option("prefs", _download_prefs())
+    return opts
+
+
+def crawl_options() -> Options:
+    """
+    크롤링 전용 경량 프로필.
+    - 항상 headless, eager page load (DOMContentLoaded 에서 반환, 이후는 WebDriverWait 가 대기)
+    - 이미지 렌더링 끔, 백그라운드 네트워크/확장/컴포넌트 업데이트/동기화 끔
+    - 이미지/폰트/미디어 요청 자체는 세션 기동 후 block_heavy_resources() 가 차단
+    """
+    opts = webdriver.ChromeOptions()
+    opts.page_load_strategy = "eager"
+    opts.add_argument("--headless=new")
+    opts.add_argument("--no-sandbox")
+    opts.add_argument("--disable-dev-shm-usage")
+    opts.add_argument("--window-size=1280,900")
+    opts.add_argument("--lang=ko-KR")
+    opts.add_argument("--disable-gpu")
+    opts.add_argument("--disable-extensions")
+    opts.add_argument("--disable-background-networking")
+    opts.add_argument("--disable-component-update")
+    opts.add_argument("--disable-default-apps")
+    opts.add_argument("--disable-sync")
+    opts.add_argument("--no-first-run")
+    opts.add_argument("--mute-audio")
+    opts.add_argument("--blink-settings=imagesEnabled=false")
+    opts.add_argument("--disable-features=Translate,MediaRouter,OptimizationHints")
+    prefs = _download_prefs()
+    prefs["profile.managed_default_content_settings.images"] = 2
+    opts.add_experimental_option("prefs", prefs)
+    return opts
+
+
+BLOCKED_EXTENSIONS = {
+    "image": ("png", "jpg", "jpeg", "gif", "webp", "svg", "ico", "bmp"),
+    "font": ("woff", "woff2", "ttf", "otf", "eot"),
+    "media": ("mp4", "webm", "mp3", "ogg", "wav", "m4a", "avi", "mov"),
+    "css": ("css",),
+}
+
+
+def blocked_url_patterns() -> list:
+    """
+    BROWSER_BLOCK (기본 image,font,media) 종류의 확장자 URL 패턴.
+    css 는 화면 요소의 표시 여부(element_to_be_clickable)가 바뀔 수 있어 기본 제외.
+    """
+    kinds = [
+        v.strip()
+        for v in os.environ.get("BROWSER_BLOCK", "image,font,media").split(",")
+        if v.strip()
+    ]
+    unknown = set(kinds) - set(BLOCKED_EXTENSIONS)
+    if unknown:
+        raise ValueError(f"BROWSER_BLOCK 에 알 수 없는 항목: {sorted(unknown)}")
+    patterns = []
+    for kind in kinds:
+        for ext in BLOCKED_EXTENSIONS[kind]:
+            patterns += [f"*.{ext}", f"*.{ext}?*"]
+    return patterns
+
+
+def block_heavy_resources(driver: webdriver.Chrome) -> None:
+    """세션 단위 요청 차단 (CDP Network.setBlockedURLs, 이후 모든 페이지 이동에 유지)."""
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": blocked_url_patterns()})
+
+
+# 프로필 이름 → (옵션, 기동 직후 설정)
+PROFILES: Dict[str, tuple] = {
+    "crawl": (crawl_options, block_heavy_resources),
+    "full": (full_options, None),
+}
+
+
+def launch_chrome(options_factory: Callable[[], Options] = crawl_options) -> webdriver.Chrome:
+    return webdriver.Chrome(service=Service(chromedriver_path()), options=options_factory())
+
+
+# ----------------------------
+# 풀
+# ----------------------------
+class _Session:
+    __slots__ = ("driver", "created", "uses")
+
+    def __init__(self, driver: webdriver.Chrome):
+        self.driver = driver
+        self.created = time.monotonic()
+        self.uses = 0
+
+
+class DriverPool:
+    def __init__(
+        self,
+        name: str = "default",
+        size: int = 2,
+        options_factory: Callable[[], Options] = crawl_options,
+        setup: Optional[Callable[[webdriver.Chrome], None]] = None,
+        max_uses: int = 50,
+        max_age: float = 1800.0,
+        checkout_timeout: float = 120.0,
+        launcher: Optional[Callable[[Callable[[], Options]], webdriver.Chrome]] = None,
+    ):
+        if size < 1:
+            raise ValueError("size 는 1 이상이어야 함")
+        self.name = name
+        self.size = int(size)
+        self.options_factory = options_factory
+        self.setup = setup
+        self.max_uses = int(max_uses)
+        self.max_age = float(max_age)
+        self.checkout_timeout = float(checkout_timeout)
+        self._launch = launcher or launch_chrome
+
+        self._idle: deque = deque()
+        self._alive = 0  # idle + 대여 중 + 기동 중
+        self._cond = threading.Condition()
+        self._closed = False
+        self.counters: Dict[str, int] = {
+            "checkouts": 0,
+            "launched": 0,
+            "reused": 0,
+            "recycled": 0,
+            "crashed": 0,
+            "waits": 0,
+        }
+
+    # ---------- 세션 생성/폐기 ----------
+    def _new_session(self) -> _Session:
+        t0 = time.perf_counter()
+        driver = self._launch(self.options_factory)
+        if self.setup is not None:
+            try:
+                self.setup(driver)
+            except Exception:
+                driver.quit()
+                raise
+        s = _Session(driver)
+        with self._cond:
+            self.counters["launched"] += 1
+        print(f"[driver_pool:{self.name}] Chrome 기동 {time.perf_counter() - t0:.2f}s")
+        return s
+
+    @staticmethod
+    def _quit(s: _Session) -> None:
+        try:
+            s.driver.quit()
+        except Exception:
+            pass
+
+    def _discard(self, s: Optional[_Session], counter: str) -> None:
+        if s is not None:
+            self._quit(s)
+        with self._cond:
+            self._alive -= 1
+            self.counters[counter] += 1
+            self._cond.notify()
+
+    @staticmethod
+    def _healthy(s: _Session) -> bool:
+        try:
+            proc = getattr(s.driver.service, "process", None)
+            if proc is not None and proc.poll() is not None:
+                return False
+            return s.driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    def _expired(self, s: _Session) -> bool:
+        return s.uses >= self.max_uses or (time.monotonic() - s.created) >= self.max_age
+
+    @staticmethod
+    def _reset(s: _Session) -> None:
+        """다음 대여자를 위해 상태 초기화 (실패하면 예외 → 폐기)."""
+        d = s.driver
+        handles = d.window_handles
+        for h in handles[1:]:
+            d.switch_to.window(h)
+            d.close()
+        d.switch_to.window(handles[0])
+        d.switch_to.default_content()
+        d.execute_cdp_cmd("Network.clearBrowserCookies", {})
+        d.get("about:blank")
+
+    # ---------- checkout / return ----------
+    def checkout(self, timeout: Optional[float] = None) -> _Session:
+        deadline = time.monotonic() + (self.checkout_timeout if timeout is None else timeout)
+        while True:
+            with self._cond:
+                if self._closed:
+                    raise RuntimeError(f"DriverPool({self.name}) 이 닫혀 있음")
+                waited = False
+                while not self._idle and self._alive >= self.size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError(
+                            f"DriverPool({self.name}) 빈 세션 대기 시간 초과 (size={self.size})"
+                        )
+                    if not waited:
+                        self.counters["waits"] += 1
+                        waited = True
+                    self._cond.wait(remaining)
+                s = self._idle.popleft() if self._idle else None
+                if s is None:
+                    self._alive += 1
+
+            if s is None:
+                try:
+                    s = self._new_session()
+                except Exception:
+                    self._discard(None, "crashed")
+                    raise
+            elif self._expired(s):
+                self._discard(s, "recycled")
+                continue
+            elif not self._healthy(s):
+                self._discard(s, "crashed")
+                continue
+            else:
+                with self._cond:
+                    self.counters["reused"] += 1
+            s.uses += 1
+            with self._cond:
+                self.counters["checkouts"] += 1
+            return s
+
+    def checkin(self, s: _Session, broken: bool = False) -> None:
+        if broken and not self._healthy(s):
+            self._discard(s, "crashed")
+            return
+        if self._closed or self._expired(s):
+            self._discard(s, "recycled")
+            return
+        try:
+            self._reset(s)
+        except Exception:
+            self._discard(s, "crashed")
+            return
+        with self._cond:
+            self._idle.append(s)
+            self._cond.notify()
+
+    @contextmanager
+    def driver(self, timeout: Optional[float] = None) -> Iterator[webdriver.Chrome]:
+        """with pool.driver() as driver: ... (예외가 나도 반드시 반납)"""
+        s = self.checkout(timeout)
+        broken = False
+        try:
+            yield s.driver
+        except WebDriverException:
+            broken = True
+            raise
+        finally:
+            self.checkin(s, broken=broken)
+
+    # ---------- 관리 ----------
+    def prelaunch(self, n: Optional[int] = None) -> int:
+        """idle 세션을 n 개(기본 size)까지 병렬로 미리 띄운다. 반환: 새로 띄운 수."""
+        with self._cond:
+            want = min(self.size if n is None else int(n), self.size) - len(self._idle)
+            want = max(0, min(want, self.size - self._alive))
+            self._alive += want
+        if not want:
+            return 0
+
+        def _one(_):
+            try:
+                return self._new_session()
+            except Exception as e:
+                print(f"[driver_pool:{self.name}] Chrome 기동 실패: {e}")
+                self._discard(None, "crashed")
+                return None
+
+        with ThreadPoolExecutor(max_workers=want) as ex:
+            sessions = [s for s in ex.map(_one, range(want)) if s is not None]
+        with self._cond:
+            self._idle.extend(sessions)
+            self._cond.notify_all()
+        if not sessions:
+            raise RuntimeError(f"DriverPool({self.name}) Chrome 기동 실패")
+        return len(sessions)
+
+    def stats(self) -> dict:
+        with self._cond:
+            idle = len(self._idle)
+            return {
+                "name": self.name,
+                "size": self.size,
+                "alive": self._alive,
+                "idle": idle,
+                "in_use": self._alive - idle,
+                **self.counters,
+            }
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            idle, self._idle = list(self._idle), deque()
+            self._alive -= len(idle)
+            self._cond.notify_all()
+        for s in idle:
+            self._quit(s)
+
+
+_pools: Dict[str, DriverPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(profile: Optional[str] = None) -> DriverPool:
+    """프로세스 공용 풀 (프로필별 1개, 환경변수 설정). profile 기본: BROWSER_PROFILE (crawl)."""
+    name = (profile or os.environ.get("BROWSER_PROFILE", "crawl")).strip().lower()
+    pool = _pools.get(name)
+    if pool is None:
+        if name not in PROFILES:
+            raise ValueError(f"브라우저 프로필은 {tuple(PROFILES)} 중 하나여야 함: {name}")
+        options_factory, setup = PROFILES[name]
+        with _pools_lock:
+            pool = _pools.get(name)
+            if pool is None:
+                pool = DriverPool(
+                    name=name,
+                    size=int(os.environ.get("BROWSER_POOL_SIZE", "2")),
+                    options_factory=options_factory,
+                    setup=setup,
+                    max_uses=int(os.environ.get("BROWSER_POOL_MAX_USES", "50")),
+                    max_age=float(os.environ.get("BROWSER_POOL_MAX_AGE", "1800")),
+                    checkout_timeout=float(os.environ.get("BROWSER_POOL_TIMEOUT", "120")),
+                )
+                _pools[name] = pool
+    return pool
+
+
+@atexit.register
+def close_pools() -> None:
+    for pool in list(_pools.values()):
+        pool.close()
+
+
+__all__ = [
+    "DriverPool",
+    "chromedriver_path",
+    "close_pools",
+    "PROFILES",
+    "block_heavy_resources",
+    "blocked_url_patterns",
+    "crawl_options",
+    "full_options",
+    "get_pool",
+    "launch_chrome",
+]
@@ -1,5 +1,6 @@
 # mcp/tools/corp_info/corp_info_service.py
 import os
+import threading
 import zipfile
 import xml.etree.ElementTree as ET
 from typing import List, Dict, Optional
@@ -56,6 +57,24 @@ def parse_corp_xml(xml_path: str) -> Optional[List[Dict]]:
         return None
 
 
+# (경로, 수정 시각) → 파싱 결과. 파일이 바뀌면 다시 파싱한다.
+_corp_index: Dict[str, object] = {"key": None, "corp_list": None}
+_corp_index_lock = threading.Lock()
+
+
+def load_corp_index(xml_path: Optional[str] = None) -> Optional[List[Dict]]:
+    """corpCode.zip 파싱 결과를 메모리에 캐시해 반환 (서버 warm-up 에서 미리 호출)."""
+    xml_path = xml_path or get_corp_code_xml_path()
+    key = (xml_path, os.path.getmtime(xml_path))
+    with _corp_index_lock:
+        if _corp_index["key"] != key:
+            corp_list = parse_corp_xml(xml_path)
+            if not corp_list:
+                return None
+            _corp_index.update(key=key, corp_list=corp_list)
+        return _corp_index["corp_list"]
+
+
 def find_corp_info_by_name(stock_name: str) -> Dict[str, Optional[str]]:
     """Finds a corporation's info by its name from the local XML file."""
     if not stock_name:
@@ -66,7 +85,7 @@ def find_corp_info_by_name(stock_name: str) -> Dict[str, Optional[str]]:
         if not os.path.exists(xml_path):
             return {"error": f"CORPCODE file not found at {xml_path}. Please ensure it has been downloaded."}
         
-        corp_list = parse_corp_xml(xml_path)
+        corp_list = load_corp_index(xml_path)
         if not corp_list:
             return {"error": "Failed to parse corp code XML file."}
 
@@ -0,0 +1,107 @@
+# ingest_market.py
+"""
+전종목 시세 일별 수집 → 로컬 시세 저장소(price_store) 일괄 추가 (배치).
+
+model/data/krx_dataset_crawling.py 가 화면에서 날짜마다 내려받던 '전종목 시세'(MDC0201020101)를
+같은 JSON 엔드포인트(MDCSTAT01501)로 하루 한 번 받아 모든 종목의 시세에 한 번에 추가한다.
+종목마다 따로 받던 6개월/1개월 시세(lstm_model / stock_info)는 대부분 저장소 읽기가 된다.
+
+사용법 (agent/mcp_server_local 에서, 예: 매 거래일 18:00 이후 cron):
+    python -m tools.krx.ingest_market                                # 마지막 수집일 다음 ~ 최근 확정 거래일
+    python -m tools.krx.ingest_market --start 20250101 [--end 20250630]   # 과거 구간 백필 (과거 → 최신 순)
+    [--market ALL|STK|KSQ|KNX] [--csv-dir DIR] [--max-days 20 (밀린 날 수집 한도)]
+
+- 거래일(TradingCalendar)만 요청, 종가가 하나도 없는 날은 휴장일로 기록해 달력에 반영
+- 이미 수집한 (시장, 일자)는 건너뜀 → 재실행/중단 후 재개 안전
+- 하루치 적용 규칙(구간 연장, 수정주가 변경 감지)은 PriceStore.ingest_snapshot 참고
+- --csv-dir: 받은 시세를 전종목 시세 CSV 다운로드와 같은 형식(euc-kr, kospi_YYYYMMDD.csv 등)으로도 저장
+  (watchlist update 입력)
+"""
+import argparse
+import json
+import os
+import time
+from datetime import date, datetime, timedelta
+from typing import List, Optional
+
+from .krx_client import MARKETS, KRXClientError, get_client
+from .price_store import get_store
+
+# --csv-dir 파일명 접두어 (krx_dataset_crawling 의 kospi_YYYYMMDD.csv 와 같은 형식)
+CSV_PREFIX = {"ALL": "krx", "STK": "kospi", "KSQ": "kosdaq", "KNX": "konex"}
+
+
+def _date(s: str) -> date:
+    return datetime.strptime(s, "%Y%m%d").date()
+
+
+def pending_days(store, market: str, start: Optional[date], end: Optional[date], max_days: int) -> List[date]:
+    """수집할 거래일 (과거 → 최신). start 가 없으면 마지막 수집일 다음부터 (처음이면 end 하루)."""
+    cal = store.calendar
+    final = cal.last_final_day(store.now_fn())
+    end = min(end or final, final)
+    catch_up = start is None
+    if catch_up:
+        last = store.last_snapshot(market)
+        start = last + timedelta(days=1) if last else end
+    done = store.snapshot_days(market, start, end)
+    days = [d for d in cal.trading_days(start, end) if d.strftime("%Y%m%d") not in done]
+    if catch_up and max_days and len(days) > max_days:
+        print(f"[ingest_market] 밀린 거래일 {len(days)}일 중 최근 {max_days}일만 수집 (--max-days, 나머지는 --start 로 백필)")
+        days = days[-max_days:]
+    return days
+
+
+def ingest(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    market: str = "ALL",
+    csv_dir: Optional[str] = None,
+    max_days: int = 20,
+) -> List[dict]:
+    store = get_store()
+    if store is None:
+        raise RuntimeError("KRX_PRICE_STORE=0: 시세 저장소가 꺼져 있음")
+    client = get_client()
+    results = []
+    for d in pending_days(store, market, start, end, max_days):
+        t0 = time.perf_counter()
+        # 휴장일을 기록하면 달력이 바뀌므로 하루씩 순서대로
+        if not store.calendar.is_trading_day(d):
+            continue
+        try:
+            frame = client.market_prices(d, market)
+        except KRXClientError as e:
+            # 이후 일자는 구간이 이어지지 않으므로 중단 (다음 실행에서 이어서 수집)
+            print(f"[ingest_market] {d:%Y%m%d} 전종목 시세 요청 실패, 중단: {e}")
+            break
+        result = store.ingest_snapshot(d, frame, market)
+        if csv_dir and not frame.empty:
+            os.makedirs(csv_dir, exist_ok=True)
+            path = os.path.join(csv_dir, f"{CSV_PREFIX[market]}_{d:%Y%m%d}.csv")
+            frame.drop(columns="표준코드").to_csv(path, index=False, encoding="euc-kr")
+            result["csv"] = path
+        result["elapsed_sec"] = round(time.perf_counter() - t0, 3)
+        if result["holiday"]:
+            summary = "휴장일"
+        else:
+            summary = (
+                f"{result['rows']}종목 (신규 {result['new']}, 연장 {result['extended']}, "
+                f"수정주가 {result['readjusted']}, 건너뜀 {result['skipped']})"
+            )
+        print(f"[ingest_market] {result['date']} {market}: {summary} {result['elapsed_sec']}s")
+        results.append(result)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="전종목 시세 일별 수집 → 로컬 시세 저장소")
+    parser.add_argument("--start", type=_date, default=None, help="YYYYMMDD (없으면 마지막 수집일 다음)")
+    parser.add_argument("--end", type=_date, default=None, help="YYYYMMDD (기본: 최근 확정 거래일)")
+    parser.add_argument("--market", default="ALL", choices=MARKETS)
+    parser.add_argument("--csv-dir", default=None, help="전종목 시세 CSV 도 저장할 폴더")
+    parser.add_argument("--max-days", type=int, default=20, help="밀린 거래일 수집 한도 (--start 없을 때, 0 = 무제한)")
+    args = parser.parse_args()
+
+    out = ingest(args.start, args.end, args.market, args.csv_dir, args.max_days)
+    print(json.dumps(out, ensure_ascii=False, indent=2))
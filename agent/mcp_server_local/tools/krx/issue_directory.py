@@ -0,0 +1,251 @@
+# issue_directory.py
+"""
+KRX 종목코드 디렉터리 (표준코드(ISIN) / 단축코드 ↔ 한글 종목명, 우선주 포함).
+
+종목 검색 팝업(searchText 입력 + 2.5 초 대기 ×2 + 첫 행 클릭) 대신 로컬 캐시에서 종목을 바로 찾는다.
+검색 첫 행이 우선주 등 다른 종목일 수 있던 문제도 정확 일치 우선으로 없앤다.
+
+- 출처: KRX 전종목 기본정보 (MDCSTAT01901, getJsonData.cmd 한 번, 약 2~3천 종목)
+- 캐시: KRX_ISSUE_DIRECTORY (기본 tools/krx/cache/issue_directory.json), KST 날짜가 바뀌면 다시 받는다.
+  받기에 실패하면 이전 캐시를 그대로 사용
+- 조회
+    get(q)     : 정확 일치 (단축코드 / 표준코드 / 정규화한 종목명·정식명·영문명), 없으면 None
+    search(q)  : 유사도 순 후보 [(종목, 점수)]
+    resolve(q) : 정확 일치 또는 확실한 유사 일치 1건(점수 차이 또는 유일한 포함 일치), 아니면 후보를 담은 ValueError
+    family(q)  : 같은 회사의 보통주 + 우선주 (단축코드 앞 5자리가 같음)
+
+종목 레코드 (dict):
+    {'isin', 'code', 'name'(약명), 'full_name', 'eng_name', 'market', 'kind'(보통주/우선주 종류), 'listed'}
+"""
+import difflib
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from .krx_client import BLD_ISSUE_LIST, KST, KRXClientError, get_client
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_PATH = os.path.join(BASE_DIR, "cache", "issue_directory.json")
+
+# MDCSTAT01901 응답 필드 → 레코드 키
+ISSUE_FIELDS = {
+    "ISU_CD": "isin",
+    "ISU_SRT_CD": "code",
+    "ISU_ABBRV": "name",
+    "ISU_NM": "full_name",
+    "ISU_ENG_NM": "eng_name",
+    "MKT_TP_NM": "market",
+    "KIND_STKCERT_TP_NM": "kind",
+    "LIST_DD": "listed",
+}
+# 유사 일치를 그대로 쓰는 최소 점수와 2위와의 최소 차이
+FUZZY_CUTOFF = 0.85
+FUZZY_MARGIN = 0.05
+
+
+def normalize_name(name: str) -> str:
+    """전각/공백/대소문자/법인 표기 차이를 없앤 이름. '…우선주' 는 KRX 약명 표기 '…우' 로."""
+    s = unicodedata.normalize("NFKC", str(name))
+    s = re.sub(r"\s+", "", s).upper()
+    s = re.sub(r"^(주식회사|\(주\))|(주식회사|\(주\))$", "", s)
+    return re.sub(r"우선주$", "우", s)
+
+
+def is_preferred(issue: dict) -> bool:
+    return "우선주" in (issue.get("kind") or "")
+
+
+def finder_row(issue: dict) -> dict:
+    """종목 검색 팝업(finder_stkisu) 결과 행과 같은 형태 (KRXClient.daily_prices 입력)."""
+    return {
+        "full_code": issue["isin"],
+        "short_code": issue["code"],
+        "codeName": issue["name"],
+        "marketName": issue.get("market", ""),
+    }
+
+
+# ----------------------------
+# 디렉터리
+# ----------------------------
+class IssueDirectory:
+    def __init__(self, issues: List[dict], as_of: str):
+        self.issues = issues
+        self.as_of = as_of  # KST 'YYYYMMDD'
+        self._by_code: Dict[str, dict] = {}
+        self._by_name: Dict[str, List[dict]] = {}
+        for it in issues:
+            self._by_code[it["code"]] = it
+            self._by_code[it["isin"]] = it
+            for key in {normalize_name(it[k]) for k in ("name", "full_name", "eng_name") if it.get(k)}:
+                self._by_name.setdefault(key, []).append(it)
+        self._names = list(self._by_name)
+
+    def __len__(self) -> int:
+        return len(self.issues)
+
+    @staticmethod
+    def _prefer_common(cands: List[dict]) -> dict:
+        return sorted(cands, key=lambda it: (is_preferred(it), it["code"]))[0]
+
+    def get(self, query: str) -> Optional[dict]:
+        q = str(query or "").strip()
+        if not q:
+            return None
+        code = q.upper()
+        if code.startswith("A") and len(code) == 7:  # 'A005930' 표기
+            code = code[1:]
+        hit = self._by_code.get(code)
+        if hit is not None:
+            return hit
+        cands = self._by_name.get(normalize_name(q))
+        return self._prefer_common(cands) if cands else None
+
+    def search(self, query: str, limit: int = 5) -> List[Tuple[dict, float]]:
+        q = normalize_name(query)
+        if not q:
+            return []
+        scored: Dict[str, Tuple[dict, float]] = {}
+
+        def _add(key: str, score: float) -> None:
+            for it in self._by_name[key]:
+                prev = scored.get(it["code"])
+                if prev is None or score > prev[1]:
+                    scored[it["code"]] = (it, score)
+
+        for key in difflib.get_close_matches(q, self._names, n=limit * 2, cutoff=0.5):
+            _add(key, difflib.SequenceMatcher(None, q, key).ratio())
+        # 포함 관계 (예: '하이닉스' ↔ 'SK하이닉스'): 길이 비율로 점수
+        for key in self._names:
+            if q in key or key in q:
+                _add(key, min(len(q), len(key)) / max(len(q), len(key)))
+        ranked = sorted(
+            scored.values(), key=lambda x: (-x[1], is_preferred(x[0]), x[0]["code"])
+        )
+        return ranked[:limit]
+
+    def resolve(self, query: str) -> dict:
+        hit = self.get(query)
+        if hit is not None:
+            return hit
+        ranked = self.search(query)
+        if ranked:
+            best, score = ranked[0]
+            runner_up = ranked[1][1] if len(ranked) > 1 else 0.0
+            if score >= FUZZY_CUTOFF and score - runner_up >= FUZZY_MARGIN:
+                return best
+            # 후보가 하나뿐이고 그 이름에 검색어가 들어 있으면 (종목 검색 결과 1건과 같음)
+            q = normalize_name(query)
+            if len(ranked) == 1 and any(
+                q in normalize_name(best[k]) for k in ("name", "full_name", "eng_name") if best.get(k)
+            ):
+                return best
+            hint = ", ".join(f"{it['name']}({it['code']})" for it, _ in ranked)
+            raise ValueError(f"KRX 종목을 특정할 수 없음: {query} (후보: {hint})")
+        raise ValueError(f"KRX 종목 없음: {query}")
+
+    def family(self, query: str) -> List[dict]:
+        base = self.resolve(query)
+        prefix = base["code"][:5]
+        members = [it for it in self.issues if it["code"][:5] == prefix]
+        return sorted(members, key=lambda it: (is_preferred(it), it["code"]))
+
+    # ---------- 저장/로드 ----------
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = f"{path}.tmp{os.getpid()}"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"as_of": self.as_of, "issues": self.issues}, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "IssueDirectory":
+        with open(path, encoding="utf-8") as f:
+            payload = json.load(f)
+        return cls(payload["issues"], payload["as_of"])
+
+
+def _today_kst() -> str:
+    return datetime.now(KST).strftime("%Y%m%d")
+
+
+def fetch_directory(client=None) -> IssueDirectory:
+    """KRX 전종목 기본정보로 디렉터리 생성 (요청 1회)."""
+    client = client or get_client()
+    payload = client.get_json(BLD_ISSUE_LIST, mktId="ALL", share="1", csvxls_isNo="false")
+    rows = payload.get("OutBlock_1")
+    if not rows:
+        raise KRXClientError(f"KRX 종목 기본정보 응답이 비어 있음: {sorted(payload)[:5]}")
+    issues = []
+    for r in rows:
+        it = {key: str(r.get(field, "") or "").strip() for field, key in ISSUE_FIELDS.items()}
+        if it["isin"] and it["code"] and it["name"]:
+            it["listed"] = it["listed"].replace("/", "")
+            issues.append(it)
+    return IssueDirectory(issues, _today_kst())
+
+
+_directory: Optional[IssueDirectory] = None
+_directory_lock = threading.Lock()
+# 캐시도 없이 받기에 실패하면 이 시간(초) 동안은 다시 요청하지 않고 바로 실패 (조회마다 재시도 방지)
+RETRY_AFTER = 300.0
+_failed_until = 0.0
+
+
+def directory_path() -> str:
+    return os.environ.get("KRX_ISSUE_DIRECTORY") or DEFAULT_PATH
+
+
+def get_directory(refresh: bool = False) -> IssueDirectory:
+    """
+    프로세스 공용 디렉터리. 메모리 → 캐시 파일 → KRX 순으로, 오늘(KST) 것이 아니면 다시 받는다.
+    KRX 요청이 실패해도 이전 캐시가 있으면 그것을 반환 (없으면 KRXClientError).
+    """
+    global _directory, _failed_until
+    today = _today_kst()
+    d = _directory
+    if d is not None and d.as_of == today and not refresh:
+        return d
+    with _directory_lock:
+        d = _directory
+        if d is not None and d.as_of == today and not refresh:
+            return d
+        if d is None and not refresh and time.monotonic() < _failed_until:
+            raise KRXClientError("KRX 종목코드 디렉터리 없음 (최근 갱신 실패)")
+        path = directory_path()
+        if d is None and os.path.exists(path):
+            try:
+                d = IssueDirectory.load(path)
+            except Exception as e:
+                print(f"[issue_directory] 캐시 읽기 실패 ({path}): {e}")
+        if d is None or d.as_of != today or refresh:
+            try:
+                fresh = fetch_directory()
+                fresh.save(path)
+                print(f"[issue_directory] {len(fresh)} 종목 갱신 → {path}")
+                d = fresh
+            except KRXClientError as e:
+                if d is None:
+                    _failed_until = time.monotonic() + RETRY_AFTER
+                    raise
+                print(f"[issue_directory] 갱신 실패, {d.as_of} 캐시 사용: {e}")
+                # 같은 날 반복 요청 방지
+                d = IssueDirectory(d.issues, today)
+        _directory = d
+        return d
+
+
+__all__ = [
+    "IssueDirectory",
+    "directory_path",
+    "fetch_directory",
+    "finder_row",
+    "get_directory",
+    "is_preferred",
+    "normalize_name",
+]
@@ -0,0 +1,341 @@
+# krx_client.py
+"""
+KRX 정보데이터시스템(data.krx.co.kr) HTTP 클라이언트.
+
+'개별종목 시세 추이'(MDC0201020103) 화면이 내부적으로 호출하는 JSON 엔드포인트(getJsonData.cmd)를
+브라우저 없이 직접 요청한다. (Selenium 메뉴 클릭 + 다운로드 폴더 polling 대체)
+- requests.Session + HTTPAdapter 연결 풀을 프로세스 전체에서 공유, 5xx/연결 오류는 backoff 재시도
+- 응답은 메모리에서 바로 DataFrame 으로 변환: CSV 다운로드와 같은 한글 컬럼, 최신 → 과거 순서
+- 종목명 → 종목코드는 종목코드 디렉터리(issue_directory, 하루 1회 갱신) 우선, 없으면 종목 검색(finder) 후 메모리 캐시
+
+KRX_FETCH      : auto (HTTP 실패 시 Selenium, 기본) | http | selenium
+KRX_BASE_URL   : 기본 http://data.krx.co.kr (krx_stub_server 로 녹화 응답을 재생할 때는 그 주소)
+KRX_TIMEOUT    : 요청 타임아웃(초, 기본 10)
+KRX_POOL_SIZE  : 연결 풀 크기 (기본 8)
+KRX_RECORD_DIR : 지정하면 받은 응답을 krx_stub_server 가 재생할 수 있는 형태로 저장
+"""
+import os
+import threading
+from datetime import date, datetime
+from typing import Dict, List, Optional, Union
+from zoneinfo import ZoneInfo
+
+import numpy as np
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+KST = ZoneInfo("Asia/Seoul")
+DEFAULT_BASE_URL = "http://data.krx.co.kr"
+JSON_PATH = "/comm/bldAttendant/getJsonData.cmd"
+MENU_URL = "/contents/MDC/MDI/mdiLoader/index.cmd?menuId=MDC0201020103"
+
+BLD_FINDER = "dbms/comm/finder/finder_stkisu"
+BLD_DAILY_PRICE = "dbms/MDC/STAT/standard/MDCSTAT01701"
+BLD_ISSUE_LIST = "dbms/MDC/STAT/standard/MDCSTAT01901"
+BLD_MARKET_PRICE = "dbms/MDC/STAT/standard/MDCSTAT01501"
+
+# MDCSTAT01701 응답 필드 → CSV 다운로드 컬럼
+PRICE_COLUMNS = {
+    "TRD_DD": "일자",
+    "TDD_CLSPRC": "종가",
+    "CMPPREVDD_PRC": "대비",
+    "FLUC_RT": "등락률",
+    "TDD_OPNPRC": "시가",
+    "TDD_HGPRC": "고가",
+    "TDD_LWPRC": "저가",
+    "ACC_TRDVOL": "거래량",
+    "ACC_TRDVAL": "거래대금",
+    "MKTCAP": "시가총액",
+    "LIST_SHRS": "상장주식수",
+}
+# MDCSTAT01501(전종목 시세) 종목 필드 → CSV 다운로드 컬럼 (시세 필드는 PRICE_COLUMNS 와 같음)
+MARKET_COLUMNS = {
+    "ISU_SRT_CD": "종목코드",
+    "ISU_ABBRV": "종목명",
+    "MKT_NM": "시장구분",
+    "SECT_TP_NM": "소속부",
+}
+# 전종목 시세 시장 구분 (mktId)
+MARKETS = ("ALL", "STK", "KSQ", "KNX")
+# FLUC_TP_CD: 1 상승, 2 하락, 3 보합, 4 상한, 5 하한
+_FALL_CODES = ("2", "5")
+
+FETCH_MODES = ("auto", "http", "selenium")
+
+DateLike = Union[str, date, datetime]
+
+
+class KRXClientError(RuntimeError):
+    """KRX 요청 실패 (연결/HTTP 오류, JSON 이 아닌 응답 등). KRX_FETCH=auto 면 Selenium 으로 재시도."""
+
+
+def fetch_mode() -> str:
+    mode = os.environ.get("KRX_FETCH", "auto").strip().lower() or "auto"
+    if mode not in FETCH_MODES:
+        raise ValueError(f"KRX_FETCH 는 {FETCH_MODES} 중 하나여야 함: {mode}")
+    return mode
+
+
+def _yyyymmdd(d: DateLike) -> str:
+    if isinstance(d, (date, datetime)):
+        return d.strftime("%Y%m%d")
+    s = str(d).replace("-", "").replace("/", "").strip()
+    if len(s) != 8 or not s.isdigit():
+        raise ValueError(f"날짜는 'YYYYMMDD' 형식이어야 합니다: {d}")
+    return s
+
+
+def _num(v) -> float:
+    try:
+        return float(str(v).replace(",", "").strip())
+    except ValueError:  # "", "-" 등
+        return float("nan")
+
+
+def _check_fields(rows: List[dict], fields) -> None:
+    if rows:
+        missing = [k for k in fields if k not in rows[0]]
+        if missing:
+            raise KRXClientError(f"KRX 응답에 필드 누락: {missing}")
+
+
+def _price_values(rows: List[dict]) -> Dict[str, np.ndarray]:
+    """시세 필드(일자 제외) → 컬럼별 float 배열."""
+    cols = {
+        col: np.array([_num(r[key]) for r in rows], dtype=np.float64)
+        for key, col in PRICE_COLUMNS.items()
+        if key != "TRD_DD"
+    }
+    # 대비는 부호 없이 올 수 있으므로 등락 구분 코드/등락률로 부호를 맞춘다
+    falling = np.array(
+        [str(r.get("FLUC_TP_CD", "")) in _FALL_CODES for r in rows], dtype=bool
+    ) | (cols["등락률"] < 0)
+    cols["대비"] = np.where(falling, -np.abs(cols["대비"]), cols["대비"])
+    return cols
+
+
+def prices_frame(rows: List[dict]) -> pd.DataFrame:
+    """MDCSTAT01701 output → CSV 다운로드와 같은 DataFrame (일자 'YYYY/MM/DD', 숫자 컬럼, 최신 → 과거)."""
+    _check_fields(rows, PRICE_COLUMNS)
+    rows = sorted(rows, key=lambda r: str(r["TRD_DD"]), reverse=True)
+    cols: Dict[str, object] = {"일자": [str(r["TRD_DD"]).strip() for r in rows]}
+    cols.update(_price_values(rows))
+    return csv_frame(cols)
+
+
+def market_frame(rows: List[dict]) -> pd.DataFrame:
+    """
+    MDCSTAT01501 OutBlock_1 → 전종목 시세 CSV 다운로드와 같은 DataFrame + 맨 앞 '표준코드'(ISIN).
+    휴장일 등으로 종가가 없는 행은 제외.
+    """
+    fields = ["ISU_CD", *MARKET_COLUMNS, *(k for k in PRICE_COLUMNS if k != "TRD_DD")]
+    _check_fields(rows, fields)
+    rows = [r for r in rows if np.isfinite(_num(r["TDD_CLSPRC"]))]
+    cols: Dict[str, object] = {"표준코드": [str(r["ISU_CD"]).strip() for r in rows]}
+    for key, col in MARKET_COLUMNS.items():
+        cols[col] = [str(r[key]).strip() for r in rows]
+    cols.update(_price_values(rows))
+    return csv_frame(cols, ["표준코드", *MARKET_COLUMNS.values(), *(c for c in PRICE_COLUMNS.values() if c != "일자")])
+
+
+def csv_frame(cols: Dict[str, object], columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """{문자열 컬럼: [...], 숫자 컬럼: float 배열} → CSV 다운로드와 같은 dtype 의 DataFrame."""
+    # 정수 컬럼은 CSV 를 read_csv 로 읽었을 때처럼 int64 (결측이 있으면 float 유지)
+    for col, v in cols.items():
+        if isinstance(v, np.ndarray) and col != "등락률" and np.isfinite(v).all() and (v % 1 == 0).all():
+            cols[col] = v.astype(np.int64)
+    return pd.DataFrame(cols, columns=columns or list(PRICE_COLUMNS.values()))
+
+
+# ----------------------------
+# 클라이언트
+# ----------------------------
+class KRXClient:
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        timeout: Optional[float] = None,
+        pool_size: Optional[int] = None,
+        retries: int = 3,
+        record_dir: Optional[str] = None,
+    ):
+        self.base_url = (base_url or os.environ.get("KRX_BASE_URL") or DEFAULT_BASE_URL).rstrip("/")
+        self.timeout = float(timeout or os.environ.get("KRX_TIMEOUT", "10"))
+        pool_size = int(pool_size or os.environ.get("KRX_POOL_SIZE", "8"))
+        self.record_dir = record_dir if record_dir is not None else (os.environ.get("KRX_RECORD_DIR") or None)
+
+        retry = Retry(
+            total=retries,
+            backoff_factor=0.5,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset({"GET", "POST"}),  # 조회 전용 POST 라 재시도 안전
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update(
+            {
+                "User-Agent": (
+                    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                    "(KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+                ),
+                "Referer": self.base_url + MENU_URL,
+                "X-Requested-With": "XMLHttpRequest",
+                "Accept": "application/json, text/javascript, */*; q=0.01",
+            }
+        )
+        self._issues: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._record_lock = threading.Lock()
+
+    def close(self) -> None:
+        self.session.close()
+
+    # ---------- 저수준 ----------
+    def get_json(self, bld: str, **params) -> dict:
+        data = {"bld": bld, "locale": "ko_KR", **params}
+        try:
+            resp = self.session.post(self.base_url + JSON_PATH, data=data, timeout=self.timeout)
+            resp.raise_for_status()
+        except requests.RequestException as e:
+            raise KRXClientError(f"KRX 요청 실패 ({bld}): {e}") from e
+        try:
+            payload = resp.json()
+        except ValueError as e:
+            snippet = resp.text[:120].replace("\n", " ")
+            raise KRXClientError(f"KRX 응답이 JSON 이 아님 ({bld}): {snippet!r}") from e
+        if not isinstance(payload, dict):
+            raise KRXClientError(f"KRX 응답 형식 오류 ({bld}): {type(payload).__name__}")
+        if self.record_dir:
+            self._record(bld, data, payload)
+        return payload
+
+    # ---------- 종목 검색 ----------
+    def find_issue(self, stock_name: str) -> dict:
+        """
+        종목명(또는 단축/표준코드) → {'full_code', 'short_code', 'codeName', 'marketName', ...}.
+        종목코드 디렉터리에서 특정되면 요청 없이 그 종목, 아니면 종목 검색에서
+        정확히 같은 종목명이 있으면 그 행, 없으면 검색 결과 첫 행 (Selenium 흐름과 동일).
+        """
+        from .issue_directory import finder_row, get_directory  # issue_directory 가 이 모듈을 import
+
+        name = (stock_name or "").strip()
+        if not name:
+            raise ValueError("stock_name은 비어있지 않은 문자열이어야 합니다.")
+        with self._lock:
+            hit = self._issues.get(name)
+        if hit is not None:
+            return hit
+
+        try:
+            hit = finder_row(get_directory().resolve(name))
+        except (KRXClientError, ValueError) as e:
+            print(f"[krx_client] 종목코드 디렉터리 미사용, 종목 검색으로 조회: {e}")
+        if hit is not None:
+            with self._lock:
+                self._issues[name] = hit
+            return hit
+
+        payload = self.get_json(BLD_FINDER, mktsel="ALL", typeNo="0", searchText=name)
+        rows = payload.get("block1") or []
+        if not rows:
+            raise ValueError(f"KRX 종목 검색 결과 없음: {name}")
+        exact = [r for r in rows if str(r.get("codeName", "")).strip() == name]
+        hit = (exact or rows)[0]
+        with self._lock:
+            self._issues[name] = hit
+        return hit
+
+    # ---------- 개별종목 시세 추이 ----------
+    def daily_prices(
+        self, issue: dict, start: DateLike, end: DateLike, adjusted: bool = True
+    ) -> pd.DataFrame:
+        """find_issue 결과 종목의 [start, end] 일별 시세 (CSV 다운로드와 같은 컬럼, 최신 → 과거)."""
+        full_code = issue["full_code"]
+        label = f"{issue.get('short_code', '')}/{issue.get('codeName', '')}"
+        payload = self.get_json(
+            BLD_DAILY_PRICE,
+            tboxisuCd_finder_stkisu0_0=label,
+            isuCd=full_code,
+            isuCd2=full_code,
+            codeNmisuCd_finder_stkisu0_0=issue.get("codeName", ""),
+            param1isuCd_finder_stkisu0_0="ALL",
+            strtDd=_yyyymmdd(start),
+            endDd=_yyyymmdd(end),
+            adjStkPrc_check="Y" if adjusted else "",
+            adjStkPrc="2" if adjusted else "1",
+            share="1",
+            money="1",
+            csvxls_isNo="false",
+        )
+        if "output" not in payload:
+            raise KRXClientError(f"KRX 시세 응답에 output 없음: {sorted(payload)[:5]}")
+        return prices_frame(payload["output"])
+
+    # ---------- 전종목 시세 ----------
+    def market_prices(self, trade_date: DateLike, market: str = "ALL") -> pd.DataFrame:
+        """trade_date 하루 전종목 시세 (market_frame, 요청 1회). 휴장일이면 빈 DataFrame."""
+        if market not in MARKETS:
+            raise ValueError(f"market 은 {MARKETS} 중 하나여야 함: {market}")
+        payload = self.get_json(
+            BLD_MARKET_PRICE,
+            mktId=market,
+            trdDd=_yyyymmdd(trade_date),
+            share="1",
+            money="1",
+            csvxls_isNo="false",
+        )
+        if "OutBlock_1" not in payload:
+            raise KRXClientError(f"KRX 전종목 시세 응답에 OutBlock_1 없음: {sorted(payload)[:5]}")
+        return market_frame(payload["OutBlock_1"])
+
+    def stock_prices(
+        self,
+        stock_name: str,
+        months: int = 6,
+        end: Optional[DateLike] = None,
+        adjusted: bool = True,
+    ) -> pd.DataFrame:
+        """종목명으로 end(기본: 오늘 KST) 까지 months 개월 일별 시세. (화면의 1개월/6개월 버튼과 같은 구간)"""
+        end_ts = pd.Timestamp(_yyyymmdd(end)) if end is not None else pd.Timestamp(datetime.now(KST).date())
+        start_ts = end_ts - pd.DateOffset(months=months)
+        issue = self.find_issue(stock_name)
+        return self.daily_prices(issue, start_ts.date(), end_ts.date(), adjusted=adjusted)
+
+    # ---------- 녹화 (krx_stub_server 재생용) ----------
+    def _record(self, bld: str, params: dict, payload: dict) -> None:
+        from .krx_stub_server import merge_recording
+
+        try:
+            with self._record_lock:
+                merge_recording(self.record_dir, bld, params, payload)
+        except Exception as e:
+            print(f"[krx_client] 응답 녹화 실패 ({bld}): {e}")
+
+
+_client: Optional[KRXClient] = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> KRXClient:
+    """프로세스 공용 클라이언트 (연결 풀 공유)."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = KRXClient()
+    return _client
+
+
+__all__ = [
+    "FETCH_MODES",
+    "KRXClient",
+    "KRXClientError",
+    "PRICE_COLUMNS",
+    "fetch_mode",
+    "get_client",
+    "prices_frame",
+]
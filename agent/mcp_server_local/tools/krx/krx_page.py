@@ -0,0 +1,118 @@
+# krx_page.py
+"""
+KRX 정보데이터시스템 화면(Selenium) 공용 헬퍼.
+
+select_issue: '개별종목 시세 추이' 화면의 종목 선택.
+- 종목코드 디렉터리(issue_directory)에서 종목이 특정되면 검색 팝업을 열지 않고
+  팝업이 채우는 폼 값(isuCd / isuCd2 / tbox / codeNm / param1)을 JS 로 바로 채운다 (2.5 초 대기 ×2 생략)
+- 디렉터리를 쓸 수 없거나(KRX 오류, 후보 여러 개) 폼 필드가 없으면 기존 검색 팝업 → 첫 행 클릭
+"""
+import time
+
+from selenium.common.exceptions import StaleElementReferenceException, TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+
+from .krx_client import KRXClientError
+from .issue_directory import get_directory
+
+FINDER = "finder_stkisu0_0"
+
+# 팝업에서 행을 고르면 채워지는 폼 필드 (name 속성) — KRXClient.daily_prices 요청 파라미터와 같다
+_FILL_FORM_JS = """
+const v = arguments[0];
+const fields = {
+    isuCd: v.isin,
+    isuCd2: v.isin,
+    tboxisuCd_finder_stkisu0_0: v.code + '/' + v.name,
+    codeNmisuCd_finder_stkisu0_0: v.name,
+    param1isuCd_finder_stkisu0_0: 'ALL',
+};
+let filled = 0;
+for (const [name, value] of Object.entries(fields)) {
+    const els = document.querySelectorAll('[name="' + name + '"], #' + name);
+    els.forEach(el => { el.value = value; });
+    if (els.length) filled += 1;
+}
+return filled;
+"""
+
+
+def select_issue(driver, wait, stock_name: str) -> str:
+    """
+    현재 화면에서 stock_name 종목을 선택. Returns: "directory" | "popup" (사용한 방식)
+    """
+    try:
+        issue = get_directory().resolve(stock_name)
+    except (KRXClientError, ValueError) as e:
+        print(f"[krx_page] 종목코드 디렉터리 미사용, 검색 팝업으로 선택: {e}")
+    else:
+        # isuCd 필드가 있어야(화면 로딩 완료) 채울 수 있음
+        try:
+            wait.until(EC.presence_of_element_located((By.NAME, "isuCd")))
+        except TimeoutException:
+            print("[krx_page] 종목 폼 필드(isuCd) 대기 시간 초과, 검색 팝업으로 선택")
+        else:
+            filled = driver.execute_script(_FILL_FORM_JS, issue)
+            if filled >= 2:
+                return "directory"
+            print(f"[krx_page] 종목 폼 필드 부족({filled}), 검색 팝업으로 선택")
+    _select_issue_popup(driver, wait, stock_name)
+    return "popup"
+
+
+def _select_issue_popup(driver, wait, stock_name: str) -> None:
+    """종목 검색 팝업 → 조회 → 결과 첫 행 클릭."""
+    wait.until(EC.element_to_be_clickable((By.ID, f"btnisuCd_{FINDER}"))).click()
+    search_input = wait.until(
+        EC.presence_of_element_located((By.ID, f"searchText__{FINDER}"))
+    )
+    search_input.clear()
+    search_input.send_keys(stock_name)
+    time.sleep(2.5)
+
+    wait.until(EC.element_to_be_clickable((By.ID, f"searchBtn__{FINDER}"))).click()
+    time.sleep(2.5)
+
+    # 결과 테이블 첫 번째 행 클릭 (stale 방어 버전)
+    grid_selector = f"#jsGrid__{FINDER} tbody tr.jsRow"
+    grid_locator = (By.CSS_SELECTOR, grid_selector)
+
+    # 결과가 나타날 때까지 대기 (한 개 이상)
+    wait.until(lambda d: len(d.find_elements(*grid_locator)) > 0)
+
+    # JS 클릭 헬퍼: WebElement 참조 없이 한 번에 처리 → stale 확률 낮음
+    def _js_click_first_row():
+        return driver.execute_script(
+            """
+            const el = document.querySelector(arguments[0]);
+            if (!el) return false;
+            el.scrollIntoView({block:'center'});
+            el.click();
+            return true;
+            """,
+            grid_selector,
+        )
+
+    # 최대 5회 재시도 (리렌더링 대비)
+    for _ in range(5):
+        try:
+            # 시도 1: JS로 직접 클릭
+            if _js_click_first_row():
+                return
+            # 시도 2: 다시 찾아서 파이썬 객체로 클릭
+            rows = driver.find_elements(*grid_locator)
+            if rows:
+                driver.execute_script("arguments[0].scrollIntoView({block:'center'});", rows[0])
+                # 클릭 직전 최신 참조로 다시 가져오기
+                driver.find_elements(*grid_locator)[0].click()
+                return
+        except StaleElementReferenceException:
+            time.sleep(0.2)  # 잠깐 대기 후 재시도
+        except Exception:
+            time.sleep(0.2)
+
+    raise RuntimeError("결과 첫 행 클릭 실패(요소 stale 또는 미표시)")
+
+
+__all__ = ["select_issue"]
@@ -0,0 +1,316 @@
+# krx_stub_server.py
+"""
+KRX getJsonData.cmd 로컬 대역(stand-in) 서버. 녹화해 둔 응답을 재생해 네트워크 없이 테스트한다.
+
+녹화 폴더 구조 (KRX_RECORD_DIR 로 실제 응답을 녹화하거나 --from-csv 로 CSV 다운로드를 변환):
+    {dir}/finder_stkisu.json           {"block1": [종목 검색 결과, ...]}
+    {dir}/MDCSTAT01701/{full_code}.json {"output": [일별 시세, 최신 → 과거]}
+    {dir}/MDCSTAT01901.json            {"OutBlock_1": [전종목 기본정보]} (없으면 finder 녹화로 생성)
+    {dir}/MDCSTAT01501/{mktId}_{trdDd}.json {"OutBlock_1": [전종목 시세]} (없으면 종목별 시세 녹화로 생성)
+
+- finder: searchText 가 종목명/단축코드에 포함된 종목
+- 전종목 기본정보: 종목코드 디렉터리(issue_directory) 원본
+- 전종목 시세: trdDd 하루, mktId 시장의 종목 (ingest_market 원본)
+- 시세  : isuCd 종목의 strtDd ~ endDd 행
+- 녹화에 없는 bld 는 404
+
+사용법 (agent/mcp_server_local 에서):
+    python -m tools.krx.krx_stub_server --dir krx_recordings --port 8765 \
+        [--from-csv ../../model/data/anomaly_data.csv --name 테스트종목 --code 000000] [--latency 0.05]
+    KRX_BASE_URL=http://127.0.0.1:8765 python ...
+"""
+import argparse
+import glob
+import json
+import os
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+from .krx_client import BLD_DAILY_PRICE, BLD_FINDER, BLD_ISSUE_LIST, BLD_MARKET_PRICE, JSON_PATH, PRICE_COLUMNS
+
+FINDER_FILE = "finder_stkisu.json"
+PRICE_DIR = BLD_DAILY_PRICE.rsplit("/", 1)[-1]
+ISSUE_LIST_FILE = BLD_ISSUE_LIST.rsplit("/", 1)[-1] + ".json"
+MARKET_DIR = BLD_MARKET_PRICE.rsplit("/", 1)[-1]
+# 전종목 시세 mktId → finder marketCode
+_MARKET_CODES = {"STK": "STK", "KSQ": "KSQ", "KNX": "KNX"}
+
+
+# ----------------------------
+# 녹화 파일
+# ----------------------------
+def _read_json(path: str, default: dict) -> dict:
+    if not os.path.exists(path):
+        return default
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_json(path: str, payload: dict) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp{os.getpid()}"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, path)
+
+
+def _merge_issues(record_dir: str, rows: List[dict]) -> None:
+    path = os.path.join(record_dir, FINDER_FILE)
+    merged = {r["full_code"]: r for r in _read_json(path, {"block1": []})["block1"]}
+    merged.update({r["full_code"]: r for r in rows if r.get("full_code")})
+    _write_json(path, {"block1": list(merged.values())})
+
+
+def _merge_prices(record_dir: str, full_code: str, rows: List[dict]) -> None:
+    path = os.path.join(record_dir, PRICE_DIR, f"{full_code}.json")
+    merged = {r["TRD_DD"]: r for r in _read_json(path, {"output": []})["output"]}
+    merged.update({r["TRD_DD"]: r for r in rows})
+    _write_json(path, {"output": [merged[k] for k in sorted(merged, reverse=True)]})
+
+
+def merge_recording(record_dir: str, bld: str, params: dict, payload: dict) -> None:
+    """KRXClient 가 받은 응답 하나를 녹화 폴더에 합친다 (같은 종목/일자는 새 응답으로 교체)."""
+    if bld == BLD_FINDER:
+        _merge_issues(record_dir, payload.get("block1") or [])
+    elif bld == BLD_DAILY_PRICE:
+        _merge_prices(record_dir, params["isuCd"], payload.get("output") or [])
+    elif bld == BLD_ISSUE_LIST:
+        _write_json(os.path.join(record_dir, ISSUE_LIST_FILE), payload)
+    elif bld == BLD_MARKET_PRICE:
+        _write_json(os.path.join(record_dir, MARKET_DIR, f"{params['mktId']}_{params['trdDd']}.json"), payload)
+
+
+def _issue_list_row(finder: dict) -> dict:
+    """finder 녹화 행 → 전종목 기본정보 행 (녹화가 없을 때). '…우', '…우B' 등은 우선주로 본다."""
+    name = finder.get("codeName", "")
+    preferred = re.search(r"\d?우[A-C]?$", name) is not None
+    return {
+        "ISU_CD": finder.get("full_code", ""),
+        "ISU_SRT_CD": finder.get("short_code", ""),
+        "ISU_NM": name if preferred else f"{name}보통주",
+        "ISU_ABBRV": name,
+        "ISU_ENG_NM": finder.get("codeEngName", ""),
+        "MKT_TP_NM": finder.get("marketName", ""),
+        "KIND_STKCERT_TP_NM": "구형우선주" if preferred else "보통주",
+        "LIST_DD": "",
+    }
+
+
+def _fmt_int(v) -> str:
+    return f"{int(v):,}"
+
+
+def record_csv(
+    record_dir: str,
+    csv_path: str,
+    name: str,
+    short_code: str,
+    full_code: Optional[str] = None,
+    market: str = "KOSPI",
+) -> str:
+    """
+    '개별종목 시세 추이' CSV 다운로드(euc-kr) → 녹화 폴더. 숫자는 KRX JSON 처럼 천 단위 쉼표 문자열로 저장.
+    Returns: full_code
+    """
+    full_code = full_code or f"KR7{short_code}000"
+    df = pd.read_csv(csv_path, encoding="euc-kr")
+    inverse = {v: k for k, v in PRICE_COLUMNS.items()}
+    rows = []
+    for rec in df.to_dict("records"):
+        row = {}
+        for col, key in inverse.items():
+            v = rec[col]
+            if col == "일자":
+                row[key] = str(v)
+            elif col == "등락률":
+                row[key] = f"{float(v):.2f}"
+            elif col == "대비":
+                row[key] = _fmt_int(abs(v))  # KRX JSON 은 부호 대신 FLUC_TP_CD
+            else:
+                row[key] = _fmt_int(v)
+        diff = rec["대비"]
+        row["FLUC_TP_CD"] = "1" if diff > 0 else ("2" if diff < 0 else "3")
+        rows.append(row)
+    _merge_issues(
+        record_dir,
+        [
+            {
+                "full_code": full_code,
+                "short_code": short_code,
+                "codeName": name,
+                "marketCode": "STK" if market == "KOSPI" else "KSQ",
+                "marketName": market,
+                "marketEngName": market,
+            }
+        ],
+    )
+    _merge_prices(record_dir, full_code, rows)
+    return full_code
+
+
+# ----------------------------
+# 서버
+# ----------------------------
+class _Recordings:
+    def __init__(self, record_dir: str):
+        self.issues: List[dict] = _read_json(os.path.join(record_dir, FINDER_FILE), {"block1": []})["block1"]
+        self.prices: Dict[str, List[dict]] = {}
+        for path in glob.glob(os.path.join(record_dir, PRICE_DIR, "*.json")):
+            code = os.path.splitext(os.path.basename(path))[0]
+            self.prices[code] = _read_json(path, {"output": []})["output"]
+        self.record_dir = record_dir
+        self.issue_list: List[dict] = _read_json(os.path.join(record_dir, ISSUE_LIST_FILE), {}).get(
+            "OutBlock_1"
+        ) or [_issue_list_row(r) for r in self.issues]
+
+    def respond(self, params: Dict[str, str]) -> Optional[dict]:
+        bld = params.get("bld", "")
+        if bld == BLD_FINDER:
+            q = params.get("searchText", "").strip()
+            return {
+                "block1": [
+                    r for r in self.issues if q in r.get("codeName", "") or q in r.get("short_code", "")
+                ]
+            }
+        if bld == BLD_DAILY_PRICE:
+            rows = self.prices.get(params.get("isuCd", ""), [])
+            lo = params.get("strtDd", "00000000")
+            hi = params.get("endDd", "99999999")
+            return {
+                "output": [r for r in rows if lo <= r["TRD_DD"].replace("/", "") <= hi],
+                "CURRENT_DATETIME": time.strftime("%Y.%m.%d %p %I:%M:%S"),
+            }
+        if bld == BLD_ISSUE_LIST:
+            return {"OutBlock_1": self.issue_list}
+        if bld == BLD_MARKET_PRICE:
+            return self._market_prices(params.get("mktId", "ALL"), params.get("trdDd", ""))
+        return None
+
+    def _market_prices(self, market: str, day: str) -> dict:
+        recorded = os.path.join(self.record_dir, MARKET_DIR, f"{market}_{day}.json")
+        if os.path.exists(recorded):
+            return _read_json(recorded, {"OutBlock_1": []})
+        label = f"{day[:4]}/{day[4:6]}/{day[6:]}"
+        out = []
+        for issue in self.issues:
+            if market != "ALL" and issue.get("marketCode") != _MARKET_CODES.get(market):
+                continue
+            row = next((r for r in self.prices.get(issue["full_code"], []) if r["TRD_DD"] == label), None)
+            if row is None:
+                continue
+            out.append(
+                {
+                    "ISU_SRT_CD": issue.get("short_code", ""),
+                    "ISU_CD": issue["full_code"],
+                    "ISU_ABBRV": issue.get("codeName", ""),
+                    "MKT_NM": issue.get("marketName", ""),
+                    "SECT_TP_NM": "",
+                    **{k: v for k, v in row.items() if k != "TRD_DD"},
+                }
+            )
+        return {"OutBlock_1": out, "CURRENT_DATETIME": time.strftime("%Y.%m.%d %p %I:%M:%S")}
+
+
+class KRXStubServer:
+    """녹화 폴더를 재생하는 HTTP 서버. port=0 이면 빈 포트. with 문 또는 start()/stop()."""
+
+    def __init__(self, record_dir: str, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0):
+        recordings = _Recordings(record_dir)
+        self.requests_served = 0
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive (클라이언트 연결 풀 재사용)
+            disable_nagle_algorithm = True
+
+            def _params(self) -> Dict[str, str]:
+                parsed = urlparse(self.path)
+                qs = parse_qs(parsed.query)
+                length = int(self.headers.get("Content-Length") or 0)
+                if length:
+                    qs.update(parse_qs(self.rfile.read(length).decode("utf-8")))
+                return {k: v[-1] for k, v in qs.items()}
+
+            def _handle(self):
+                if urlparse(self.path).path != JSON_PATH:
+                    return self._send(404, {"error": f"unknown path {self.path}"})
+                if latency:
+                    time.sleep(latency)
+                payload = recordings.respond(self._params())
+                if payload is None:
+                    return self._send(404, {"error": "녹화에 없는 bld"})
+                stub.requests_served += 1
+                self._send(200, payload)
+
+            def _send(self, status: int, payload: dict):
+                body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=UTF-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = _handle
+            do_POST = _handle
+
+            def log_message(self, fmt, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "KRXStubServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="krx-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> "KRXStubServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="KRX getJsonData.cmd 녹화 응답 재생 서버")
+    parser.add_argument("--dir", required=True, help="녹화 폴더 (KRX_RECORD_DIR)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="응답마다 추가 지연(초)")
+    parser.add_argument("--from-csv", help="녹화 폴더에 먼저 추가할 개별종목 시세 CSV (euc-kr)")
+    parser.add_argument("--name", help="--from-csv 종목명")
+    parser.add_argument("--code", help="--from-csv 단축코드 (6자리)")
+    parser.add_argument("--market", default="KOSPI")
+    args = parser.parse_args()
+
+    if args.from_csv:
+        if not (args.name and args.code):
+            parser.error("--from-csv 에는 --name, --code 가 필요합니다")
+        code = record_csv(args.dir, args.from_csv, args.name, args.code, market=args.market)
+        print(f"[krx_stub_server] {args.from_csv} → {args.dir} ({args.name}, {code})")
+
+    server = KRXStubServer(args.dir, args.host, args.port, args.latency)
+    print(f"[krx_stub_server] {server.url}{JSON_PATH} (KRX_BASE_URL={server.url})")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
@@ -0,0 +1,436 @@
+# price_store.py
+"""
+로컬 일별 시세 저장소 (SQLite, (종목 표준코드, 일자) 키).
+
+individual_stock_trend(1개월)와 fetch_recent_data(6개월)가 호출마다 겹치는 구간을 KRX 에서 다시 받던 것을
+디스크에서 읽고, 저장소에 없는 거래일만 KRX 에 요청한다.
+- 종목마다 받아 둔 연속 구간(coverage)을 기록, 요청 구간의 앞/뒤 빈 구간 중 거래일이 있는 쪽만 요청
+  (TradingCalendar: 주말/휴장일만 남은 구간은 요청하지 않음) → 보통 종목당 하루 한 번 작은 delta
+- 뒤쪽 delta 는 마지막 저장 일봉 하루를 겹쳐 받아 비교: 수정주가가 바뀌었으면(분할/증자 등) 그 종목을 비우고 다시 받음
+- 아직 확정되지 않은 당일 일봉(장중~시간외)은 저장하되 구간에 넣지 않고 intraday_ttl 초마다 다시 받음
+- 휴장일은 전종목 시세(ingest_snapshot)가 비어 있던 평일로만 기록 (한 종목의 빈 날은 거래정지일 수 있어 쓰지 않음)
+- 수정주가(adjusted=True) 요청만 저장소를 거치고, 원주가 요청은 KRX 로 바로 보냄
+- ingest_snapshot: 전종목 시세 하루치를 모든 종목에 한 번에 추가 (ingest_market 배치)
+- market_history: 최근 N 거래일 전종목 시세 (market_scan 입력, 종목명/단축코드/시장은 전종목 시세 기준)
+
+KRX_PRICE_STORE              : 1(기본) 이면 사용, 0 이면 매번 KRX 에서 받음
+KRX_PRICE_STORE_PATH         : SQLite 파일 (기본 tools/krx/cache/prices.sqlite3)
+KRX_PRICE_STORE_INTRADAY_TTL : 당일 일봉 재요청 간격(초, 기본 600)
+"""
+import os
+import sqlite3
+import threading
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Iterable, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .krx_client import KST, DateLike, _yyyymmdd, csv_frame, get_client
+from .trading_calendar import TradingCalendar
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_PATH = os.path.join(BASE_DIR, "cache", "prices.sqlite3")
+
+# CSV 컬럼 → 테이블 컬럼 (일자 제외, PRICE_COLUMNS 순서)
+STORE_COLUMNS = {
+    "종가": "close",
+    "대비": "diff",
+    "등락률": "rate",
+    "시가": "open",
+    "고가": "high",
+    "저가": "low",
+    "거래량": "volume",
+    "거래대금": "value",
+    "시가총액": "mktcap",
+    "상장주식수": "shares",
+}
+# 수정주가 변경 판정에 쓰는 컬럼
+ADJUST_CHECK = ("종가", "시가", "고가", "저가", "거래량")
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS prices (
+    code TEXT NOT NULL,
+    date TEXT NOT NULL,
+    {", ".join(f"{c} REAL" for c in STORE_COLUMNS.values())},
+    PRIMARY KEY (code, date)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS prices_date ON prices (date);
+CREATE TABLE IF NOT EXISTS coverage (
+    code TEXT PRIMARY KEY,
+    first TEXT NOT NULL,
+    last TEXT NOT NULL,
+    tail_at REAL NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS holidays (
+    date TEXT PRIMARY KEY,
+    source TEXT
+);
+CREATE TABLE IF NOT EXISTS issues (
+    code TEXT PRIMARY KEY,
+    short_code TEXT NOT NULL,
+    name TEXT NOT NULL,
+    market TEXT NOT NULL,
+    updated TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS snapshots (
+    market TEXT NOT NULL,
+    date TEXT NOT NULL,
+    rows INTEGER NOT NULL,
+    ingested_at REAL NOT NULL,
+    PRIMARY KEY (market, date)
+);
+"""
+# 과거 일자 백필이 최신 종목명/시장을 덮어쓰지 않도록 더 최근 일자만 갱신
+_UPSERT_ISSUES = (
+    "INSERT INTO issues (code, short_code, name, market, updated) VALUES (?, ?, ?, ?, ?) "
+    "ON CONFLICT (code) DO UPDATE SET short_code = excluded.short_code, name = excluded.name, "
+    "market = excluded.market, updated = excluded.updated WHERE excluded.updated >= issues.updated"
+)
+_INSERT_PRICES = (
+    f"INSERT OR REPLACE INTO prices (code, date, {', '.join(STORE_COLUMNS.values())}) "
+    f"VALUES ({', '.join('?' * (len(STORE_COLUMNS) + 2))})"
+)
+
+
+def _d(s: str) -> date:
+    return datetime.strptime(s, "%Y%m%d").date()
+
+
+def _s(d: date) -> str:
+    return d.strftime("%Y%m%d")
+
+
+# ----------------------------
+# 저장소
+# ----------------------------
+class PriceStore:
+    def __init__(
+        self,
+        path: str,
+        client=None,
+        intraday_ttl: float = 600.0,
+        now_fn: Callable[[], datetime] = lambda: datetime.now(KST),
+    ):
+        self.path = path
+        self.client = client
+        self.intraday_ttl = float(intraday_ttl)
+        self.now_fn = now_fn
+        self.calendar = TradingCalendar(self.holidays)
+        self.stats = {"reads": 0, "fetches": 0, "fetched_rows": 0, "skipped": 0, "readjusted": 0}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._code_locks: Dict[str, threading.Lock] = {}
+        self._holidays: Optional[Set[str]] = None
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn().executescript(SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _client(self):
+        return self.client or get_client()
+
+    def _code_lock(self, code: str) -> threading.Lock:
+        with self._lock:
+            return self._code_locks.setdefault(code, threading.Lock())
+
+    # ---------- 휴장일 ----------
+    def holidays(self) -> Set[str]:
+        h = self._holidays
+        if h is None:
+            h = {r[0] for r in self._conn().execute("SELECT date FROM holidays")}
+            self._holidays = h
+        return h
+
+    def add_holidays(self, days: Iterable[date], source: str) -> int:
+        rows = [(_s(d), source) for d in days]
+        if not rows:
+            return 0
+        conn = self._conn()
+        with conn:
+            conn.executemany("INSERT OR IGNORE INTO holidays (date, source) VALUES (?, ?)", rows)
+        self._holidays = None
+        return len(rows)
+
+    # ---------- 읽기/쓰기 ----------
+    def read(self, code: str, start: DateLike, end: DateLike) -> pd.DataFrame:
+        """저장된 [start, end] 시세 (CSV 다운로드와 같은 컬럼/dtype, 최신 → 과거)."""
+        rows = self._conn().execute(
+            f"SELECT date, {', '.join(STORE_COLUMNS.values())} FROM prices "
+            "WHERE code = ? AND date BETWEEN ? AND ? ORDER BY date DESC",
+            (code, _yyyymmdd(start), _yyyymmdd(end)),
+        ).fetchall()
+        values = np.array([r[1:] for r in rows], dtype=np.float64).reshape(len(rows), len(STORE_COLUMNS))
+        cols: Dict[str, object] = {"일자": [f"{r[0][:4]}/{r[0][4:6]}/{r[0][6:]}" for r in rows]}
+        for i, col in enumerate(STORE_COLUMNS):
+            cols[col] = values[:, i]
+        return csv_frame(cols)
+
+    def write(self, code: str, frame: pd.DataFrame) -> int:
+        """prices_frame 형태의 시세를 저장 (같은 일자는 교체)."""
+        if frame.empty:
+            return 0
+        dates = [str(s).replace("/", "") for s in frame["일자"]]
+        values = frame[list(STORE_COLUMNS)].to_numpy(dtype=np.float64)
+        rows = [(code, d, *map(float, v)) for d, v in zip(dates, values)]
+        conn = self._conn()
+        with conn:
+            conn.executemany(_INSERT_PRICES, rows)
+        return len(rows)
+
+    def coverage(self, code: str) -> Optional[Tuple[date, date, float]]:
+        row = self._conn().execute(
+            "SELECT first, last, tail_at FROM coverage WHERE code = ?", (code,)
+        ).fetchone()
+        return (_d(row[0]), _d(row[1]), row[2]) if row else None
+
+    def _set_coverage(self, code: str, first: date, last: date, tail_at: float) -> None:
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO coverage (code, first, last, tail_at) VALUES (?, ?, ?, ?)",
+                (code, _s(first), _s(last), tail_at),
+            )
+
+    def invalidate(self, code: str) -> None:
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM prices WHERE code = ?", (code,))
+            conn.execute("DELETE FROM coverage WHERE code = ?", (code,))
+
+    # ---------- 조회 (빈 구간만 KRX) ----------
+    def _fetch(self, issue: dict, start: date, end: date, now: datetime, check: Optional[date] = None) -> bool:
+        """
+        [start, end] 를 받아 저장하고 coverage 를 넓힌다.
+        check 일자의 저장값과 새 값이 다르면(수정주가 변경) 저장하지 않고 False.
+        """
+        code = issue["full_code"]
+        df = self._client().daily_prices(issue, start, end)
+        self.stats["fetches"] += 1
+        self.stats["fetched_rows"] += len(df)
+
+        if check is not None:
+            label = check.strftime("%Y/%m/%d")
+            new = df.loc[df["일자"] == label, list(ADJUST_CHECK)].to_numpy(dtype=np.float64)
+            old = self.read(code, check, check)[list(ADJUST_CHECK)].to_numpy(dtype=np.float64)
+            if len(new) and len(old) and not np.allclose(new[0], old[0], equal_nan=True):
+                return False
+
+        self.write(code, df)
+        final = self.calendar.last_final_day(now)
+        cov = self.coverage(code)
+        first, last, tail_at = cov if cov else (start, start - timedelta(days=1), 0.0)
+        if end > final:
+            tail_at = now.timestamp()
+        self._set_coverage(code, min(first, start), max(last, min(end, final)), tail_at)
+        return True
+
+    def _sync(self, issue: dict, start: date, end: date) -> None:
+        code = issue["full_code"]
+        now = self.now_fn()
+        hi = min(end, self.calendar.last_bar_day(now))
+        if hi < start:
+            return
+        cov = self.coverage(code)
+        if cov is None:
+            self._fetch(issue, start, hi, now)
+            return
+        first, last, tail_at = cov
+
+        # 뒤쪽: 확정 안 된 당일 일봉만 남았으면 intraday_ttl 동안 재요청하지 않음
+        if hi > last:
+            days = self.calendar.trading_days(last + timedelta(days=1), hi)
+            final = self.calendar.last_final_day(now)
+            stale = any(d <= final for d in days) or now.timestamp() - tail_at >= self.intraday_ttl
+            if days and stale:
+                # 마지막 저장 일봉부터 겹쳐 받아 수정주가 변경 확인
+                row = self._conn().execute(
+                    "SELECT MAX(date) FROM prices WHERE code = ? AND date <= ?", (code, _s(last))
+                ).fetchone()
+                anchor = _d(row[0]) if row and row[0] else last
+                if not self._fetch(issue, anchor, hi, now, check=anchor):
+                    print(f"[price_store] {code} 수정주가 변경 감지, 다시 받음")
+                    self.stats["readjusted"] += 1
+                    self.invalidate(code)
+                    self._fetch(issue, start, hi, now)
+                    return
+            else:
+                self.stats["skipped"] += 1
+        # 앞쪽
+        if start < first:
+            if self.calendar.trading_days(start, first - timedelta(days=1)):
+                self._fetch(issue, start, first - timedelta(days=1), now)
+            else:
+                self.stats["skipped"] += 1
+
+    def prices(self, issue: dict, start: DateLike, end: DateLike) -> pd.DataFrame:
+        """find_issue 결과 종목의 [start, end] 시세. 빈 거래일만 KRX 에서 받아 채운 뒤 저장소에서 읽는다."""
+        start_d, end_d = _d(_yyyymmdd(start)), _d(_yyyymmdd(end))
+        with self._code_lock(issue["full_code"]):
+            self._sync(issue, start_d, end_d)
+        self.stats["reads"] += 1
+        return self.read(issue["full_code"], start_d, end_d)
+
+    def stock_prices(
+        self,
+        stock_name: str,
+        months: int = 6,
+        end: Optional[DateLike] = None,
+        adjusted: bool = True,
+    ) -> pd.DataFrame:
+        """KRXClient.stock_prices 와 같은 구간/결과. 원주가(adjusted=False)는 저장하지 않고 KRX 로 바로."""
+        client = self._client()
+        if not adjusted:
+            return client.stock_prices(stock_name, months=months, end=end, adjusted=False)
+        end_ts = pd.Timestamp(_yyyymmdd(end)) if end is not None else pd.Timestamp(self.now_fn().date())
+        start_ts = end_ts - pd.DateOffset(months=months)
+        issue = client.find_issue(stock_name)
+        return self.prices(issue, start_ts.date(), end_ts.date())
+
+
+    # ---------- 전종목 시세 (하루치 일괄) ----------
+    def last_snapshot(self, market: str) -> Optional[date]:
+        row = self._conn().execute("SELECT MAX(date) FROM snapshots WHERE market = ?", (market,)).fetchone()
+        return _d(row[0]) if row and row[0] else None
+
+    def snapshot_days(self, market: str, start: date, end: date) -> Set[str]:
+        """[start, end] 중 이미 수집한 전종목 시세 일자('YYYYMMDD')."""
+        return {
+            r[0]
+            for r in self._conn().execute(
+                "SELECT date FROM snapshots WHERE market = ? AND date BETWEEN ? AND ?",
+                (market, _s(start), _s(end)),
+            )
+        }
+
+    def ingest_snapshot(self, day: DateLike, frame: pd.DataFrame, market: str = "ALL") -> dict:
+        """
+        전종목 시세 하루치(krx_client.market_frame)를 종목마다 추가. 종목별로
+        - 구간 없음                 : 그날 하루로 새 구간
+        - 구간 끝 다음 거래일        : 구간 연장. 전 거래일 저장 종가 ≠ 기준가(종가-대비)면 수정주가 변경 → 종목 비우고 새 구간
+        - 이미 구간 안 / 중간에 빈 거래일 / 구간보다 과거 : 건너뜀 (저장된 수정주가 우선, 빈 구간은 종목 조회 때 채움)
+        종가 있는 행이 없으면 휴장일로 기록. 확정되지 않은 일자는 ValueError.
+        """
+        d = _d(_yyyymmdd(day))
+        now = self.now_fn()
+        if d > self.calendar.last_final_day(now):
+            raise ValueError(f"확정되지 않은 일자의 전종목 시세: {_s(d)}")
+        conn = self._conn()
+        result = {"date": _s(d), "market": market, "rows": len(frame), "new": 0, "extended": 0,
+                  "readjusted": 0, "skipped": 0, "holiday": False}
+        if frame.empty:
+            if d.weekday() < 5:
+                self.add_holidays([d], "snapshot")
+                result["holiday"] = True
+            with conn:
+                conn.execute("INSERT OR REPLACE INTO snapshots VALUES (?, ?, 0, ?)", (market, _s(d), now.timestamp()))
+            return result
+
+        prev = _s(self.calendar.prev_trading_day(d))
+        prev_close = dict(conn.execute("SELECT code, close FROM prices WHERE date = ?", (prev,)))
+        covs = {r[0]: (_d(r[1]), _d(r[2]), r[3]) for r in conn.execute("SELECT code, first, last, tail_at FROM coverage")}
+        contiguous: Dict[date, bool] = {}
+
+        codes = frame["표준코드"].tolist()
+        values = frame[list(STORE_COLUMNS)].to_numpy(dtype=np.float64)
+        base = values[:, 0] - values[:, 1]  # 종가 - 대비 = 기준가
+        rows, cov_rows, invalid = [], [], []
+        for code, v, b in zip(codes, values, base):
+            cov = covs.get(code)
+            if cov is None:
+                result["new"] += 1
+                cov_rows.append((code, _s(d), _s(d), 0.0))
+            else:
+                first, last, tail_at = cov
+                if d <= last:
+                    result["skipped"] += 1
+                    continue
+                if last not in contiguous:
+                    contiguous[last] = not self.calendar.trading_days(last + timedelta(days=1), d - timedelta(days=1))
+                if not contiguous[last]:
+                    result["skipped"] += 1
+                    continue
+                pc = prev_close.get(code)
+                if pc is not None and np.isfinite(b) and abs(pc - b) > 0.5:
+                    result["readjusted"] += 1
+                    invalid.append(code)
+                    cov_rows.append((code, _s(d), _s(d), 0.0))
+                else:
+                    result["extended"] += 1
+                    cov_rows.append((code, _s(first), _s(d), tail_at))
+            rows.append((code, _s(d), *map(float, v)))
+
+        issues = zip(codes, frame["종목코드"], frame["종목명"], frame["시장구분"])
+        with conn:
+            conn.executemany(_UPSERT_ISSUES, [(*it, _s(d)) for it in issues])
+            for code in invalid:
+                conn.execute("DELETE FROM prices WHERE code = ?", (code,))
+            conn.executemany(_INSERT_PRICES, rows)
+            conn.executemany("INSERT OR REPLACE INTO coverage (code, first, last, tail_at) VALUES (?, ?, ?, ?)", cov_rows)
+            conn.execute("INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?, ?)", (market, _s(d), len(frame), now.timestamp()))
+        self.stats["readjusted"] += len(invalid)
+        return result
+
+    def market_history(self, days: int, end: Optional[DateLike] = None) -> pd.DataFrame:
+        """
+        전종목 시세로 수집한 가장 최근 거래일(end 이전)까지 days 거래일의 시세.
+        그 구간 전체가 coverage 안에 있는 종목만, 컬럼은 일자/종목코드/종목명/시장구분 + 시세 (종목별 최신 → 과거).
+        수집한 전종목 시세가 없으면 ValueError.
+        """
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT MAX(date) FROM snapshots WHERE rows > 0 AND date <= ?",
+            (_yyyymmdd(end) if end is not None else "99999999",),
+        ).fetchone()
+        if not row or not row[0]:
+            raise ValueError("수집한 전종목 시세 없음: 'python -m tools.krx.ingest_market' 로 먼저 수집 필요")
+        as_of = _d(row[0])
+        start = as_of
+        for _ in range(max(1, days) - 1):
+            start = self.calendar.prev_trading_day(start)
+        rows = conn.execute(
+            f"SELECT p.date, i.short_code, i.name, i.market, {', '.join('p.' + c for c in STORE_COLUMNS.values())} "
+            "FROM prices p JOIN issues i ON i.code = p.code JOIN coverage c ON c.code = p.code "
+            "WHERE p.date BETWEEN ? AND ? AND c.first <= ? AND c.last >= ? "
+            "ORDER BY p.code, p.date DESC",
+            (_s(start), _s(as_of), _s(start), _s(as_of)),
+        ).fetchall()
+        values = np.array([r[4:] for r in rows], dtype=np.float64).reshape(len(rows), len(STORE_COLUMNS))
+        cols: Dict[str, object] = {
+            "일자": [f"{r[0][:4]}/{r[0][4:6]}/{r[0][6:]}" for r in rows],
+            "종목코드": [r[1] for r in rows],
+            "종목명": [r[2] for r in rows],
+            "시장구분": [r[3] for r in rows],
+        }
+        for i, col in enumerate(STORE_COLUMNS):
+            cols[col] = values[:, i]
+        return csv_frame(cols, list(cols))
+
+
+_store: Optional[PriceStore] = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> Optional[PriceStore]:
+    """프로세스 공용 저장소. KRX_PRICE_STORE=0 이면 None (호출 측은 KRXClient 로 바로 조회)."""
+    global _store
+    if os.environ.get("KRX_PRICE_STORE", "1").strip().lower() in ("0", "false", "no"):
+        return None
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = PriceStore(
+                    os.environ.get("KRX_PRICE_STORE_PATH") or DEFAULT_PATH,
+                    intraday_ttl=float(os.environ.get("KRX_PRICE_STORE_INTRADAY_TTL", "600")),
+                )
+    return _store
+
+
+__all__ = ["PriceStore", "STORE_COLUMNS", "get_store"]
@@ -0,0 +1,78 @@
+# trading_calendar.py
+"""
+KRX 거래일 달력 (KST). 시세 저장소(price_store)가 빈 구간에 거래일이 있을 때만 KRX 에 요청하도록 쓴다.
+
+휴장일 = 주말 + 양력 고정 휴장일(FIXED_HOLIDAYS) + 전종목 시세가 비어 있던 평일(설/추석/선거일/대체공휴일 등,
+price_store.ingest_snapshot 이 기록).
+모르는 휴장일을 거래일로 보면 빈 요청이 한 번 더 나갈 뿐이다. 반대로 거래일을 휴장일로 보면 그 날을 건너뛴 채
+구간이 이어질 수 있으므로, 휴장일은 시장 전체가 비어 있던 것이 확인된 날만 기록한다.
+
+일봉 시점:
+    last_bar_day  : 지금 KRX 시세에 존재하는 최신 일봉 (정규장 시작 전이면 직전 거래일)
+    last_final_day: 더 바뀌지 않는 최신 일봉 (시간외 단일가가 끝나는 FINAL_AFTER 전이면 직전 거래일)
+"""
+from datetime import date, datetime, time as dtime, timedelta
+from typing import Callable, Iterable, List, Optional, Set
+
+from .krx_client import KST
+
+MARKET_OPEN = dtime(9, 0)
+# 시간외 단일가(16:00~18:00) 거래량까지 반영된 뒤
+FINAL_AFTER = dtime(18, 0)
+
+# 신정, 삼일절, 근로자의날, 어린이날, 현충일, 광복절, 개천절, 한글날, 성탄절, 연말 휴장일
+FIXED_HOLIDAYS = ("0101", "0301", "0501", "0505", "0606", "0815", "1003", "1009", "1225", "1231")
+
+
+def _is_open(d: date, holidays: Set[str]) -> bool:
+    return (
+        d.weekday() < 5
+        and d.strftime("%m%d") not in FIXED_HOLIDAYS
+        and d.strftime("%Y%m%d") not in holidays
+    )
+
+
+def weekdays(start: date, end: date) -> Iterable[date]:
+    d = start
+    while d <= end:
+        if d.weekday() < 5:
+            yield d
+        d += timedelta(days=1)
+
+
+class TradingCalendar:
+    def __init__(self, holidays: Optional[Callable[[], Set[str]]] = None):
+        """holidays: 추가 휴장일('YYYYMMDD') 집합을 돌려주는 함수 (전종목 시세로 확인한 휴장일)."""
+        self._holidays = holidays or set
+
+    def is_trading_day(self, d: date) -> bool:
+        return _is_open(d, self._holidays())
+
+    def trading_days(self, start: date, end: date) -> List[date]:
+        """[start, end] 거래일 (과거 → 최신)."""
+        holidays = self._holidays()
+        return [d for d in weekdays(start, end) if _is_open(d, holidays)]
+
+    def prev_trading_day(self, d: date) -> date:
+        holidays = self._holidays()
+        d -= timedelta(days=1)
+        while not _is_open(d, holidays):
+            d -= timedelta(days=1)
+        return d
+
+    def last_bar_day(self, now: Optional[datetime] = None) -> date:
+        now = now or datetime.now(KST)
+        today = now.date()
+        if self.is_trading_day(today) and now.time() >= MARKET_OPEN:
+            return today
+        return self.prev_trading_day(today)
+
+    def last_final_day(self, now: Optional[datetime] = None) -> date:
+        now = now or datetime.now(KST)
+        today = now.date()
+        if self.is_trading_day(today) and now.time() >= FINAL_AFTER:
+            return today
+        return self.prev_trading_day(today)
+
+
+__all__ = ["FIXED_HOLIDAYS", "TradingCalendar", "weekdays"]
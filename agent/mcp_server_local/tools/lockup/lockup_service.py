@@ -1,14 +1,16 @@
 # mcp/tools/lockup/lockup_service.py
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait, Select
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import NoSuchElementException, StaleElementReferenceException, TimeoutException
+import io
 import time
-import os
 from datetime import datetime, date
 import pandas as pd
 
+from ..browser.cdp_capture import DownloadCapture
+from ..browser.driver_pool import get_pool as get_driver_pool
+
 
 # ------------------------------
 # 1) 보호예수 분석: DataFrame -> JSON(dict)
@@ -130,112 +132,81 @@ def lockup_info_to_json(df: pd.DataFrame):
 # ------------------------------
 def crawl_lockup_info(stock_name: str) -> pd.DataFrame | None:
     """
-    Headless Chrome로 Seibro 보호예수 정보를 크롤링해 DataFrame 반환.
+    Headless Chrome(공용 DriverPool 세션)로 Seibro 보호예수 정보를 크롤링해 DataFrame 반환.
     - 실패 시 None, 데이터 없음이면 빈 DataFrame
     """
-    download_dir = os.environ.get("SEIBRO_DOWNLOAD_DIR") or ("/tmp/seibro_downloads" if os.name != "nt" else os.path.join(os.environ.get("TEMP", r"C:\Temp"), "seibro_downloads"))
-    os.makedirs(download_dir, exist_ok=True)
-
-    options = webdriver.ChromeOptions()
-    options.add_argument("--headless=new")
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-    options.add_argument("--window-size=1920,1080")
-    options.add_experimental_option("prefs", {
-        "download.default_directory": download_dir,
-        "download.prompt_for_download": False,
-        "download.directory_upgrade": True,
-        "safebrowsing.enabled": True,
-        "plugins.always_open_pdf_externally": True,
-    })
-
-    driver = webdriver.Chrome(options=options)
     try:
-        url = "https://seibro.or.kr/websquare/control.jsp?w2xPath=/IPORTAL/user/company/BIP_CNTS01045V.xml&menuNo=50#"
-        driver.get(url)
-
-        wait = WebDriverWait(driver, 15)
-
-        # 검색하기 버튼
-        wait.until(EC.element_to_be_clickable((By.ID, "comN_group4"))).click()
-
-        # 팝업 iframe 전환
-        wait.until(EC.frame_to_be_available_and_switch_to_it((By.ID, "iframe1")))
+        with get_driver_pool().driver() as driver:
+            return _crawl_lockup_xls(driver, stock_name)
+    except Exception:
+        return None
 
-        # 종목명 입력 + 검색
-        search_input = wait.until(EC.presence_of_element_located((By.ID, "search_string")))
-        search_input.clear()
-        search_input.send_keys(stock_name)
-        wait.until(EC.element_to_be_clickable((By.ID, "P_group100"))).click()
 
-        # 첫 번째 결과 클릭 (stale 대비 재시도)
-        for _ in range(3):
-            try:
-                first = wait.until(EC.element_to_be_clickable((By.ID, "P_isinList_0_P_ISIN_ROW")))
-                first.click()
-                break
-            except (StaleElementReferenceException, TimeoutException):
-                time.sleep(0.5)
-        else:
-            return None  # 결과 클릭 실패
+def _crawl_lockup_xls(driver, stock_name: str) -> pd.DataFrame | None:
+    """대여한 세션으로 Seibro 화면 조작 → 엑셀(.xls, HTML 표) 응답을 DevTools 로 받아 DataFrame."""
+    url = "https://seibro.or.kr/websquare/control.jsp?w2xPath=/IPORTAL/user/company/BIP_CNTS01045V.xml&menuNo=50#"
+    driver.get(url)
 
-        # 메인으로 복귀
-        driver.switch_to.default_content()
+    wait = WebDriverWait(driver, 15)
 
-        # 조회기간 3개월
-        select_elem = wait.until(EC.presence_of_element_located((By.ID, "sd1_selectbox1_input_0")))
-        Select(select_elem).select_by_visible_text("3개월")
+    # 검색하기 버튼
+    wait.until(EC.element_to_be_clickable((By.ID, "comN_group4"))).click()
 
-        # 조회 버튼
-        wait.until(EC.element_to_be_clickable((By.ID, "group64"))).click()
+    # 팝업 iframe 전환
+    wait.until(EC.frame_to_be_available_and_switch_to_it((By.ID, "iframe1")))
 
-        # 데이터 로딩 대기
-        time.sleep(1.2)
+    # 종목명 입력 + 검색
+    search_input = wait.until(EC.presence_of_element_located((By.ID, "search_string")))
+    search_input.clear()
+    search_input.send_keys(stock_name)
+    wait.until(EC.element_to_be_clickable((By.ID, "P_group100"))).click()
 
-        # "조회된 데이터가 없습니다" 체크
+    # 첫 번째 결과 클릭 (stale 대비 재시도)
+    for _ in range(3):
         try:
-            no_data_xpath = "//*[@id='grid1_body_tbody']/tr/td[contains(text(), '조회된 데이터가 없습니다.')]"
-            if driver.find_element(By.XPATH, no_data_xpath).is_displayed():
-                return pd.DataFrame()
-        except NoSuchElementException:
-            pass
+            first = wait.until(EC.element_to_be_clickable((By.ID, "P_isinList_0_P_ISIN_ROW")))
+            first.click()
+            break
+        except (StaleElementReferenceException, TimeoutException):
+            time.sleep(0.5)
+    else:
+        return None  # 결과 클릭 실패
 
-        # 엑셀 다운로드
-        wait.until(EC.element_to_be_clickable((By.ID, "ExcelDownload_a"))).click()
+    # 메인으로 복귀
+    driver.switch_to.default_content()
 
-        # 최신 .xls 대기
-        latest_file = None
-        deadline = time.time() + 30
-        while time.time() < deadline:
-            xls_files = [
-                os.path.join(download_dir, f)
-                for f in os.listdir(download_dir)
-                if f.lower().endswith(".xls") and not f.endswith(".crdownload")
-            ]
-            if xls_files:
-                candidate = max(xls_files, key=os.path.getctime)
-                if os.path.getsize(candidate) > 0:
-                    latest_file = candidate
-                    break
-            time.sleep(0.5)
+    # 조회기간 3개월
+    select_elem = wait.until(EC.presence_of_element_located((By.ID, "sd1_selectbox1_input_0")))
+    Select(select_elem).select_by_visible_text("3개월")
 
-        if not latest_file:
-            return None
+    # 조회 버튼
+    wait.until(EC.element_to_be_clickable((By.ID, "group64"))).click()
 
-        # .xls → DataFrame
-        try:
-            dfs = pd.read_html(latest_file, encoding="euc-kr")
-        except TypeError:
-            with open(latest_file, "rb") as f:
-                dfs = pd.read_html(f)
-        if not dfs:
-            return None
+    # 데이터 로딩 대기
+    time.sleep(1.2)
 
-        df = dfs[0]
-        df.columns = [str(c).strip() for c in df.columns]
-        return df
+    # "조회된 데이터가 없습니다" 체크
+    try:
+        no_data_xpath = "//*[@id='grid1_body_tbody']/tr/td[contains(text(), '조회된 데이터가 없습니다.')]"
+        if driver.find_element(By.XPATH, no_data_xpath).is_displayed():
+            return pd.DataFrame()
+    except NoSuchElementException:
+        pass
+
+    # 엑셀 다운로드: 응답 본문을 메모리로 (공유 다운로드 폴더/파일 polling 없음)
+    with DownloadCapture(driver) as cap:
+        wait.until(EC.element_to_be_clickable((By.ID, "ExcelDownload_a"))).click()
+        body = cap.wait(timeout=30)
 
-    except Exception:
+    # .xls(HTML 표) → DataFrame
+    try:
+        html = body.decode("euc-kr")
+    except UnicodeDecodeError:
+        html = body.decode("utf-8", errors="replace")
+    dfs = pd.read_html(io.StringIO(html))
+    if not dfs:
         return None
-    finally:
-        driver.quit()
+
+    df = dfs[0]
+    df.columns = [str(c).strip() for c in df.columns]
+    return df
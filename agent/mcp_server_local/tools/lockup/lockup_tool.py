@@ -1,4 +1,6 @@
 # mcp/tools/lockup/lockup_tool.py
+import asyncio
+
 from fastmcp import FastMCP
 from .lockup_service import crawl_lockup_info, lockup_info_to_json
 import pandas as pd
@@ -18,7 +20,8 @@ def register(mcp: FastMCP) -> None:
         Returns:
             dict(JSON): 실패 시에도 예외를 던지지 않고 error/note 필드를 포함한 JSON을 반환
         """
-        df = crawl_lockup_info(stock_name)
+        # 브라우저 풀 대기/크롤링은 블로킹 → 이벤트 루프 밖에서 실행
+        df = await asyncio.to_thread(crawl_lockup_info, stock_name)
 
         # 크롤링 자체 실패
         if df is None:
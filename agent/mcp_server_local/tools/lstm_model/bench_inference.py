@@ -0,0 +1,389 @@
+# bench_inference.py
+"""
+LSTM 이상탐지 추론 벤치마크 (오프라인, 고정 입력).
+
+사용법 (agent/mcp_server_local 에서):
+    python -m tools.lstm_model.bench_inference [--scenarios reference,torch-pt,torch-store,numpy-store]
+        [--threads 1,4] [--batch-sizes 1,8,32,128] [--requests 50]
+        [--store bf16=weights/store_bf16.bin] [--out bench.json] [--baseline prev.json]
+
+- 입력: 체크인된 가중치 + model/data/anomaly_data.csv (KRX 크롤링 없음, fetch_recent_data 를 CSV 슬라이스로 대체)
+- 시나리오 × 스레드 수마다 별도 프로세스에서 측정하므로 cold load / peak RSS 가 서로 섞이지 않는다.
+    reference   : infer_with_ensemble_set (세트별 모델 순차 추론, 기존 구현)
+    torch-pt    : torch 배치 엔진, .pt 로딩
+    torch-store : torch 배치 엔진, weight store(mmap)
+    numpy-store : NumPy 배치 엔진, weight store(mmap)
+    student     : LSTM_STUDENT=1 (student.npz 가 있을 때)
+    store:<이름> : --store 로 지정한 다른 store (bf16/int8/pruned 등), NumPy 엔진
+- 측정값: import/cold load 시간, predict_anomaly_async 요청 지연 p50/p99, 배치 크기별 처리량(windows/s), peak RSS
+- 결과는 JSON 으로 저장하고, --baseline 을 주면 같은 (시나리오, 스레드) 끼리 비교해
+  tolerance 이상 나빠진 항목이 있으면 exit 1.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SERVER_DIR = os.path.dirname(os.path.dirname(BASE_DIR))  # agent/mcp_server_local
+DEFAULT_SCENARIOS = ("reference", "torch-pt", "torch-store", "numpy-store", "student")
+FIXTURE_STOCK = "anomaly_data"
+
+# 비교 시 방향: +1 = 클수록 나쁨, -1 = 작을수록 나쁨
+METRIC_DIRECTIONS = {
+    "cold_load_ms": 1,
+    "latency_p50_ms": 1,
+    "latency_p99_ms": 1,
+    "peak_rss_mb": 1,
+    "throughput": -1,
+}
+# 이 값보다 작은 절대 변화는 측정 잡음으로 보고 무시 (ms / MB)
+METRIC_FLOORS = {"cold_load_ms": 20.0, "latency_p50_ms": 2.0, "latency_p99_ms": 5.0, "peak_rss_mb": 16.0}
+
+
+# ----------------------------
+# 워커 (시나리오 1개 × 스레드 수 1개)
+# ----------------------------
+def _percentile(values: List[float], q: float) -> float:
+    return float(np.percentile(np.asarray(values), q)) if values else 0.0
+
+
+def _peak_rss_mb() -> float:
+    # Linux ru_maxrss 단위는 KB
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _run_worker(spec: dict) -> dict:
+    t0 = time.perf_counter()
+    import importlib
+
+    import pandas as pd
+
+    svc = importlib.import_module("tools.lstm_model.lstm_model_service")
+    if svc.LSTM_ENGINE == "torch":
+        import torch
+
+        torch.set_num_threads(spec["threads"])
+    import_ms = (time.perf_counter() - t0) * 1000
+
+    # 고정 입력: 최신 → 과거 순 전체 히스토리, 요청마다 30행씩 밀어가며 사용
+    raw = pd.read_csv(spec["data"], encoding="cp949")
+    hist = svc._preprocess_krx_frame(raw)
+    n_slices = len(hist) - svc.window_size + 1
+    windows = svc.sliding_scaled_windows(hist.values)
+    reference = spec["scenario"] == "reference"
+
+    t1 = time.perf_counter()
+    if reference:
+        svc.load_models()
+    elif svc.LSTM_STUDENT:
+        svc.get_student()
+        svc.get_engine()
+    else:
+        svc.get_engine()
+    cold_load_ms = (time.perf_counter() - t1) * 1000
+
+    state = {"i": 0}
+
+    async def _fixture_fetch(stock_name: str):
+        i = state["i"] % n_slices
+        state["i"] += 1
+        return hist.iloc[i : i + svc.window_size]
+
+    svc.fetch_recent_data = _fixture_fetch
+
+    async def _request() -> float:
+        if reference:
+            df_input = await _fixture_fetch(FIXTURE_STOCK)
+            ratios = [await svc.infer_with_ensemble_set(df_input, s) for s in range(svc.n_ensembles)]
+            return float(np.mean(ratios)) * 0.5
+        return (await svc.predict_anomaly_async(FIXTURE_STOCK))["anomaly_ratio"]
+
+    async def _latencies(n: int) -> List[float]:
+        out = []
+        for _ in range(n):
+            t = time.perf_counter()
+            await _request()
+            out.append((time.perf_counter() - t) * 1000)
+        return out
+
+    t2 = time.perf_counter()
+    first_ratio = asyncio.run(_request())
+    first_request_ms = (time.perf_counter() - t2) * 1000
+    lat = asyncio.run(_latencies(spec["requests"]))
+
+    throughput: Dict[str, float] = {}
+    if not reference:
+        for bs in spec["batch_sizes"]:
+            batch = windows[np.arange(bs) % len(windows)]
+            svc.score_ratios(batch)  # warm-up
+            n, t3 = 0, time.perf_counter()
+            while True:
+                svc.score_ratios(batch)
+                n += 1
+                elapsed = time.perf_counter() - t3
+                if elapsed >= spec["min_seconds"] and n >= 3:
+                    break
+            throughput[str(bs)] = round(n * bs / elapsed, 2)
+
+    return {
+        "scenario": spec["scenario"],
+        "threads": spec["threads"],
+        "import_ms": round(import_ms, 2),
+        "cold_load_ms": round(cold_load_ms, 2),
+        "first_request_ms": round(first_request_ms, 2),
+        "requests": len(lat),
+        "latency_p50_ms": round(_percentile(lat, 50), 3),
+        "latency_p99_ms": round(_percentile(lat, 99), 3),
+        "latency_mean_ms": round(float(np.mean(lat)), 3),
+        "throughput": throughput,
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+        "first_ratio": round(first_ratio, 4),
+        "engine": svc.LSTM_ENGINE,
+    }
+
+
+# ----------------------------
+# 실행기 (시나리오별 하위 프로세스)
+# ----------------------------
+def _scenario_env(name: str, store_path: str, stores: Dict[str, str], threads: int) -> Optional[dict]:
+    env = dict(os.environ)
+    env.update(
+        {
+            "LSTM_CACHE": "0",
+            "LSTM_STUDENT": "0",
+            "LSTM_EXECUTOR": "thread",
+            "LSTM_EXECUTOR_WORKERS": "1",
+            "OMP_NUM_THREADS": str(threads),
+            "MKL_NUM_THREADS": str(threads),
+            "OPENBLAS_NUM_THREADS": str(threads),
+            "PYTHONPATH": os.pathsep.join(filter(None, [SERVER_DIR, env.get("PYTHONPATH")])),
+        }
+    )
+    for k in ("LSTM_SET_BUDGET_MB", "LSTM_SETS", "LSTM_EARLY_EXIT"):
+        env.pop(k, None)
+    missing_store = os.path.join(tempfile.gettempdir(), "lstm_bench_no_store.bin")
+
+    if name in ("reference", "torch-pt"):
+        env.update({"LSTM_ENGINE": "torch", "LSTM_WEIGHT_STORE": missing_store})
+    elif name == "torch-store":
+        env.update({"LSTM_ENGINE": "torch", "LSTM_WEIGHT_STORE": store_path})
+    elif name == "numpy-store":
+        env.update({"LSTM_ENGINE": "numpy", "LSTM_WEIGHT_STORE": store_path})
+    elif name == "student":
+        env.update({"LSTM_ENGINE": "numpy", "LSTM_WEIGHT_STORE": store_path, "LSTM_STUDENT": "1"})
+    elif name.startswith("store:") and name[6:] in stores:
+        env.update({"LSTM_ENGINE": "numpy", "LSTM_WEIGHT_STORE": stores[name[6:]]})
+    else:
+        return None
+    return env
+
+
+def _ensure_store(path: Optional[str]) -> str:
+    """float32 store 경로. 없으면 체크인된 .pt 에서 임시 store 를 만든다."""
+    from . import lstm_model_service as svc
+
+    path = path or svc.weight_store_path
+    if os.path.exists(path):
+        return path
+    from .export_weights import export
+
+    tmp = os.path.join(tempfile.gettempdir(), "lstm_bench_store.bin")
+    if not os.path.exists(tmp):
+        export(tmp)
+    return tmp
+
+
+def _sha1(path: str) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR, capture_output=True, text=True
+        )
+        return out.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run_bench(
+    scenarios: List[str],
+    threads: List[int],
+    batch_sizes: List[int],
+    requests: int,
+    data_path: str,
+    store_path: Optional[str] = None,
+    stores: Optional[Dict[str, str]] = None,
+    min_seconds: float = 0.5,
+) -> dict:
+    from . import lstm_model_service as svc
+
+    stores = stores or {}
+    store_path = _ensure_store(store_path)
+    scenarios = list(scenarios) + [f"store:{n}" for n in stores if f"store:{n}" not in scenarios]
+
+    results, skipped = [], []
+    for name in scenarios:
+        if name == "student" and not os.path.exists(svc.student_path):
+            skipped.append({"scenario": name, "reason": f"{svc.student_path} 없음"})
+            continue
+        for n_threads in threads:
+            env = _scenario_env(name, store_path, stores, n_threads)
+            if env is None:
+                raise ValueError(f"알 수 없는 시나리오: {name}")
+            spec = {
+                "scenario": name,
+                "threads": n_threads,
+                "data": data_path,
+                "requests": requests if name != "reference" else max(3, requests // 10),
+                "batch_sizes": batch_sizes,
+                "min_seconds": min_seconds,
+            }
+            print(f"[bench_inference] {name} threads={n_threads} ...", flush=True)
+            proc = subprocess.run(
+                [sys.executable, "-m", "tools.lstm_model.bench_inference", "--worker", json.dumps(spec)],
+                cwd=SERVER_DIR,
+                env=env,
+                capture_output=True,
+                text=True,
+            )
+            if proc.returncode != 0:
+                tail = proc.stderr.strip().splitlines()[-1:] or ["?"]
+                skipped.append({"scenario": name, "threads": n_threads, "reason": tail[0]})
+                print(f"[bench_inference] {name} 실패: {tail[0]}")
+                continue
+            res = json.loads(proc.stdout.strip().splitlines()[-1])
+            print(
+                f"[bench_inference] {name} threads={n_threads} cold={res['cold_load_ms']:.0f}ms "
+                f"p50={res['latency_p50_ms']:.2f}ms p99={res['latency_p99_ms']:.2f}ms "
+                f"rss={res['peak_rss_mb']:.0f}MB"
+            )
+            results.append(res)
+
+    import torch
+
+    return {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "torch": torch.__version__,
+            "numpy": np.__version__,
+            "data": os.path.basename(data_path),
+            "data_sha1": _sha1(data_path),
+            "store": store_path,
+            "stores": stores,
+            "batch_sizes": batch_sizes,
+        },
+        "results": results,
+        "skipped": skipped,
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float = 0.25) -> List[dict]:
+    """같은 (scenario, threads) 끼리 비교해 tolerance 이상 나빠진 항목 목록."""
+    base = {(r["scenario"], r["threads"]): r for r in baseline.get("results", [])}
+    regressions = []
+    for r in current["results"]:
+        b = base.get((r["scenario"], r["threads"]))
+        if b is None:
+            continue
+        for metric, sign in METRIC_DIRECTIONS.items():
+            if metric == "throughput":
+                pairs = [(f"throughput[{k}]", v, b["throughput"].get(k)) for k, v in r["throughput"].items()]
+            else:
+                pairs = [(metric, r.get(metric), b.get(metric))]
+            for label, new, old in pairs:
+                if new is None or not old:
+                    continue
+                change = (new - old) / old * sign
+                if change > tolerance and abs(new - old) > METRIC_FLOORS.get(metric, 0.0):
+                    regressions.append(
+                        {
+                            "scenario": r["scenario"],
+                            "threads": r["threads"],
+                            "metric": label,
+                            "baseline": old,
+                            "current": new,
+                            "worse_by": round(change, 4),
+                        }
+                    )
+    return regressions
+
+
+def _int_list(s: str) -> List[int]:
+    return [int(v) for v in s.split(",") if v.strip()]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="LSTM 이상탐지 추론 벤치마크")
+    parser.add_argument("--worker", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--scenarios", default=",".join(DEFAULT_SCENARIOS))
+    parser.add_argument("--threads", default="1")
+    parser.add_argument("--batch-sizes", default="1,8,32,128")
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--min-seconds", type=float, default=0.5, help="배치 크기별 처리량 최소 측정 시간")
+    parser.add_argument("--data", default=None, help="기본: model/data/anomaly_data.csv")
+    parser.add_argument("--store-path", default=None, help="float32 store (기본: 서비스 설정, 없으면 임시 생성)")
+    parser.add_argument("--store", action="append", default=[], help="추가 store: 이름=경로 (반복 가능)")
+    parser.add_argument("--out", default=None)
+    parser.add_argument("--baseline", default=None)
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(_run_worker(json.loads(args.worker)), ensure_ascii=False))
+        sys.exit(0)
+
+    from .quantize_weights import _find_anomaly_csv
+
+    data_path = args.data or _find_anomaly_csv()
+    if not data_path:
+        sys.exit("model/data/anomaly_data.csv 를 찾을 수 없음 (--data 지정)")
+    extra = dict(s.split("=", 1) for s in args.store)
+
+    report = run_bench(
+        [s.strip() for s in args.scenarios.split(",") if s.strip()],
+        _int_list(args.threads),
+        _int_list(args.batch_sizes),
+        args.requests,
+        os.path.abspath(data_path),
+        store_path=args.store_path,
+        stores={k: os.path.abspath(v) for k, v in extra.items()},
+        min_seconds=args.min_seconds,
+    )
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        report["baseline"] = {"path": args.baseline, "tolerance": args.tolerance, "regressions": regressions}
+        exit_code = 1 if regressions else 0
+
+    out = args.out or os.path.join(BASE_DIR, "bench", f"bench_{datetime.now():%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"[bench_inference] → {out}")
+    if args.baseline:
+        print(json.dumps(report["baseline"], ensure_ascii=False, indent=2))
+    sys.exit(exit_code)
@@ -0,0 +1,220 @@
+# distill_student.py
+"""
+앙상블(teacher) anomaly_ratio → 단일 MLP student distillation.
+
+사용법 (agent/mcp_server_local 에서):
+    python -m tools.lstm_model.distill_student --data all_kospi_data.parquet [--out weights/student.npz]
+
+- --data: krx_dataset_merge.py 가 만든 KOSPI 전종목 parquet (날짜/종목명 + 시세 컬럼)
+          또는 KRX 개별종목 CSV (예: model/data/anomaly_data.csv)
+- 종목별로 최신 → 과거 순으로 정렬해 서비스와 같은 30일 윈도우(윈도우별 MinMax)를 만들고,
+  get_engine() 의 앙상블 비율을 정답으로 MLP 를 학습한다. (학습에만 torch 필요)
+- 산출물은 torch 없이 student_model.load_student() 로 읽으며,
+  LSTM_STUDENT=1 이면 서비스가 student 를 fast path 로 쓰고 borderline 점수만 앙상블로 재계산한다.
+"""
+import argparse
+import json
+import os
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from . import lstm_model_service as svc
+from .student_model import RATIO_SCALE, StudentModel, save_student
+
+
+def _stock_frames(path: str):
+    """(종목명, 최신 → 과거 순 피처 DataFrame) 을 차례로 반환."""
+    if path.endswith(".parquet"):
+        df = pd.read_parquet(path)
+        date_col = "날짜" if "날짜" in df.columns else "일자"
+        df["종목명"] = df["종목명"].astype(str).str.strip()
+        for name, g in df.groupby("종목명", sort=False):
+            g = g.sort_values(date_col, ascending=False)
+            yield name, svc._preprocess_krx_frame(g, min_rows=0)
+    else:
+        df = pd.read_csv(path, encoding="cp949")
+        yield os.path.basename(path), svc._preprocess_krx_frame(df, min_rows=0)
+
+
+def stock_windows(
+    path: str, stride: int = 5, max_windows: int = 200_000, seed: int = 0
+) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+    """
+    히스토리 → 스케일링된 윈도우 (N, T, F), 윈도우별 종목 인덱스 (N,), 종목명 목록.
+    종목마다 stride 간격으로 뽑고 max_windows 로 표본 추출.
+    """
+    rng = np.random.default_rng(seed)
+    frames = [(n, f) for n, f in _stock_frames(path) if len(f) >= svc.window_size]
+    counts = [len(range(0, len(f) - svc.window_size + 1, stride)) for _, f in frames]
+    keep_p = min(1.0, max_windows / max(1, sum(counts)))
+
+    chunks, groups = [], []
+    for i, ((_, f), n) in enumerate(zip(frames, counts)):
+        idx = np.arange(n) * stride
+        if keep_p < 1.0:
+            idx = idx[rng.random(n) < keep_p]
+        if idx.size:
+            chunks.append(svc.sliding_scaled_windows(f.values)[idx])
+            groups.append(np.full(idx.size, i, dtype=np.int64))
+    if not chunks:
+        raise ValueError(f"{path}: {svc.window_size}행 이상인 종목이 없음")
+    return np.concatenate(chunks), np.concatenate(groups), [n for n, _ in frames]
+
+
+def build_windows(
+    path: str, stride: int = 5, max_windows: int = 200_000, seed: int = 0
+) -> np.ndarray:
+    """히스토리 → 스케일링된 윈도우 (N, T, F). 종목마다 stride 간격으로 뽑고 max_windows 로 표본 추출."""
+    windows, groups, _ = stock_windows(path, stride, max_windows, seed)
+    print(f"[distill_student] stocks={len(np.unique(groups))} windows={len(windows)}")
+    return windows
+
+
+def teacher_ratios(windows: np.ndarray, chunk: int = 4096) -> np.ndarray:
+    """전체 앙상블 anomaly_ratio (N,)."""
+    eng = svc.get_engine()
+    out = [
+        eng.set_ratios(windows[i : i + chunk]).mean(axis=0) * 0.5
+        for i in range(0, len(windows), chunk)
+    ]
+    return np.concatenate(out).astype(np.float32)
+
+
+def train_student(
+    windows: np.ndarray,
+    targets: np.ndarray,
+    hidden=(128, 64),
+    epochs: int = 20,
+    batch_size: int = 256,
+    lr: float = 1e-3,
+    val_frac: float = 0.1,
+    seed: int = 0,
+):
+    """MLP (T*F → hidden → 1, sigmoid × RATIO_SCALE) 를 MSE 로 학습. (layers, val_idx) 반환."""
+    import torch
+    import torch.nn as nn
+
+    torch.manual_seed(seed)
+    rng = np.random.default_rng(seed)
+    perm = rng.permutation(len(windows))
+    n_val = max(1, int(len(windows) * val_frac))
+    val_idx, tr_idx = perm[:n_val], perm[n_val:]
+
+    x = torch.from_numpy(windows.reshape(len(windows), -1))
+    y = torch.from_numpy(targets / RATIO_SCALE)
+
+    dims = [x.shape[1], *hidden]
+    mods = []
+    for a, b in zip(dims[:-1], dims[1:]):
+        mods += [nn.Linear(a, b), nn.ReLU()]
+    net = nn.Sequential(*mods, nn.Linear(dims[-1], 1))
+    opt = torch.optim.Adam(net.parameters(), lr=lr)
+    loss_fn = nn.MSELoss()
+
+    tr = torch.from_numpy(tr_idx)
+    for epoch in range(epochs):
+        net.train()
+        order = tr[torch.randperm(len(tr))]
+        total = 0.0
+        for i in range(0, len(order), batch_size):
+            b = order[i : i + batch_size]
+            pred = torch.sigmoid(net(x[b]).squeeze(-1))
+            loss = loss_fn(pred, y[b])
+            opt.zero_grad()
+            loss.backward()
+            opt.step()
+            total += loss.item() * len(b)
+        print(f"[distill_student] epoch {epoch + 1}/{epochs} loss={total / max(1, len(order)):.6f}")
+
+    linears = [m for m in net if isinstance(m, nn.Linear)]
+    layers = [
+        (m.weight.detach().numpy().T.copy(), m.bias.detach().numpy().copy()) for m in linears
+    ]
+    return layers, val_idx
+
+
+def evaluate(student: StudentModel, windows: np.ndarray, targets: np.ndarray, cutoffs) -> dict:
+    """검증 윈도우에서 student 오차 + (fallback 적용 시) cutoff 기준 판정 일치율."""
+    pred = student.predict(windows)
+    err = np.abs(pred - targets)
+    report = {
+        "val_windows": int(len(targets)),
+        "val_mae": float(err.mean()),
+        "val_abs_err_p95": float(np.quantile(err, 0.95)),
+        "val_abs_err_max": float(err.max()),
+    }
+    if len(cutoffs):
+        border = student.borderline(pred, cutoffs, margin=report["val_abs_err_p95"])
+        final = np.where(border, targets, pred)  # borderline 은 앙상블 값으로 대체
+        c = np.asarray(cutoffs)[None, :]
+        agree = ((final[:, None] > c) == (targets[:, None] > c)).all(axis=1)
+        report.update(
+            {
+                "cutoffs": list(map(float, cutoffs)),
+                "fallback_rate": float(border.mean()),
+                "decision_agreement": float(agree.mean()),
+            }
+        )
+    return report
+
+
+def distill(
+    data_path: str,
+    out_path: str,
+    stride: int,
+    max_windows: int,
+    epochs: int,
+    cutoffs,
+    seed: int = 0,
+) -> dict:
+    windows = build_windows(data_path, stride=stride, max_windows=max_windows, seed=seed)
+    targets = teacher_ratios(windows)
+    layers, val_idx = train_student(windows, targets, epochs=epochs, seed=seed)
+
+    meta = {
+        "window_size": svc.window_size,
+        "n_features": len(svc.features),
+        "features": svc.features,
+        "hidden": [int(w.shape[1]) for w, _ in layers[:-1]],
+        "teacher_models": int(svc.get_engine().stacked.n_models),
+        "train_windows": int(len(windows) - len(val_idx)),
+        "data": os.path.basename(data_path),
+        "created": datetime.now().isoformat(timespec="seconds"),
+    }
+    report = evaluate(StudentModel(layers, meta), windows[val_idx], targets[val_idx], cutoffs)
+    meta.update(report)
+
+    os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+    save_student(out_path, layers, meta)
+    meta["out"] = out_path
+    return meta
+
+
+def _parse_cutoffs(s: Optional[str]):
+    return [float(v) for v in (s or "").split(",") if v.strip()]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="LSTM-AE 앙상블 → student MLP distillation")
+    parser.add_argument("--data", required=True, help="KOSPI parquet 또는 KRX 개별종목 CSV")
+    parser.add_argument("--out", default=svc.student_path)
+    parser.add_argument("--stride", type=int, default=5)
+    parser.add_argument("--max-windows", type=int, default=200_000)
+    parser.add_argument("--epochs", type=int, default=20)
+    parser.add_argument("--cutoffs", default=",".join(map(str, svc.student_cutoffs)))
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    result = distill(
+        args.data,
+        args.out,
+        args.stride,
+        args.max_windows,
+        args.epochs,
+        _parse_cutoffs(args.cutoffs),
+        args.seed,
+    )
+    print(json.dumps(result, ensure_ascii=False, indent=2))
@@ -0,0 +1,147 @@
+# early_exit.py
+"""
+순차 조기 종료(early-exit) 앙상블 평가.
+
+세트마다 모델을 무작위 순서로 조금씩(first, first×growth, ... 개) 평가하면서
+최종 anomaly_ratio(= 0.5 × 세트별 이상 비율 평균)의 신뢰구간을 갱신하고,
+구간 전체가 같은 band(LOW / MODERATE / ELEVATED) 안에 들어오면 나머지 모델은 건너뛴다.
+
+신뢰구간은 두 가지의 교집합이다.
+- 결정적 구간: 아직 평가하지 않은 모델이 전부 정상/전부 이상인 경우 (항상 성립)
+- 확률적 구간: 세트별 비복원 추출(Hoeffding–Serfling)을 세트 간 독립으로 합친 Hoeffding 구간,
+  라운드 수만큼 δ 를 나눠 순차 검정에서도 전체 신뢰수준 1-δ 를 유지
+모든 모델을 평가하면 구간 폭은 0 이 되어 전체 앙상블 결과와 같다.
+"""
+import math
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# band 경계 2개일 때 이름 (fusion_solver 최종 verdict 와 같은 표기)
+BAND_NAMES = ("LOW", "MODERATE", "ELEVATED")
+
+
+def band_of(ratio: float, cutoffs: Sequence[float]) -> str:
+    i = int(np.searchsorted(np.asarray(cutoffs, dtype=np.float64), ratio, side="right"))
+    if len(cutoffs) == len(BAND_NAMES) - 1:
+        return BAND_NAMES[i]
+    return f"band{i}"
+
+
+def _n_rounds(max_count: int, first: int, growth: float) -> int:
+    n, k, step = 0, 0, first
+    while k < max_count:
+        k += step
+        step = max(1, int(math.ceil(step * growth)))
+        n += 1
+    return max(n, 1)
+
+
+def ratio_bounds(
+    hits: np.ndarray, evaluated: np.ndarray, totals: np.ndarray, delta: float
+) -> tuple:
+    """
+    세트별 (이상 판정 수, 평가 모델 수, 전체 모델 수) → (추정치, 하한, 상한).
+    모델이 없는 세트는 비율 0 (StackedEnsemble.set_ratios 와 동일).
+    """
+    n_sets = len(totals)
+    has = totals > 0
+    k = np.maximum(evaluated, 1)
+    n = np.maximum(totals, 1)
+
+    p_hat = np.where(evaluated > 0, hits / k, 0.5)
+    p_hat = np.where(has, p_hat, 0.0)
+    estimate = 0.5 * p_hat.mean()
+
+    det_lo = 0.5 * np.where(has, hits / n, 0.0).mean()
+    det_hi = 0.5 * np.where(has, (hits + totals - evaluated) / n, 0.0).mean()
+
+    sampled = has & (evaluated > 0) & (evaluated < totals)
+    unsampled = has & (evaluated == 0)
+    if unsampled.any():
+        lo, hi = det_lo, det_hi
+    else:
+        # 세트 s 의 추정치 범위 = 1/k_s, 비복원 보정 (1 - (k_s-1)/N_s)
+        var_sum = np.sum(
+            np.where(sampled, (1.0 - (evaluated - 1) / n) / k, 0.0)
+        )
+        eps = 0.5 * math.sqrt(math.log(2.0 / delta) * var_sum / (2.0 * n_sets**2))
+        lo = max(det_lo, estimate - eps)
+        hi = min(det_hi, estimate + eps)
+    return float(estimate), float(lo), float(hi)
+
+
+def engine_sets(engine) -> List[Tuple[object, np.ndarray]]:
+    """전체 앙상블 엔진 → 세트별 (엔진, 그 세트 모델 인덱스)."""
+    st = engine.stacked
+    return [(engine, np.flatnonzero(st.set_ids == s)) for s in range(st.n_sets)]
+
+
+def sequential_ratio(
+    engine,
+    window: np.ndarray,
+    cutoffs: Sequence[float],
+    delta: float = 0.05,
+    first: int = 4,
+    growth: float = 2.0,
+    seed: Optional[int] = None,
+) -> dict:
+    """
+    (1, T, F) 윈도우 하나를 조기 종료 방식으로 평가.
+
+    Args:
+        engine: 전체 앙상블 엔진, 또는 세트별 (엔진, 모델 인덱스) 목록
+            (SetRegistry.set_engines: 세트마다 다른 엔진, LSTM_SETS 로 고른 세트만)
+
+    Returns:
+        {'anomaly_ratio', 'band', 'bound': [lo, hi], 'confidence', 'models_evaluated', 'models_total', 'rounds'}
+    """
+    sets = engine_sets(engine) if hasattr(engine, "stacked") else list(engine)
+    n_sets = len(sets)
+    totals = np.array([len(idx) for _, idx in sets], dtype=np.int64)
+    rng = np.random.default_rng(seed)
+    orders = [rng.permutation(idx) for _, idx in sets]
+
+    first = max(1, int(first))
+    max_rounds = _n_rounds(int(totals.max()), first, growth)
+    delta_round = delta / max_rounds
+
+    hits = np.zeros(n_sets, dtype=np.float64)
+    evaluated = np.zeros(n_sets, dtype=np.int64)
+    step, rounds = first, 0
+    while True:
+        take = [o[evaluated[s] : evaluated[s] + step] for s, o in enumerate(orders)]
+        # 같은 엔진의 세트는 한 번의 forward 로
+        groups: Dict[int, list] = {}
+        for s, t in enumerate(take):
+            if t.size:
+                groups.setdefault(id(sets[s][0]), []).append(s)
+        for members in groups.values():
+            eng = sets[members[0]][0]
+            idx = np.concatenate([take[s] for s in members])
+            flags = eng.reconstruction_errors(window, models=idx)[:, 0] > eng.stacked.thresholds[idx]
+            offset = 0
+            for s in members:
+                hits[s] += flags[offset : offset + take[s].size].sum()
+                offset += take[s].size
+        evaluated += np.array([len(t) for t in take])
+        rounds += 1
+
+        estimate, lo, hi = ratio_bounds(hits, evaluated, totals, delta_round)
+        done = bool((evaluated >= totals).all())
+        if done or band_of(lo, cutoffs) == band_of(hi, cutoffs):
+            break
+        step = max(1, int(math.ceil(step * growth)))
+
+    return {
+        "anomaly_ratio": round(estimate, 4),
+        "band": band_of(estimate, cutoffs),
+        "bound": [round(lo, 4), round(hi, 4)],
+        "confidence": round(1.0 - delta, 4),
+        "models_evaluated": int(evaluated.sum()),
+        "models_total": int(totals.sum()),
+        "rounds": rounds,
+    }
+
+
+__all__ = ["BAND_NAMES", "band_of", "engine_sets", "ratio_bounds", "sequential_ratio"]
@@ -0,0 +1,271 @@
+# ensemble_engine.py
+"""
+LSTM AutoEncoder 앙상블 배치 추론 엔진.
+
+- 종목별 state_dict 를 로딩 시점에 한 번만 모델 축(M)으로 쌓아 둔다.
+- 입력 윈도우 B개를 M개 모델 전체에 대해 한 번의 벡터화된 forward 로 평가한다.
+- 게이트 순서/수식은 torch.nn.LSTM(1-layer, batch_first=True)과 동일 (i, f, g, o).
+- 이 모듈은 torch 를 import 하지 않는다. torch 엔진은 torch_engine.py 참고.
+"""
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+# ----------------------------
+# 쌓인(stacked) 파라미터 정의
+# ----------------------------
+# 모든 가중치는 matmul 바로 쓸 수 있도록 전치(in, out) 형태로 보관한다.
+#   enc_w_ih (M, F, 4H) | enc_w_hh (M, H, 4H) | enc_b (M, 4H)
+#   lat_w    (M, H, L)  | lat_b    (M, L)
+#   dec_in_w (M, L, H)  | dec_in_b (M, H)
+#   dec_w_ih (M, H, 4F) | dec_w_hh (M, F, 4F) | dec_b (M, 4F)
+PARAM_KEYS = (
+    "enc_w_ih",
+    "enc_w_hh",
+    "enc_b",
+    "lat_w",
+    "lat_b",
+    "dec_in_w",
+    "dec_in_b",
+    "dec_w_ih",
+    "dec_w_hh",
+    "dec_b",
+)
+# 축소 정밀도(store precision) 변환 대상이 되는 가중치 행렬. 바이어스는 항상 float32 유지.
+WEIGHT_KEYS = ("enc_w_ih", "enc_w_hh", "lat_w", "dec_in_w", "dec_w_ih", "dec_w_hh")
+PRECISIONS = ("float32", "bfloat16", "float16", "int8")
+
+
+def _to_numpy(t) -> np.ndarray:
+    if hasattr(t, "detach"):
+        t = t.detach().cpu().numpy()
+    return np.asarray(t, dtype=np.float32)
+
+
+def bf16_to_float32(u: np.ndarray) -> np.ndarray:
+    """bfloat16 비트열(uint16) → float32."""
+    return (np.asarray(u, dtype=np.uint16).astype(np.uint32) << 16).view(np.float32)
+
+
+def float32_to_bf16(x: np.ndarray) -> np.ndarray:
+    """float32 → bfloat16 비트열(uint16), round-to-nearest-even."""
+    u = np.ascontiguousarray(x, dtype=np.float32).view(np.uint32).astype(np.uint64)
+    u = u + 0x7FFF + ((u >> 16) & 1)
+    return (u >> 16).astype(np.uint16)
+
+
+def _convert_state_dict(sd: dict) -> Dict[str, np.ndarray]:
+    """LSTMAutoEncoder.state_dict() → 전치/바이어스 합산된 numpy 파라미터."""
+    return {
+        "enc_w_ih": _to_numpy(sd["encoder.weight_ih_l0"]).T,
+        "enc_w_hh": _to_numpy(sd["encoder.weight_hh_l0"]).T,
+        "enc_b": _to_numpy(sd["encoder.bias_ih_l0"])
+        + _to_numpy(sd["encoder.bias_hh_l0"]),
+        "lat_w": _to_numpy(sd["latent.weight"]).T,
+        "lat_b": _to_numpy(sd["latent.bias"]),
+        "dec_in_w": _to_numpy(sd["decoder_input.weight"]).T,
+        "dec_in_b": _to_numpy(sd["decoder_input.bias"]),
+        "dec_w_ih": _to_numpy(sd["decoder.weight_ih_l0"]).T,
+        "dec_w_hh": _to_numpy(sd["decoder.weight_hh_l0"]).T,
+        "dec_b": _to_numpy(sd["decoder.bias_ih_l0"])
+        + _to_numpy(sd["decoder.bias_hh_l0"]),
+    }
+
+
+class StackedEnsemble:
+    """
+    모델 축(M)으로 쌓은 앙상블 파라미터 + 모델별 임계값/세트 번호.
+
+    Attributes:
+        params: PARAM_KEYS → (M, ...) 배열. precision 이 float32 가 아니면 WEIGHT_KEYS 는
+            bfloat16(uint16 비트열) / float16 / int8 로 보관된다.
+        thresholds: (M,) 모델별 임계값
+        set_ids: (M,) 모델이 속한 세트 인덱스(0-base)
+        names: 모델(종목) 이름 리스트
+        n_sets: 세트 수 (모델이 없는 세트도 포함)
+        precision: 가중치 보관 정밀도 (PRECISIONS)
+        scales: int8 일 때 WEIGHT_KEYS → (M, 1, out) 채널별 scale
+    """
+
+    def __init__(
+        self,
+        params: Dict[str, np.ndarray],
+        thresholds: np.ndarray,
+        set_ids: np.ndarray,
+        names: List[str],
+        n_sets: int,
+        precision: str = "float32",
+        scales: Optional[Dict[str, np.ndarray]] = None,
+    ):
+        if precision not in PRECISIONS:
+            raise ValueError(f"지원하지 않는 precision: {precision}")
+        self.params = params
+        self.precision = precision
+        self.scales = scales or {}
+        self.thresholds = np.asarray(thresholds, dtype=np.float32)
+        self.set_ids = np.asarray(set_ids, dtype=np.int64)
+        self.names = list(names)
+        self.n_sets = int(n_sets)
+        self.set_counts = np.bincount(self.set_ids, minlength=self.n_sets)
+
+    @property
+    def n_models(self) -> int:
+        return len(self.names)
+
+    def float32_params(self) -> Dict[str, np.ndarray]:
+        """계산용 float32 파라미터. 이미 float32 인 배열은 복사 없이 그대로 반환."""
+        out = {}
+        for k, v in self.params.items():
+            if k not in WEIGHT_KEYS or self.precision == "float32":
+                out[k] = np.ascontiguousarray(v, dtype=np.float32)
+            elif self.precision == "bfloat16":
+                out[k] = bf16_to_float32(v)
+            elif self.precision == "int8":
+                out[k] = v.astype(np.float32) * self.scales[k]
+            else:
+                out[k] = v.astype(np.float32)
+        return out
+
+    def set_ratios(self, errors: np.ndarray) -> np.ndarray:
+        """
+        재구성 오차(M, B) → 세트별 이상 비율(S, B).
+        모델이 하나도 없는 세트는 0 (기존 infer_with_ensemble_set 과 동일).
+        """
+        errors = np.asarray(errors)
+        flags = (errors > self.thresholds[:, None]).astype(np.float64)
+        sums = np.zeros((self.n_sets, flags.shape[1]), dtype=np.float64)
+        np.add.at(sums, self.set_ids, flags)
+        counts = np.maximum(self.set_counts, 1)[:, None]
+        return sums / counts
+
+
+def stack_ensemble(
+    weights_per_set: Sequence[Dict[str, dict]],
+    thresholds_per_set: Sequence[Dict[str, float]],
+) -> StackedEnsemble:
+    """
+    load_models() 가 만든 세트별 dict(종목명→state_dict / 종목명→임계값)를 하나로 쌓는다.
+    임계값이 없는 종목은 기존 로직과 동일하게 제외한다.
+    """
+    per_key: Dict[str, list] = {k: [] for k in PARAM_KEYS}
+    thresholds, set_ids, names = [], [], []
+
+    for set_idx, (weights_dict, threshold_dict) in enumerate(
+        zip(weights_per_set, thresholds_per_set)
+    ):
+        for stock_name, sd in weights_dict.items():
+            threshold = threshold_dict.get(stock_name)
+            if threshold is None:
+                continue
+            converted = _convert_state_dict(sd)
+            for k in PARAM_KEYS:
+                per_key[k].append(converted[k])
+            thresholds.append(float(threshold))
+            set_ids.append(set_idx)
+            names.append(stock_name)
+
+    if not names:
+        raise ValueError("임계값이 매칭되는 모델이 없습니다.")
+
+    params = {k: np.ascontiguousarray(np.stack(v)) for k, v in per_key.items()}
+    return StackedEnsemble(
+        params=params,
+        thresholds=np.array(thresholds, dtype=np.float32),
+        set_ids=np.array(set_ids, dtype=np.int64),
+        names=names,
+        n_sets=len(weights_per_set),
+    )
+
+
+# ----------------------------
+# NumPy 배치 엔진 (torch 불필요)
+# ----------------------------
+def _sigmoid(x: np.ndarray) -> np.ndarray:
+    # exp overflow 없는 형태
+    return 0.5 * (np.tanh(0.5 * x) + 1.0)
+
+
+def _lstm_cell(gates: np.ndarray, c: np.ndarray):
+    i, f, g, o = np.split(gates, 4, axis=-1)
+    c = _sigmoid(f) * c + _sigmoid(i) * np.tanh(g)
+    h = _sigmoid(o) * np.tanh(c)
+    return h, c
+
+
+class NumpyEnsembleEngine:
+    """
+    TorchEnsembleEngine 과 동일한 수식을 NumPy(float32)로 수행.
+    torch 를 import 하지 않으므로 경량 컨테이너/워커에서 사용한다.
+    """
+
+    name = "numpy"
+
+    def __init__(self, stacked: StackedEnsemble, max_batch: int = 128):
+        self.stacked = stacked
+        self.max_batch = max(1, int(max_batch))
+        # NumPy 는 저정밀 matmul 가속이 없으므로 축소 정밀도 store 는 로딩 시 float32 로 복원
+        self._p = stacked.float32_params()
+
+    def param_arrays(self) -> List[np.ndarray]:
+        """계산에 쓰는 파라미터 배열 (축소 정밀도 store 면 float32 복원본)."""
+        return list(self._p.values())
+
+    def _forward_errors(self, x: np.ndarray, p: Dict[str, np.ndarray]) -> np.ndarray:
+        n_models = p["enc_w_ih"].shape[0]
+        batch, steps, n_feat = x.shape
+        hidden = p["enc_w_hh"].shape[1]
+
+        h = np.zeros((n_models, batch, hidden), dtype=np.float32)
+        c = np.zeros_like(h)
+        enc_b = p["enc_b"][:, None, :]
+        for t in range(steps):
+            gates = np.matmul(x[:, t], p["enc_w_ih"]) + enc_b
+            gates += np.matmul(h, p["enc_w_hh"])
+            h, c = _lstm_cell(gates, c)
+
+        z = np.matmul(h, p["lat_w"]) + p["lat_b"][:, None, :]
+        dec_in = np.matmul(z, p["dec_in_w"]) + p["dec_in_b"][:, None, :]
+        dec_x = np.matmul(dec_in, p["dec_w_ih"]) + p["dec_b"][:, None, :]
+
+        hd = np.zeros((n_models, batch, n_feat), dtype=np.float32)
+        cd = np.zeros_like(hd)
+        sq_err = np.zeros((n_models, batch), dtype=np.float32)
+        for t in range(steps):
+            gates = dec_x + np.matmul(hd, p["dec_w_hh"])
+            hd, cd = _lstm_cell(gates, cd)
+            sq_err += ((x[:, t] - hd) ** 2).sum(axis=-1)
+        return sq_err / (steps * n_feat)
+
+    def reconstruction_errors(
+        self, windows: np.ndarray, models: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        (B, T, F) 스케일링된 윈도우 → (M, B) 재구성 MSE.
+        models (모델 인덱스 배열) 를 주면 그 모델들만 계산해 (len(models), B) 를 반환한다.
+        """
+        windows = np.asarray(windows, dtype=np.float32)
+        if windows.ndim == 2:
+            windows = windows[None]
+        p = self._p if models is None else {k: v[models] for k, v in self._p.items()}
+        out = [
+            self._forward_errors(windows[s : s + self.max_batch], p)
+            for s in range(0, windows.shape[0], self.max_batch)
+        ]
+        return np.concatenate(out, axis=1)
+
+    def set_ratios(self, windows: np.ndarray) -> np.ndarray:
+        """(B, T, F) 윈도우 → 세트별 이상 비율 (S, B)."""
+        return self.stacked.set_ratios(self.reconstruction_errors(windows))
+
+
+__all__ = [
+    "PARAM_KEYS",
+    "WEIGHT_KEYS",
+    "PRECISIONS",
+    "bf16_to_float32",
+    "float32_to_bf16",
+    "StackedEnsemble",
+    "stack_ensemble",
+    "NumpyEnsembleEngine",
+]
@@ -0,0 +1,141 @@
+# executor.py
+"""
+CPU-bound 추론을 이벤트 루프 밖(스레드/프로세스 풀)에서 실행하는 bounded executor.
+
+- 풀 종류/워커 수/동시 실행 한도는 환경변수로 설정
+    LSTM_EXECUTOR          : "thread"(기본) | "process"
+    LSTM_EXECUTOR_WORKERS  : 풀 워커 수 (기본 2)
+    LSTM_MAX_CONCURRENCY   : 동시에 풀에 들어갈 수 있는 작업 수 (기본 = 워커 수)
+- 한도를 넘는 호출은 이벤트 루프를 막지 않고 semaphore 에서 대기하며,
+  대기열 깊이/대기 시간/실행 시간은 stats() 로 노출한다.
+"""
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+import weakref
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+
+class BoundedExecutor:
+    def __init__(
+        self,
+        kind: str = "thread",
+        max_workers: int = 2,
+        max_concurrency: Optional[int] = None,
+        name: str = "lstm",
+        initializer: Optional[Callable[[], None]] = None,
+    ):
+        """
+        initializer: process 모드에서 워커 프로세스가 시작될 때 (첫 작업 전에) 한 번 실행할 함수.
+            pickle 가능한 모듈 수준 함수여야 하며, 풀이 만들어지기 전까지 바꿀 수 있다.
+        """
+        if kind not in ("thread", "process"):
+            raise ValueError(f"지원하지 않는 executor 종류: {kind}")
+        self.kind = kind
+        self.name = name
+        self.max_workers = max(1, int(max_workers))
+        self.max_concurrency = max(1, int(max_concurrency or self.max_workers))
+        self.initializer = initializer
+
+        self._pool: Optional[Executor] = None
+        # semaphore 는 이벤트 루프에 묶이므로 루프별로 둔다 (동기 래퍼가 임시 루프를 만드는 경우 대비)
+        self._sems: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._lock = threading.Lock()
+
+        # 메트릭
+        self.queued = 0
+        self.in_flight = 0
+        self.max_queued = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self._wait_sec = 0.0
+        self._run_sec = 0.0
+
+    def _get_pool(self) -> Executor:
+        with self._lock:
+            if self._pool is None:
+                if self.kind == "process":
+                    # torch/BLAS 스레드 상태를 fork 로 복제하지 않도록 spawn 사용
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=self.max_workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                        initializer=self.initializer,
+                    )
+                else:
+                    self._pool = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix=f"{self.name}-infer",
+                    )
+            return self._pool
+
+    async def run(self, fn: Callable[..., Any], *args) -> Any:
+        """fn(*args) 를 풀에서 실행. process 모드면 fn/args/반환값은 pickle 가능해야 한다."""
+        loop = asyncio.get_running_loop()
+        sem = self._sems.get(loop)
+        if sem is None:
+            sem = self._sems[loop] = asyncio.Semaphore(self.max_concurrency)
+
+        self.submitted += 1
+        self.queued += 1
+        self.max_queued = max(self.max_queued, self.queued)
+        t_wait = time.perf_counter()
+        try:
+            await sem.acquire()
+        finally:
+            self.queued -= 1
+        self._wait_sec += time.perf_counter() - t_wait
+
+        self.in_flight += 1
+        t_run = time.perf_counter()
+        try:
+            result = await loop.run_in_executor(self._get_pool(), fn, *args)
+            self.completed += 1
+            return result
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self._run_sec += time.perf_counter() - t_run
+            self.in_flight -= 1
+            sem.release()
+
+    def stats(self) -> dict:
+        done = max(1, self.completed + self.failed)
+        return {
+            "name": self.name,
+            "kind": self.kind,
+            "max_workers": self.max_workers,
+            "max_concurrency": self.max_concurrency,
+            "queued": self.queued,
+            "in_flight": self.in_flight,
+            "max_queued": self.max_queued,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "avg_wait_ms": round(self._wait_sec / done * 1000, 2),
+            "avg_run_ms": round(self._run_sec / done * 1000, 2),
+        }
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=wait)
+                self._pool = None
+
+
+def executor_from_env(name: str = "lstm") -> BoundedExecutor:
+    return BoundedExecutor(
+        kind=os.environ.get("LSTM_EXECUTOR", "thread").strip().lower(),
+        max_workers=int(os.environ.get("LSTM_EXECUTOR_WORKERS", "2")),
+        max_concurrency=int(os.environ.get("LSTM_MAX_CONCURRENCY", "0")) or None,
+        name=name,
+    )
+
+
+__all__ = ["BoundedExecutor", "executor_from_env"]
@@ -0,0 +1,64 @@
+# export_weights.py
+"""
+ensemble_weights_set*.pt + ensemble_thresholds_set*.csv → 단일 weight store 파일 (1회성 변환)
+
+사용법 (agent/mcp_server_local 에서):
+    python -m tools.lstm_model.export_weights [--out weights/ensemble_store.bin] [--check]
+
+원본 .pt/.csv 의 크기·mtime·sha1 을 store index 에 기록하므로, 원본이 바뀌면 서비스가 오래된 store 를 감지한다.
+
+변환은 torch 가 설치된 환경에서 한 번만 수행하고, 산출물만 배포하면
+워커는 unpickle 없이 mmap 으로 로딩하며 LSTM_ENGINE=numpy 워커는 torch 없이 추론한다.
+"""
+import argparse
+
+import numpy as np
+
+from . import lstm_model_service as svc
+from .ensemble_engine import NumpyEnsembleEngine, stack_ensemble
+from .weight_store import open_store, source_stamps, write_store
+
+
+def export(out_path: str) -> None:
+    svc.load_models()
+    stacked = stack_ensemble(svc.ensemble_weights, svc.ensemble_thresholds)
+    write_store(stacked, out_path, sources=source_stamps(svc.store_sources(), out_path))
+    print(
+        f"[export_weights] {stacked.n_models} models / {stacked.n_sets} sets → {out_path}"
+    )
+
+
+def check(out_path: str, n_windows: int = 64, seed: int = 0, atol: float = 1e-5) -> bool:
+    """store(NumPy 엔진, mmap)와 torch 엔진의 재구성 오차/판정을 무작위 윈도우로 비교."""
+    from .torch_engine import TorchEnsembleEngine
+
+    svc.load_models()
+    ref = TorchEnsembleEngine(stack_ensemble(svc.ensemble_weights, svc.ensemble_thresholds))
+    eng = NumpyEnsembleEngine(open_store(out_path))
+
+    rng = np.random.default_rng(seed)
+    windows = rng.random((n_windows, svc.window_size, len(svc.features)), dtype=np.float32)
+    err_ref = ref.reconstruction_errors(windows)
+    err_np = eng.reconstruction_errors(windows)
+
+    max_diff = float(np.max(np.abs(err_ref - err_np)))
+    flags_ref = err_ref > ref.stacked.thresholds[:, None]
+    flags_np = err_np > eng.stacked.thresholds[:, None]
+    agreement = float(np.mean(flags_ref == flags_np))
+    ok = max_diff <= atol
+    print(
+        f"[export_weights] check: max|Δerr|={max_diff:.3e} decision_agreement={agreement:.4%} "
+        f"→ {'OK' if ok else 'FAIL'}"
+    )
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="LSTM-AE 앙상블 가중치 → weight store 변환")
+    parser.add_argument("--out", default=svc.weight_store_path)
+    parser.add_argument("--check", action="store_true", help="export 후 torch 경로와 수치 비교")
+    args = parser.parse_args()
+
+    export(args.out)
+    if args.check and not check(args.out):
+        raise SystemExit(1)
@@ -1,34 +1,75 @@
 # lstm_model_service.py
+import hashlib
+import io
+import json
 import os
 import time
-import glob
 import asyncio
-from datetime import datetime
+import threading
 from typing import Optional, Dict, List
 
-import torch
 import numpy as np
 import pandas as pd
 from sklearn.preprocessing import MinMaxScaler
 
-from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, StaleElementReferenceException
-from webdriver_manager.chrome import ChromeDriverManager
+
+from ..browser.cdp_capture import DownloadCapture
+from ..browser.driver_pool import get_pool as get_driver_pool
+from ..krx.krx_client import KRXClientError, fetch_mode as krx_fetch_mode, get_client as get_krx_client
+from ..krx.krx_page import select_issue
+from ..krx.price_store import get_store as get_price_store
+from .early_exit import sequential_ratio
+from .ensemble_engine import NumpyEnsembleEngine, stack_ensemble
+from .executor import executor_from_env
+from .model_registry import SetRegistry, pt_set_loader, store_set_loader
+from .result_cache import cache_from_env
+from .student_model import load_student
+from .weight_store import bundle_sources, open_store, read_index, source_stamps, stale_sources, write_store
 
 
 # ----------------------------
 # 전역 설정/경로
 # ----------------------------
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-ensemble_weight_dir = os.path.join(BASE_DIR, "weights", "ensemble_weights")
-ensemble_threshold_dir = os.path.join(BASE_DIR, "weights", "ensemble_thresholds")
+# 가중치 번들 루트: ensemble_weights/ + ensemble_thresholds/ (+ ensemble_store.bin)
+# prune_ensemble 로 만든 축소 번들을 쓰려면 LSTM_WEIGHT_BUNDLE 로 지정
+weight_bundle_dir = os.environ.get("LSTM_WEIGHT_BUNDLE") or os.path.join(BASE_DIR, "weights")
+ensemble_weight_dir = os.path.join(weight_bundle_dir, "ensemble_weights")
+ensemble_threshold_dir = os.path.join(weight_bundle_dir, "ensemble_thresholds")
+
+# 추론 엔진 선택: "torch"(기본) | "numpy"(torch 미사용, weight store 필요)
+LSTM_ENGINE = os.environ.get("LSTM_ENGINE", "torch").strip().lower()
+# 단일 memory-mappable 가중치 파일 (있으면 .pt 대신 사용, export_weights 로 생성)
+weight_store_path = os.environ.get("LSTM_WEIGHT_STORE") or os.path.join(
+    weight_bundle_dir, "ensemble_store.bin"
+)
+# distilled student fast path (distill_student 로 생성): borderline 점수만 앙상블로 재계산
+LSTM_STUDENT = os.environ.get("LSTM_STUDENT", "0").strip().lower() in ("1", "true", "yes")
+student_path = os.environ.get("LSTM_STUDENT_PATH") or os.path.join(
+    weight_bundle_dir, "student.npz"
+)
+# 판정 경계(anomaly_ratio) 목록과 경계 주변 fallback 폭 (비우면 student 검증 p95 오차 사용)
+student_cutoffs = [
+    float(v) for v in os.environ.get("LSTM_STUDENT_CUTOFFS", "0.25").split(",") if v.strip()
+]
+_student_margin_env = os.environ.get("LSTM_STUDENT_MARGIN", "").strip()
+student_margin = float(_student_margin_env) if _student_margin_env else None
+# 세트 단위 lazy 로딩 레지스트리 (model_registry): 메모리 예산(MB) / 사용할 세트(1-base)
+set_budget_mb = float(os.environ.get("LSTM_SET_BUDGET_MB", "0") or 0)
+active_set_ids = [
+    int(v) - 1 for v in os.environ.get("LSTM_SETS", "").split(",") if v.strip()
+] or None
+USE_SET_REGISTRY = bool(set_budget_mb or active_set_ids)
+# 순차 조기 종료 평가 (early_exit): band 가 확정되면 나머지 모델 생략
+LSTM_EARLY_EXIT = os.environ.get("LSTM_EARLY_EXIT", "0").strip().lower() in ("1", "true", "yes")
+band_cutoffs = [
+    float(v) for v in os.environ.get("LSTM_BAND_CUTOFFS", "0.1,0.25").split(",") if v.strip()
+]
+early_exit_delta = float(os.environ.get("LSTM_EARLY_EXIT_DELTA", "0.05"))
 
-device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
 features = [
     "종가",
     "대비",
@@ -45,36 +86,31 @@ window_size = 30
 n_ensembles = 10
 ensemble_weights: List[Dict[str, dict]] = []
 ensemble_thresholds: List[Dict[str, float]] = []
-
-
-# ----------------------------
-# 모델 정의
-# ----------------------------
-class LSTMAutoEncoder(torch.nn.Module):
-    def __init__(self, input_dim, hidden_dim=64, latent_dim=16):
-        super().__init__()
-        self.encoder = torch.nn.LSTM(input_dim, hidden_dim, batch_first=True)
-        self.latent = torch.nn.Linear(hidden_dim, latent_dim)
-        self.decoder_input = torch.nn.Linear(latent_dim, hidden_dim)
-        self.decoder = torch.nn.LSTM(hidden_dim, input_dim, batch_first=True)
-
-    def forward(self, x):
-        _, (h_n, _) = self.encoder(x)
-        z = self.latent(h_n[-1])
-        dec_input = self.decoder_input(z).unsqueeze(1).repeat(1, x.size(1), 1)
-        out, _ = self.decoder(dec_input)
-        return out
+_engine = None  # TorchEnsembleEngine | NumpyEnsembleEngine
+_engine_lock = threading.Lock()
+_registry: Optional[SetRegistry] = None
+_student = None  # StudentModel
+_student_lock = threading.Lock()
+_student_counts = {"windows": 0, "fallbacks": 0}
+# CPU-bound 추론 전용 bounded executor (이벤트 루프 블로킹 방지)
+_executor = executor_from_env("lstm")
+# (종목, 최신 일봉 일자) 결과 캐시 (LSTM_CACHE=0 이면 None)
+_cache = cache_from_env()
 
 
 # ----------------------------
 # 가중치/임계값 로딩
 # ----------------------------
 def load_models() -> None:
-    """weights/thresholds 폴더에서 앙상블 10세트를 로딩."""
+    """weights/thresholds 폴더에서 앙상블 10세트를 로딩. (torch 필요)"""
     global ensemble_weights, ensemble_thresholds
     if ensemble_weights and ensemble_thresholds:
         return  # 이미 로드됨
 
+    import torch
+
+    from .torch_engine import device
+
     for i in range(1, n_ensembles + 1):
         weights_path = os.path.join(ensemble_weight_dir, f"ensemble_weights_set{i}.pt")
         thresh_path = os.path.join(
@@ -95,87 +131,236 @@ def load_models() -> None:
         ensemble_thresholds.append(dict(zip(df_thresh["종목명"], df_thresh["임계값"])))
 
 
-# ----------------------------
-# KRX 크롤링 헬퍼
-# ----------------------------
-def _resolve_base_download_dir() -> str:
-    env = os.environ.get("STOCK_INFO_DOWNLOAD_DIR")
-    if env:
-        base = env
-    else:
-        if os.name == "nt":
-            base = os.path.join(
-                os.environ.get("TEMP", r"C:\Temp"), "stock_info_downloads"
-            )
-        else:
-            base = "/tmp/stock_info_downloads"
-    os.makedirs(base, exist_ok=True)
-    return base
-
-
-def _build_chrome_options(download_dir: str) -> Options:
-    opts = webdriver.ChromeOptions()
-    # 필요 시 headless 사용: opts.add_argument("--headless=new")
-    opts.add_argument("--no-sandbox")
-    opts.add_argument("--disable-dev-shm-usage")
-    opts.add_argument("--window-size=1920,1080")
-    opts.add_argument("--lang=ko-KR")
-    opts.add_argument("--disable-gpu")
-    prefs = {
-        "download.default_directory": os.path.abspath(download_dir),
-        "download.prompt_for_download": False,
-        "download.directory_upgrade": True,
-        "safebrowsing.enabled": True,
-        "plugins.always_open_pdf_externally": True,
+def store_sources() -> List[str]:
+    """weight store 의 원본 파일 (.pt / 임계값 .csv)."""
+    return bundle_sources(ensemble_weight_dir, ensemble_threshold_dir, n_ensembles)
+
+
+def rebuild_store(path: Optional[str] = None) -> None:
+    """.pt/.csv 원본으로 float32 weight store 를 다시 쓴다 (torch 필요). 원본 정보도 함께 기록."""
+    path = path or weight_store_path
+    load_models()
+    stacked = stack_ensemble(ensemble_weights, ensemble_thresholds)
+    write_store(stacked, path, sources=source_stamps(store_sources(), path))
+    print(f"[lstm_model] weight store 재생성: {stacked.n_models} models → {path}")
+
+
+def _use_store() -> bool:
+    """
+    weight store 사용 여부. store 를 만든 뒤 원본(.pt/.csv)이 바뀌었으면
+    - torch 엔진 + float32 store: 원본으로 store 를 다시 만든 뒤 사용
+    - 그 외(numpy 엔진, 축소 정밀도 store): 오래된 가중치로 추론하지 않도록 RuntimeError
+    """
+    if not os.path.exists(weight_store_path):
+        # numpy 엔진은 store 필수 → open_store 가 변환 방법을 담은 FileNotFoundError
+        return LSTM_ENGINE == "numpy"
+    stale = stale_sources(weight_store_path, store_sources())
+    if not stale:
+        return True
+    changed = ", ".join(stale[:3]) + (f" 외 {len(stale) - 3}개" if len(stale) > 3 else "")
+    precision = read_index(weight_store_path).get("dtype", "float32")
+    if LSTM_ENGINE == "numpy" or precision != "float32":
+        hint = (
+            "tools.lstm_model.quantize_weights" if precision != "float32" else "tools.lstm_model.export_weights"
+        )
+        raise RuntimeError(
+            f"{weight_store_path} 가 원본보다 오래됨 ({changed}): 'python -m {hint}' 로 다시 변환 필요"
+        )
+    print(f"[lstm_model] weight store 가 원본보다 오래됨 ({changed})")
+    rebuild_store()
+    return True
+
+
+_fingerprint_memo: tuple = ((), "")
+
+
+def scoring_fingerprint() -> str:
+    """
+    결과 캐시 key 용 채점 설정 지문 (sha1 앞 12자리):
+    엔진, student/세트/조기 종료 설정 + 가중치 원본(.pt/.csv)·weight store·student 파일 내용 sha1.
+    파일 내용 sha1 은 파일 크기/mtime 이 바뀔 때만 다시 계산한다.
+    """
+    global _fingerprint_memo
+    files = store_sources() + [weight_store_path] + ([student_path] if LSTM_STUDENT else [])
+    stats = []
+    for f in files:
+        try:
+            st = os.stat(f)
+        except FileNotFoundError:
+            continue
+        stats.append((f, st.st_size, st.st_mtime_ns))
+    stats = tuple(stats)
+    memo_stats, fp = _fingerprint_memo
+    if stats == memo_stats and fp:
+        return fp
+    stamps = source_stamps([f for f, _, _ in stats], weight_store_path)
+    config = {
+        "engine": LSTM_ENGINE,
+        "student": [LSTM_STUDENT, student_cutoffs, student_margin] if LSTM_STUDENT else False,
+        "sets": active_set_ids,
+        "set_budget_mb": set_budget_mb,
+        "early_exit": [band_cutoffs, early_exit_delta],
+        "files": {rel: rec["sha1"] for rel, rec in stamps.items()},
     }
-    opts.add_experimental_option("prefs", prefs)
-    return opts
-
-
-def _wait_download_csv(download_dir: str, start_ts: float, timeout: int = 60) -> str:
-    deadline = time.time() + timeout
-    last_seen_csv: Optional[str] = None
-    while time.time() < deadline:
-        csv_candidates = []
-        for path in glob.glob(os.path.join(download_dir, "*.csv")):
-            try:
-                if os.path.getmtime(path) >= start_ts:
-                    csv_candidates.append(path)
-            except FileNotFoundError:
-                pass
-
-        if csv_candidates:
-            latest = max(csv_candidates, key=os.path.getmtime)
-            cr_path = latest + ".crdownload"
-            if not os.path.exists(cr_path):
-                return latest
-            last_seen_csv = latest
-        time.sleep(0.5)
+    fp = hashlib.sha1(json.dumps(config, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+    _fingerprint_memo = (stats, fp)
+    return fp
 
-    raise TimeoutException(
-        f"CSV 파일 다운로드 대기 시간 초과 (마지막 감지: {last_seen_csv or '없음'})"
-    )
+
+def get_engine():
+    """
+    전 세트 가중치를 한 번만 쌓아 만든 배치 추론 엔진(싱글톤).
+    - weight store 가 있으면 read-only mmap 으로 연다 (unpickle 없음, 워커 간 page cache 공유).
+      원본(.pt/.csv)이 store 이후 바뀌었으면 다시 만들거나 실패한다 (_use_store).
+    - 없으면 torch 엔진에 한해 기존 .pt/.csv 를 로딩해 쌓는다.
+    - LSTM_ENGINE=numpy 이면 torch 를 import 하지 않는다 (store 필수).
+    """
+    global _engine
+    if _engine is not None:
+        return _engine
+    with _engine_lock:
+        if _engine is not None:
+            return _engine
+        if _use_store():
+            stacked = open_store(weight_store_path)
+        else:
+            load_models()
+            stacked = stack_ensemble(ensemble_weights, ensemble_thresholds)
+        _engine = _make_engine(stacked)
+    return _engine
+
+
+def _make_engine(stacked):
+    if LSTM_ENGINE not in ("torch", "numpy"):
+        raise ValueError(f"지원하지 않는 LSTM_ENGINE: {LSTM_ENGINE}")
+    if LSTM_ENGINE == "numpy":
+        return NumpyEnsembleEngine(stacked)
+    from .torch_engine import TorchEnsembleEngine, device
+
+    return TorchEnsembleEngine(stacked, device=device)
+
+
+def get_registry() -> SetRegistry:
+    """세트 단위 lazy 로딩 레지스트리(싱글톤). store 가 있으면 store, 없으면 세트별 .pt 에서 로딩."""
+    global _registry
+    if _registry is not None:
+        return _registry
+    with _engine_lock:
+        if _registry is None:
+            if _use_store():
+                loader = store_set_loader(weight_store_path)
+            else:
+                loader = pt_set_loader(ensemble_weight_dir, ensemble_threshold_dir)
+            _registry = SetRegistry(
+                loader,
+                _make_engine,
+                n_sets=n_ensembles,
+                sets=active_set_ids,
+                budget_bytes=int(set_budget_mb * 2**20),
+            )
+    return _registry
+
+
+def active_sets() -> List[int]:
+    """score_windows 결과 행에 대응하는 세트 인덱스(0-base)."""
+    return list(active_set_ids) if active_set_ids else list(range(n_ensembles))
+
+
+def get_student():
+    """distilled student (싱글톤, torch 미사용). 파일이 없으면 FileNotFoundError."""
+    global _student
+    if _student is not None:
+        return _student
+    with _student_lock:
+        if _student is None:
+            if not os.path.exists(student_path):
+                raise FileNotFoundError(
+                    f"{student_path} 없음: 'python -m tools.lstm_model.distill_student' 로 먼저 학습 필요"
+                )
+            _student = load_student(student_path)
+    return _student
 
 
 # ----------------------------
-# 데이터 수집(원 코드 유지: async)
+# 데이터 수집
 # ----------------------------
+def _preprocess_krx_frame(
+    df: pd.DataFrame, n_rows: Optional[int] = None, min_rows: int = window_size
+) -> pd.DataFrame:
+    """
+    KRX 개별종목 시세 CSV → 피처 10개 숫자 DataFrame.
+    - 정렬 없이 원본 순서(최신 → 과거) 유지, n_rows 가 있으면 상단 n_rows 행만 사용
+    - '일자' 컬럼이 있으면 index 로 보존 (값 계산에는 영향 없음)
+    - NaN 행 제거 후 min_rows 행 미만이면 RuntimeError (전 종목 하루치 등은 min_rows=0)
+    """
+    d = df.head(n_rows).copy() if n_rows else df.copy()
+
+    # 필요한 컬럼만 유지 (누락 체크)
+    missing = [c for c in features if c not in d.columns]
+    if missing:
+        raise RuntimeError(f"CSV에 필요한 컬럼 누락: {missing}")
+    if "일자" in d.columns:
+        d.index = d["일자"].astype(str).values
+    d = d[features].copy()
+
+    # 문자열 → 숫자 (쉼표/퍼센트 제거)
+    for c in features:
+        d[c] = (
+            d[c]
+            .astype(str)
+            .str.replace(",", "", regex=False)
+            .str.replace("%", "", regex=False)
+        )
+        d[c] = pd.to_numeric(d[c], errors="coerce")
+
+    # KRX 등락률은 항상 퍼센트 값(예: 3.2) → 행마다 소수로 (종목별 CSV / 전종목 하루치 모두 같은 척도)
+    d["등락률"] = d["등락률"] / 100.0
+
+    # NaN 제거 및 길이 확인
+    d = d.dropna()
+    if len(d) < min_rows:
+        raise RuntimeError(f"데이터가 부족합니다. 필요: {min_rows}, 현재: {len(d)}")
+    return d
+
+
 async def fetch_recent_data(stock_name: str) -> pd.DataFrame:
+    """최근 window_size(30) 거래일 피처 (최신 → 과거). 크롤링은 스레드에서 실행."""
+    raw = await asyncio.to_thread(_download_recent_csv, stock_name)
+    return _preprocess_krx_frame(raw, n_rows=window_size)
+
+
+async def fetch_history(stock_name: str) -> pd.DataFrame:
+    """내려받은 6개월 전체 피처 (최신 → 과거, index=일자)."""
+    raw = await asyncio.to_thread(_download_recent_csv, stock_name)
+    return _preprocess_krx_frame(raw)
+
+
+def _download_recent_csv(stock_name: str) -> pd.DataFrame:
+    """
+    KRX 개별종목 시세 추이 6개월 원본 (블로킹).
+    KRX_FETCH=auto 면 HTTP 클라이언트(로컬 시세 저장소가 있으면 빈 거래일만 요청), 실패 시 Selenium 다운로드로 재시도.
+    """
     if not isinstance(stock_name, str) or not stock_name.strip():
         raise ValueError("stock_name은 비어있지 않은 문자열이어야 합니다.")
 
-    base_dir = _resolve_base_download_dir()
-    stamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
-    req_dir = os.path.join(base_dir, f"req_{stamp}")
-    os.makedirs(req_dir, exist_ok=True)
+    mode = krx_fetch_mode()
+    if mode != "selenium":
+        try:
+            source = get_price_store() or get_krx_client()
+            return source.stock_prices(stock_name.strip(), months=6)
+        except KRXClientError as e:
+            if mode == "http":
+                raise
+            print(f"[lstm_model] KRX HTTP 조회 실패, Selenium 으로 재시도: {e}")
+    return _download_recent_csv_selenium(stock_name)
 
-    options = _build_chrome_options(req_dir)
-    driver = webdriver.Chrome(
-        service=Service(ChromeDriverManager().install()), options=options
-    )
-    wait = WebDriverWait(driver, 20)
 
-    try:
+def _download_recent_csv_selenium(stock_name: str) -> pd.DataFrame:
+    """KRX 개별종목 시세 추이 6개월 CSV 원본 (블로킹 Selenium)."""
+    # --- 풀에서 Chrome 세션 대여 (반납 시 상태 초기화)
+    with get_driver_pool().driver() as driver:
+        wait = WebDriverWait(driver, 20)
+
         driver.get(
             "http://data.krx.co.kr/contents/MDC/MDI/mdiLoader/index.cmd?menuId=MDC0201"
         )
@@ -188,68 +373,8 @@ async def fetch_recent_data(stock_name: str) -> pd.DataFrame:
         ).click()
         time.sleep(0.8)
 
-        wait.until(
-            EC.element_to_be_clickable((By.ID, "btnisuCd_finder_stkisu0_0"))
-        ).click()
-        search_input = wait.until(
-            EC.presence_of_element_located((By.ID, "searchText__finder_stkisu0_0"))
-        )
-        search_input.clear()
-        search_input.send_keys(stock_name)
-        time.sleep(2.5)
-
-        wait.until(
-            EC.element_to_be_clickable((By.ID, "searchBtn__finder_stkisu0_0"))
-        ).click()
-        time.sleep(2.5)
-
-        # 9) 결과 테이블 첫 번째 행 클릭 (stale 방어 버전)
-        grid_selector = "#jsGrid__finder_stkisu0_0 tbody tr.jsRow"
-        grid_locator = (By.CSS_SELECTOR, grid_selector)
-
-        # 결과가 나타날 때까지 대기 (한 개 이상)
-        wait.until(lambda d: len(d.find_elements(*grid_locator)) > 0)
-
-        # JS 클릭 헬퍼: WebElement 참조 없이 한 번에 처리 → stale 확률 낮음
-        def _js_click_first_row():
-            return driver.execute_script(
-                """
-                const el = document.querySelector(arguments[0]);
-                if (!el) return false;
-                el.scrollIntoView({block:'center'});
-                el.click();
-                return true;
-                """,
-                grid_selector,
-            )
-
-        clicked = False
-        # 최대 5회 재시도 (리렌더링 대비)
-        for _ in range(5):
-            try:
-                # 시도 1: JS로 직접 클릭
-                if _js_click_first_row():
-                    clicked = True
-                    break
-                # 시도 2: 다시 찾아서 파이썬 객체로 클릭
-                rows = driver.find_elements(*grid_locator)
-                if rows:
-                    row = rows[0]
-                    driver.execute_script(
-                        "arguments[0].scrollIntoView({block:'center'});", row
-                    )
-                    # 클릭 직전 최신 참조로 다시 가져오기
-                    row = driver.find_elements(*grid_locator)[0]
-                    row.click()
-                    clicked = True
-                    break
-            except StaleElementReferenceException:
-                time.sleep(0.2)  # 잠깐 대기 후 재시도
-            except Exception:
-                time.sleep(0.2)
-
-        if not clicked:
-            raise RuntimeError("결과 첫 행 클릭 실패(요소 stale 또는 미표시)")
+        # 종목 선택: 종목코드 디렉터리로 폼을 바로 채움 (없으면 검색 팝업 → 첫 행)
+        select_issue(driver, wait, stock_name)
 
         wait.until(
             EC.element_to_be_clickable((By.CSS_SELECTOR, "button.cal-btn-range6m"))
@@ -260,62 +385,34 @@ async def fetch_recent_data(stock_name: str) -> pd.DataFrame:
         wait.until(
             EC.element_to_be_clickable((By.CSS_SELECTOR, "button.CI-MDI-UNIT-DOWNLOAD"))
         ).click()
-        start_ts = time.time()
-        wait.until(
-            EC.element_to_be_clickable((By.CSS_SELECTOR, 'div[data-type="csv"] a'))
-        ).click()
-
-        latest_csv = _wait_download_csv(req_dir, start_ts=start_ts, timeout=90)
-        df = pd.read_csv(latest_csv, encoding="euc-kr")
-
-        # --- 전처리: 정렬 없이 상단 30행 그대로 (최신 → 과거) ---
-        d = df.head(window_size).copy()  # window_size=30
-
-        # 필요한 컬럼만 유지 (누락 체크)
-        need_cols = [c for c in features if c in d.columns]
-        missing = [c for c in features if c not in d.columns]
-        if missing:
-            raise RuntimeError(f"CSV에 필요한 컬럼 누락: {missing}")
-        d = d[need_cols].copy()
-
-        # 문자열 → 숫자 (쉼표/퍼센트 제거)
-        for c in need_cols:
-            d[c] = (
-                d[c]
-                .astype(str)
-                .str.replace(",", "", regex=False)
-                .str.replace("%", "", regex=False)
-            )
-            d[c] = pd.to_numeric(d[c], errors="coerce")
-
-        # 등락률이 퍼센트 값(예: 3.2)이면 소수로 보정
-        if "등락률" in need_cols and d["등락률"].abs().max() > 1.5:
-            d["등락률"] = d["등락률"] / 100.0
-
-        # NaN 제거 및 길이 확인
-        d = d.dropna()
-        if len(d) < window_size:
-            raise RuntimeError(
-                f"데이터가 부족합니다. 필요: {window_size}, 현재: {len(d)}"
-            )
-
-        return d
-
-    finally:
-        try:
-            driver.quit()
-        except Exception:
-            pass
+        # CSV 응답 본문을 DevTools 로 바로 받음 (파일 저장/폴더 polling 없음)
+        with DownloadCapture(driver, url_hint="download.cmd") as cap:
+            wait.until(
+                EC.element_to_be_clickable((By.CSS_SELECTOR, 'div[data-type="csv"] a'))
+            ).click()
+            body = cap.wait(timeout=90)
+        return pd.read_csv(io.BytesIO(body), encoding="euc-kr")
 
 
 # ----------------------------
-# 추론(원 코드 유지: async)
+# 추론
 # ----------------------------
-async def infer_with_ensemble_set(df_input: pd.DataFrame, set_idx: int) -> float:
+def _scale_last_window(df_input: pd.DataFrame) -> np.ndarray:
+    """입력 전체로 MinMax fit → 마지막 window_size 행을 (1, T, F) float32 로 반환."""
     scaler = MinMaxScaler()
     scaled_data = scaler.fit_transform(df_input.values)
     sequence = scaled_data[-window_size:]
-    sequence = sequence.reshape(1, window_size, len(features))
+    return sequence.reshape(1, window_size, len(features)).astype(np.float32)
+
+
+async def infer_with_ensemble_set(df_input: pd.DataFrame, set_idx: int) -> float:
+    """세트 하나를 모델별로 순차 추론하는 기존(참조) 구현. (torch 필요)"""
+    import torch
+
+    from .torch_engine import LSTMAutoEncoder, device
+
+    load_models()
+    sequence = _scale_last_window(df_input)
     input_tensor = torch.tensor(sequence, dtype=torch.float32).to(device)
 
     weights_dict = ensemble_weights[set_idx]
@@ -341,24 +438,228 @@ async def infer_with_ensemble_set(df_input: pd.DataFrame, set_idx: int) -> float
     return num_anomalies / num_total if num_total > 0 else 0
 
 
+def sliding_scaled_windows(values: np.ndarray, size: int = window_size) -> np.ndarray:
+    """
+    (N, F) → 윈도우별 MinMax 스케일링된 (N - size + 1, size, F) float32.
+    윈도우는 복사 없는 strided view 로 만들고, 스케일링만 한 번에 벡터화해 계산한다.
+    각 윈도우 결과는 그 윈도우 행만으로 _scale_last_window 를 적용한 것과 같다.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    views = np.lib.stride_tricks.sliding_window_view(values, size, axis=0)  # (W, F, size)
+    views = views.transpose(0, 2, 1)  # (W, size, F), 여전히 view
+    lo = views.min(axis=1, keepdims=True)
+    rng = views.max(axis=1, keepdims=True) - lo
+    rng[rng == 0] = 1.0  # sklearn MinMaxScaler 와 동일한 상수 컬럼 처리
+    return ((views - lo) / rng).astype(np.float32)
+
+
+def score_windows(windows: np.ndarray) -> np.ndarray:
+    """
+    (B, T, F) 윈도우 → 세트별 이상 비율 (S, B).
+    executor 워커에서 실행되는 진입점 (process 모드에서는 워커 프로세스마다 엔진 1개).
+    LSTM_SET_BUDGET_MB / LSTM_SETS 가 설정되면 세트 레지스트리로 계산한다 (행 = active_sets()).
+    """
+    if USE_SET_REGISTRY:
+        return get_registry().set_ratios(windows)
+    return get_engine().set_ratios(windows)
+
+
+def score_ratios(windows: np.ndarray):
+    """
+    (B, T, F) 윈도우 → (anomaly_ratio (B,), 앙상블로 계산했는지 여부 (B,)).
+    LSTM_STUDENT 가 꺼져 있으면 전부 앙상블, 켜져 있으면 student 점수 중 borderline 만 앙상블로 재계산.
+    """
+    if not LSTM_STUDENT:
+        return score_windows(windows).mean(axis=0) * 0.5, np.ones(len(windows), dtype=bool)
+
+    student = get_student()
+    ratios = student.predict(windows).astype(np.float64)
+    fallback = student.borderline(ratios, student_cutoffs, student_margin)
+    if fallback.any():
+        ratios[fallback] = score_windows(windows[fallback]).mean(axis=0) * 0.5
+    return ratios, fallback
+
+
+def _count_scored(fallback: np.ndarray) -> None:
+    if LSTM_STUDENT:
+        _student_counts["windows"] += int(fallback.size)
+        _student_counts["fallbacks"] += int(fallback.sum())
+
+
+def inference_stats() -> dict:
+    """추론 executor 대기열/처리량 메트릭 + 엔진 정보."""
+    return {
+        "engine": LSTM_ENGINE,
+        "engine_loaded": _engine is not None,
+        "student": {
+            "enabled": LSTM_STUDENT,
+            "loaded": _student is not None,
+            "cutoffs": student_cutoffs,
+            **_student_counts,
+        },
+        "executor": _executor.stats(),
+        "cache": _cache.stats() if _cache is not None else None,
+        "registry": _registry.stats() if _registry is not None else None,
+    }
+
+
+def warm_up() -> dict:
+    """
+    설정된 추론 경로(엔진/레지스트리/student)를 로딩하고 더미 윈도우로 한 번 forward 해
+    첫 요청이 가중치 로딩/커널 초기화 비용을 치르지 않게 한다. executor 워커에서 실행된다.
+    """
+    t0 = time.perf_counter()
+    if LSTM_STUDENT:
+        get_student()
+    if USE_SET_REGISTRY:
+        get_registry()
+    else:
+        get_engine()
+    t_load = time.perf_counter() - t0
+
+    dummy = np.zeros((1, window_size, len(features)), dtype=np.float32)
+    score_ratios(dummy)
+    if LSTM_EARLY_EXIT:
+        _early_exit_ratio(dummy)
+    return {
+        "pid": os.getpid(),
+        "load_ms": round(t_load * 1000, 2),
+        "first_forward_ms": round((time.perf_counter() - t0 - t_load) * 1000, 2),
+    }
+
+
+def _init_worker() -> None:
+    """process executor 워커 initializer: 첫 작업을 받기 전에 warm_up (실패해도 풀은 유지, 요청에서 다시 시도)."""
+    try:
+        warm_up()
+    except Exception as e:
+        print(f"[lstm_model] worker {os.getpid()} warm-up 실패: {type(e).__name__}: {e}")
+
+
+# process 모드: 워커 프로세스는 (나중에 새로 뜨는 워커도) 시작할 때 엔진을 로딩한 뒤 작업을 받는다
+_executor.initializer = _init_worker
+# 결과 캐시 key 에 채점 설정/가중치 번들 지문 포함 (설정이 다른 워커끼리 디스크 계층 공유 방지)
+if _cache is not None:
+    _cache.fingerprint = scoring_fingerprint
+
+
+async def warm_up_async() -> dict:
+    """
+    executor 에서 warm_up 실행.
+    - thread 모드: 엔진은 프로세스 공용 싱글톤이므로 한 번이면 된다.
+    - process 모드: 워커 수만큼 작업을 동시에 넣어 풀 워커를 모두 기동한다. 워커별 로딩은
+      작업 배분과 무관하게 initializer(_init_worker)가 보장하고, 결과에는 응답한 워커만 담긴다.
+    """
+    n = _executor.max_workers if _executor.kind == "process" else 1
+    results = await asyncio.gather(*[_executor.run(warm_up) for _ in range(n)])
+    if _cache is not None:
+        # 캐시 key 지문의 파일 sha1 을 미리 계산 (첫 요청이 이벤트 루프에서 계산하지 않도록)
+        await asyncio.to_thread(scoring_fingerprint)
+    return {
+        "engine": LSTM_ENGINE,
+        "executor": _executor.kind,
+        "worker_pids": sorted({r["pid"] for r in results}),
+        "workers": results,
+    }
+
+
+def clear_result_cache(stock_name: Optional[str] = None) -> int:
+    """결과 캐시 무효화 (종목 지정 없으면 전체) → 삭제 개수."""
+    return _cache.invalidate(stock_name) if _cache is not None else 0
+
+
 # ----------------------------
 # 공개 함수 (MCP에서 호출)
 # ----------------------------
-async def predict_anomaly_async(stock_name: str) -> dict:
+async def predict_anomaly_async(stock_name: str, early_exit: Optional[bool] = None) -> dict:
     """
     원래 FastAPI 엔드포인트 로직을 함수로 제공(비동기).
+    같은 (종목, 최신 일봉 일자) 결과는 캐시에서 반환한다.
+    early_exit (None 이면 LSTM_EARLY_EXIT) 이면 band 가 정해지는 만큼의 모델만 평가한다.
     """
-    load_models()
+    if early_exit is None:
+        early_exit = LSTM_EARLY_EXIT
+    compute = _compute_anomaly_early_exit if early_exit else _compute_anomaly
+    if _cache is None:
+        return await compute(stock_name)
+    kind = "latest_ee" if early_exit else "latest"
+    return await _cache.get_or_compute(kind, stock_name, lambda: compute(stock_name))
+
+
+async def _compute_anomaly(stock_name: str) -> dict:
+    t_start = time.time()
+    df_input = await fetch_recent_data(stock_name)
+    # 전 세트/전 모델을 한 번의 배치 forward 로 평가 (executor 에서, student 사용 시 borderline 만)
+    ratios, fallback = await _executor.run(score_ratios, _scale_last_window(df_input))
+    _count_scored(fallback)
+    avg_anomaly_ratio = float(ratios[0])
+    scorer = "ensemble" if fallback[0] else "student"
+    elapsed = time.time() - t_start
+    print(
+        f"[predict_anomaly_async] anomaly_ratio={avg_anomaly_ratio:.4f} scorer={scorer} "
+        f"elapsed={elapsed:.3f}s"
+    )
+    return {"stock": stock_name, "anomaly_ratio": round(avg_anomaly_ratio, 4), "scorer": scorer}
+
+
+def _early_exit_ratio(window: np.ndarray) -> dict:
+    """score_windows 와 같은 세트 선택(LSTM_SETS / 레지스트리 예산)으로 조기 종료 평가."""
+    engine = get_registry().set_engines() if USE_SET_REGISTRY else get_engine()
+    return sequential_ratio(engine, window, band_cutoffs, delta=early_exit_delta)
+
+
+async def _compute_anomaly_early_exit(stock_name: str) -> dict:
     t_start = time.time()
     df_input = await fetch_recent_data(stock_name)
-    tasks = [infer_with_ensemble_set(df_input, i) for i in range(n_ensembles)]
-    results = await asyncio.gather(*tasks)
-    avg_anomaly_ratio = float(np.mean(results)) * 0.5
+    # 세트별로 모델 부분집합만 평가 (레지스트리 사용 시 LSTM_SETS 세트만)
+    result = await _executor.run(_early_exit_ratio, _scale_last_window(df_input))
     elapsed = time.time() - t_start
     print(
-        f"[predict_anomaly_async] anomaly_ratio={avg_anomaly_ratio:.4f} elapsed={elapsed:.3f}s"
+        f"[predict_anomaly_async] anomaly_ratio={result['anomaly_ratio']:.4f} band={result['band']} "
+        f"models={result['models_evaluated']}/{result['models_total']} elapsed={elapsed:.3f}s"
     )
-    return {"stock": stock_name, "anomaly_ratio": round(avg_anomaly_ratio, 4)}
+    return {"stock": stock_name, "scorer": "early_exit", **result}
+
+
+async def predict_anomaly_series_async(stock_name: str) -> dict:
+    """
+    내려받은 기간의 모든 30일 윈도우에 대해 anomaly_ratio 를 계산 (재크롤링 없음).
+    각 점의 값은 해당 일자를 마지막 날로 하는 윈도우로 predict_anomaly_async 를 돌린 값과 같다.
+    """
+    if _cache is None:
+        return await _compute_anomaly_series(stock_name)
+    return await _cache.get_or_compute(
+        "series", stock_name, lambda: _compute_anomaly_series(stock_name)
+    )
+
+
+async def _compute_anomaly_series(stock_name: str) -> dict:
+    t_start = time.time()
+    hist = await fetch_history(stock_name)
+    # 원본은 최신 → 과거 순: i 번째 윈도우 = i 행(기준일)부터 과거 30행
+    windows = sliding_scaled_windows(hist.values)
+    ratios, fallback = await _executor.run(score_ratios, windows)  # (W,), (W,)
+    _count_scored(fallback)
+    dates = list(hist.index[: len(ratios)])
+
+    series = [
+        {"date": str(d), "anomaly_ratio": round(float(r), 4)}
+        for d, r in zip(reversed(dates), ratios[::-1])
+    ]  # 과거 → 최신
+    peak = max(series, key=lambda x: x["anomaly_ratio"])
+    elapsed = time.time() - t_start
+    print(
+        f"[predict_anomaly_series_async] windows={len(series)} elapsed={elapsed:.3f}s"
+    )
+    return {
+        "stock": stock_name,
+        "window_size": window_size,
+        "scorer": "student" if LSTM_STUDENT else "ensemble",
+        "ensemble_windows": int(fallback.sum()),
+        "latest": series[-1],
+        "peak": peak,
+        "series": series,
+    }
 
 
 def predict_anomaly(stock_name: str) -> dict:
@@ -385,5 +686,14 @@ def predict_anomaly(stock_name: str) -> dict:
 __all__ = [
     "predict_anomaly",  # 동기
     "predict_anomaly_async",  # 비동기
+    "predict_anomaly_series_async",  # 비동기, 기간 전체
     "load_models",  # 필요 시 수동 호출
+    "get_engine",
+    "get_registry",
+    "get_student",
+    "score_windows",
+    "score_ratios",
+    "inference_stats",
+    "clear_result_cache",
+    "warm_up_async",
 ]
@@ -1,7 +1,18 @@
+import asyncio
+from typing import Optional
+
 from fastmcp import FastMCP
+from starlette.requests import Request
+from starlette.responses import JSONResponse
 
 # 동기 predict_anomaly 말고, 비동기 버전 임포트
-from .lstm_model_service import predict_anomaly_async
+from .lstm_model_service import (
+    inference_stats,
+    predict_anomaly_async,
+    predict_anomaly_series_async,
+)
+from .market_scan import read_scan
+from .watchlist import get_watchlist
 
 
 def register(mcp: FastMCP) -> None:
@@ -16,20 +27,116 @@ def register(mcp: FastMCP) -> None:
             "종목명을 입력하면 KRX에서 최근 1개월 시세를 수집하고, "
             "LSTM AutoEncoder 앙상블(10세트)로 이상치 비율을 계산해 반환합니다. "
             "입력 예: {'stock_name': '삼성전자'}  |  "
-            "출력 예: {'stock': '삼성전자', 'anomaly_ratio': 0.1234}"
+            "출력 예: {'stock': '삼성전자', 'anomaly_ratio': 0.1234, 'scorer': 'ensemble'} "
+            "(scorer: 'student' 면 distilled student 근사값, 'ensemble' 이면 전체 앙상블 계산값). "
+            "early_exit=true 면 LOW/MODERATE/ELEVATED band 가 확정될 때까지만 모델을 평가하고 "
+            "band, bound(신뢰구간), models_evaluated 를 함께 반환합니다 (scorer: 'early_exit')."
         ),
     )
-    async def predict_lstm_anomaly_tool(stock_name: str) -> dict:
+    async def predict_lstm_anomaly_tool(stock_name: str, early_exit: Optional[bool] = None) -> dict:
         """
         Args:
             stock_name (str): 조회할 종목명(정확한 한글 종목명 권장)
+            early_exit (bool, optional): 순차 조기 종료 평가 사용 여부 (미지정 시 LSTM_EARLY_EXIT)
         Returns:
-            dict: {'stock': str, 'anomaly_ratio': float}
+            dict: {'stock': str, 'anomaly_ratio': float, 'scorer': str, ...}
         """
         if not isinstance(stock_name, str) or not stock_name.strip():
             raise ValueError("stock_name은 비어있지 않은 문자열이어야 합니다.")
         try:
             # ✅ 이벤트 루프 위에서 안전: 비동기 함수 직접 await
-            return await predict_anomaly_async(stock_name.strip())
+            return await predict_anomaly_async(stock_name.strip(), early_exit=early_exit)
         except Exception as e:
             raise RuntimeError(f"LSTM 이상탐지 수행 실패: {e}")
+
+    @mcp.tool(
+        name="predict_lstm_anomaly_series",
+        description=(
+            "종목명을 입력하면 KRX에서 최근 6개월 시세를 한 번 수집하고, "
+            "그 기간의 모든 30거래일 윈도우에 대해 LSTM AutoEncoder 앙상블 이상치 비율을 계산해 "
+            "일자별 시계열로 반환합니다 (이상 징후가 언제 시작됐는지 확인용). "
+            "입력 예: {'stock_name': '삼성전자'}  |  "
+            "출력 예: {'stock': '삼성전자', 'latest': {...}, 'peak': {...}, "
+            "'series': [{'date': '2025/07/01', 'anomaly_ratio': 0.12}, ...]}"
+        ),
+    )
+    async def predict_lstm_anomaly_series_tool(stock_name: str) -> dict:
+        """
+        Args:
+            stock_name (str): 조회할 종목명(정확한 한글 종목명 권장)
+        Returns:
+            dict: {'stock', 'window_size', 'latest', 'peak', 'series': [{'date', 'anomaly_ratio'}]}
+        """
+        if not isinstance(stock_name, str) or not stock_name.strip():
+            raise ValueError("stock_name은 비어있지 않은 문자열이어야 합니다.")
+        try:
+            return await predict_anomaly_series_async(stock_name.strip())
+        except Exception as e:
+            raise RuntimeError(f"LSTM 이상탐지 시계열 계산 실패: {e}")
+
+    @mcp.tool(
+        name="lstm_inference_stats",
+        description=(
+            "LSTM 이상탐지 추론 executor 상태(대기열 깊이, 실행 중 작업 수, 평균 대기/실행 시간)를 반환합니다. "
+            "출력 예: {'engine': 'torch', 'executor': {'queued': 0, 'in_flight': 1, ...}}"
+        ),
+    )
+    def lstm_inference_stats_tool() -> dict:
+        return inference_stats()
+
+    @mcp.tool(
+        name="lstm_market_scan",
+        description=(
+            "야간 전 종목 스캔(market_scan) 결과에서 LSTM AutoEncoder 이상치 비율 상위 종목을 반환합니다 "
+            "(크롤링/추론 없이 즉시 조회). stock_name 을 주면 해당 종목 행만, market 으로 'KOSPI'/'KOSDAQ' 필터. "
+            "입력 예: {'top_n': 10, 'market': 'KOSPI'}  |  "
+            "출력 예: {'as_of': '2025-08-14', 'total': 2650, 'items': [{'rank': 1, '종목명': '...', "
+            "'anomaly_ratio': 0.48, 'set1': 0.9, ...}]}"
+        ),
+    )
+    async def lstm_market_scan_tool(
+        top_n: int = 20, market: Optional[str] = None, stock_name: Optional[str] = None
+    ) -> dict:
+        try:
+            return read_scan(top_n=top_n, market=market, stock_name=stock_name)
+        except Exception as e:
+            raise RuntimeError(f"전 종목 스캔 결과 조회 실패: {e}")
+
+    @mcp.custom_route("/lstm/market-scan", methods=["GET"])
+    async def lstm_market_scan_http(request: Request) -> JSONResponse:
+        """front-end (DailyMovers 등) 용 HTTP 조회: ?top_n=20&market=KOSPI&stock_name=..."""
+        q = request.query_params
+        try:
+            top_n = int(q.get("top_n", 20))
+        except ValueError:
+            return JSONResponse({"error": f"top_n 은 정수여야 합니다: {q.get('top_n')!r}"}, status_code=400)
+        try:
+            return JSONResponse(
+                await asyncio.to_thread(
+                    read_scan,
+                    top_n=top_n,
+                    market=q.get("market"),
+                    stock_name=q.get("stock_name"),
+                )
+            )
+        except FileNotFoundError as e:
+            return JSONResponse({"error": str(e)}, status_code=404)
+
+    @mcp.tool(
+        name="lstm_watchlist_feed",
+        description=(
+            "관심 종목(watchlist) 증분 이상탐지 feed 를 반환합니다. 새 일봉이 들어올 때마다 "
+            "종목별 최신 30거래일 윈도우로 계산된 일별 anomaly_ratio 와 alert 여부가 누적됩니다. "
+            "입력 예: {'stock_name': '삼성전자', 'since': '2025-08-01', 'alerts_only': false}  |  "
+            "출력 예: {'watchlist': [{'stock': '삼성전자', 'last_date': '2025-08-14', ...}], "
+            "'feed': [{'date': '2025-08-14', 'stock': '삼성전자', 'anomaly_ratio': 0.31, 'alert': True}]}"
+        ),
+    )
+    async def lstm_watchlist_feed_tool(
+        stock_name: Optional[str] = None, since: Optional[str] = None, alerts_only: bool = False
+    ) -> dict:
+        wl = get_watchlist()
+        return {
+            "watchlist": wl.status(),
+            "feed": wl.read_feed(stock_name.strip() if stock_name else None, since, alerts_only),
+        }
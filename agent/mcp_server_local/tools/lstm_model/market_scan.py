@@ -0,0 +1,200 @@
+# market_scan.py
+"""
+전 종목 야간 이상탐지 스캔 (배치) + 결과 조회.
+
+사용법 (agent/mcp_server_local 에서, 예: 매일 장 마감 후 ingest_market 다음에 cron):
+    python -m tools.lstm_model.market_scan [--workers 4]
+    python -m tools.lstm_model.market_scan --data all_kospi_data.parquet   # 파일 입력으로 대신
+
+- 입력 (기본): 로컬 시세 저장소(price_store, tools.krx.ingest_market 가 매일 채움)의 최근 30거래일 전종목 시세
+- --data / LSTM_MARKET_DATA: 전 종목 일별 시세 파일 (krx_dataset_merge.py 의 parquet 또는 같은 컬럼의 CSV)
+          날짜/일자, 종목명 (+ 종목코드, 시장구분) + 피처 10개
+- 종목마다 최신 30거래일 윈도우를 만들어 (predict_lstm_anomaly 와 같은 스케일링)
+  프로세스 풀(BoundedExecutor "process")로 나눠 앙상블 점수를 계산한다.
+- 결과는 anomaly_ratio 내림차순 순위표 CSV (세트별 비율 포함) 로
+  LSTM_SCAN_DIR/market_scan_YYYYMMDD.csv 에 저장되고, MCP 툴/HTTP 엔드포인트가 최신 파일을 읽는다.
+"""
+import argparse
+import asyncio
+import glob
+import json
+import os
+import time
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ..krx.price_store import get_store as get_price_store
+from . import lstm_model_service as svc
+from .executor import BoundedExecutor
+
+scan_dir = os.environ.get("LSTM_SCAN_DIR") or os.path.join(svc.BASE_DIR, "scans")
+market_data_path = os.environ.get("LSTM_MARKET_DATA", "")
+
+
+# ----------------------------
+# 입력 윈도우
+# ----------------------------
+def _read_market(path: Optional[str]) -> pd.DataFrame:
+    """전 종목 시세. path 가 없으면 시세 저장소의 최근 window_size 거래일."""
+    if not path:
+        store = get_price_store()
+        if store is None:
+            raise ValueError("KRX_PRICE_STORE=0: --data 또는 LSTM_MARKET_DATA 로 입력 파일 지정 필요")
+        return store.market_history(svc.window_size)
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path)
+    try:
+        return pd.read_csv(path, encoding="utf-8-sig")
+    except UnicodeDecodeError:
+        return pd.read_csv(path, encoding="cp949")
+
+
+def latest_windows(df: pd.DataFrame) -> Tuple[pd.DataFrame, np.ndarray]:
+    """
+    전 종목 시세 → (종목 정보 DataFrame, 스케일링된 최신 윈도우 (N, T, F)).
+    최신 거래일(as_of)에 시세가 없거나(거래정지/상장폐지) 30행이 안 되는 종목은 제외한다.
+    """
+    date_col = "날짜" if "날짜" in df.columns else "일자"
+    d = df.copy()
+    d["종목명"] = d["종목명"].astype(str).str.strip()
+    d[date_col] = pd.to_datetime(d[date_col].astype(str))
+    d = d.sort_values(date_col, ascending=False, kind="stable").reset_index(drop=True)
+    as_of = d[date_col].max()
+
+    # 종목별 최신 → 과거 window_size 행만 숫자 변환
+    recent = d.groupby("종목명", sort=False).head(svc.window_size)
+    # NaN 행은 제거되므로 원래 index 로 되돌려 해당 종목을 아래에서 제외
+    feats = svc._preprocess_krx_frame(recent.drop(columns="일자", errors="ignore"), min_rows=0)
+    feats = feats.reindex(recent.index)
+
+    info, windows = [], []
+    for name, idx in recent.groupby("종목명", sort=False).groups.items():
+        g = recent.loc[idx]
+        if len(g) < svc.window_size or g[date_col].iloc[0] != as_of:
+            continue
+        values = feats.loc[idx].values
+        if np.isnan(values).any():
+            continue
+        windows.append(svc.sliding_scaled_windows(values)[0])
+        info.append(
+            {
+                "종목명": name,
+                "종목코드": str(g["종목코드"].iloc[0]) if "종목코드" in g else "",
+                "시장구분": str(g["시장구분"].iloc[0]) if "시장구분" in g else "",
+                "기준일": as_of.strftime("%Y-%m-%d"),
+                "등락률": float(values[0, svc.features.index("등락률")]),
+            }
+        )
+    if not windows:
+        raise ValueError(f"{as_of:%Y-%m-%d} 기준 {svc.window_size}거래일 이상인 종목이 없음")
+    return pd.DataFrame(info), np.stack(windows)
+
+
+# ----------------------------
+# 스캔
+# ----------------------------
+async def _score_all(windows: np.ndarray, workers: int, chunk: int) -> np.ndarray:
+    """윈도우를 chunk 단위로 나눠 프로세스 풀에서 점수 계산 → 세트별 비율 (S, N)."""
+    pool = BoundedExecutor(kind="process", max_workers=workers, name="market-scan")
+    try:
+        parts = await asyncio.gather(
+            *[
+                pool.run(svc.score_windows, windows[i : i + chunk])
+                for i in range(0, len(windows), chunk)
+            ]
+        )
+    finally:
+        pool.shutdown()
+    return np.concatenate(parts, axis=1)
+
+
+def run_scan(
+    data_path: Optional[str] = None,
+    out_dir: str = scan_dir,
+    workers: Optional[int] = None,
+    chunk: int = 256,
+) -> dict:
+    t_start = time.time()
+    workers = workers or os.cpu_count() or 1
+    info, windows = latest_windows(_read_market(data_path))
+
+    chunk = max(1, min(chunk, -(-len(windows) // workers)))
+    set_ratios = asyncio.run(_score_all(windows, workers, chunk))
+
+    table = info.copy()
+    table["anomaly_ratio"] = (set_ratios.mean(axis=0) * 0.5).round(4)
+    for row, set_idx in enumerate(svc.active_sets()):
+        table[f"set{set_idx + 1}"] = set_ratios[row].round(4)
+    table = table.sort_values("anomaly_ratio", ascending=False, kind="stable")
+    table.insert(0, "rank", np.arange(1, len(table) + 1))
+
+    as_of = table["기준일"].iloc[0].replace("-", "")
+    os.makedirs(out_dir, exist_ok=True)
+    out_csv = os.path.join(out_dir, f"market_scan_{as_of}.csv")
+    tmp = f"{out_csv}.tmp{os.getpid()}"
+    table.to_csv(tmp, index=False, encoding="utf-8-sig")
+    os.replace(tmp, out_csv)
+
+    meta = {
+        "as_of": table["기준일"].iloc[0],
+        "stocks": int(len(table)),
+        "workers": workers,
+        "engine": svc.LSTM_ENGINE,
+        "elapsed_sec": round(time.time() - t_start, 2),
+        "out": out_csv,
+    }
+    with open(out_csv.replace(".csv", ".json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    print(f"[market_scan] {meta['stocks']} stocks as of {meta['as_of']} → {out_csv} ({meta['elapsed_sec']}s)")
+    return meta
+
+
+# ----------------------------
+# 조회 (MCP/HTTP)
+# ----------------------------
+def latest_scan_path(out_dir: str = scan_dir) -> Optional[str]:
+    files = sorted(glob.glob(os.path.join(out_dir, "market_scan_*.csv")))
+    return files[-1] if files else None
+
+
+def read_scan(
+    top_n: int = 20,
+    market: Optional[str] = None,
+    stock_name: Optional[str] = None,
+    out_dir: str = scan_dir,
+) -> dict:
+    """최신 스캔 결과에서 상위 top_n (시장 필터) 또는 특정 종목 행을 반환."""
+    path = latest_scan_path(out_dir)
+    if path is None:
+        raise FileNotFoundError(
+            f"{out_dir} 에 스캔 결과 없음: 'python -m tools.lstm_model.market_scan' 로 먼저 실행 필요"
+        )
+    table = pd.read_csv(path, encoding="utf-8-sig", dtype={"종목코드": str})
+    table["종목코드"] = table["종목코드"].fillna("")
+    table["시장구분"] = table["시장구분"].fillna("")
+    total = len(table)
+    if stock_name:
+        table = table[table["종목명"] == stock_name.strip()]
+    else:
+        if market:
+            table = table[table["시장구분"].str.upper() == market.strip().upper()]
+        table = table.head(max(1, int(top_n)))
+    return {
+        "as_of": str(table["기준일"].iloc[0]) if len(table) else None,
+        "total": total,
+        "items": table.to_dict(orient="records"),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="전 종목 LSTM-AE 이상탐지 스캔")
+    parser.add_argument(
+        "--data", default=market_data_path or None, help="전 종목 시세 parquet/csv (기본: 로컬 시세 저장소)"
+    )
+    parser.add_argument("--out-dir", default=scan_dir)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk", type=int, default=256)
+    args = parser.parse_args()
+    print(json.dumps(run_scan(args.data, args.out_dir, args.workers, args.chunk), ensure_ascii=False, indent=2))
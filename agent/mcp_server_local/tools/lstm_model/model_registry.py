@@ -0,0 +1,194 @@
+# model_registry.py
+"""
+세트 단위 lazy 로딩 + LRU 제거 + 메모리 예산 모델 레지스트리.
+
+load_models()/get_engine() 은 10세트 전부를 한 번에 올려 계속 들고 있지만,
+레지스트리는 세트가 처음 필요할 때 그 세트만 로딩해 엔진을 만들고, 상주 크기 합이
+budget_bytes 를 넘으면 가장 오래 사용하지 않은 세트부터 내린다.
+
+    LSTM_SET_BUDGET_MB : 세트 엔진 상주 메모리 예산 (0/미설정 = 무제한)
+    LSTM_SETS          : 사용할 세트 번호(1-base) 목록, 예 "1,2,3" (미설정 = 전체)
+둘 중 하나라도 설정하면 서비스가 이 레지스트리로 추론한다 (소형 sidecar 배포용).
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .ensemble_engine import StackedEnsemble, stack_ensemble
+from .weight_store import open_store
+
+
+def stacked_nbytes(stacked: StackedEnsemble, engine: Any = None) -> int:
+    """
+    세트 상주 크기 (바이트): 세트 파라미터(+ int8 scale) + 엔진이 계산용으로 들고 있는 배열.
+    엔진이 float32 복원본을 따로 들고 있으면(int8 store, numpy 엔진의 bf16/f16 store) 둘 다 센다.
+    같은 메모리를 가리키는 배열(float32 그대로 공유, bf16 view 등)은 한 번만 센다.
+    """
+    arrays = [*stacked.params.values(), *stacked.scales.values()]
+    if engine is not None:
+        arrays += engine.param_arrays()
+    buffers: Dict[int, int] = {}
+    for a in arrays:
+        if isinstance(a, np.ndarray):
+            ptr, n = a.__array_interface__["data"][0], a.nbytes
+        else:  # torch.Tensor
+            ptr, n = a.data_ptr(), a.element_size() * a.nelement()
+        buffers[ptr] = max(buffers.get(ptr, 0), n)
+    return int(sum(buffers.values()))
+
+
+# ----------------------------
+# 세트 로더
+# ----------------------------
+def pt_set_loader(weight_dir: str, threshold_dir: str) -> Callable[[int], StackedEnsemble]:
+    """ensemble_weights_set{i}.pt / ensemble_thresholds_set{i}.csv 에서 세트 하나만 로딩. (torch 필요)"""
+
+    def _load(set_idx: int) -> StackedEnsemble:
+        import torch
+
+        weights_path = os.path.join(weight_dir, f"ensemble_weights_set{set_idx + 1}.pt")
+        thresh_path = os.path.join(threshold_dir, f"ensemble_thresholds_set{set_idx + 1}.csv")
+        weights = torch.load(weights_path, map_location="cpu")
+        if not isinstance(weights, dict):
+            raise ValueError(f"{weights_path} 내용이 dict(종목명→state_dict) 형식이 아님")
+        df_thresh = pd.read_csv(thresh_path)
+        if not {"종목명", "임계값"} <= set(df_thresh.columns):
+            raise ValueError(f"{thresh_path} 컬럼에 '종목명','임계값' 필요")
+        thresholds = dict(zip(df_thresh["종목명"], df_thresh["임계값"]))
+        return stack_ensemble([weights], [thresholds])
+
+    return _load
+
+
+def store_set_loader(path: str) -> Callable[[int], StackedEnsemble]:
+    """weight store(mmap) 에서 세트 하나의 행만 메모리로 복사해 로딩."""
+    state: Dict[str, StackedEnsemble] = {}
+
+    def _load(set_idx: int) -> StackedEnsemble:
+        if "store" not in state:
+            state["store"] = open_store(path)
+        full = state["store"]
+        mask = full.set_ids == set_idx
+        if not mask.any():
+            raise ValueError(f"{path}: 세트 {set_idx + 1} 에 모델이 없음")
+        return StackedEnsemble(
+            params={k: np.array(v[mask]) for k, v in full.params.items()},
+            thresholds=full.thresholds[mask],
+            set_ids=np.zeros(int(mask.sum()), dtype=np.int64),
+            names=[n for n, m in zip(full.names, mask) if m],
+            n_sets=1,
+            precision=full.precision,
+            scales={k: np.array(v[mask]) for k, v in full.scales.items()},
+        )
+
+    return _load
+
+
+# ----------------------------
+# 레지스트리
+# ----------------------------
+class SetRegistry:
+    def __init__(
+        self,
+        load_set: Callable[[int], StackedEnsemble],
+        make_engine: Callable[[StackedEnsemble], Any],
+        n_sets: int,
+        sets: Optional[Sequence[int]] = None,
+        budget_bytes: int = 0,
+    ):
+        """
+        Args:
+            load_set: 세트 인덱스(0-base) → 단일 세트 StackedEnsemble (n_sets=1)
+            make_engine: StackedEnsemble → set_ratios(windows) 를 가진 엔진
+            n_sets: 전체 세트 수
+            sets: 사용할 세트 인덱스(0-base), None 이면 전체
+            budget_bytes: 상주 크기 예산, 0 이면 무제한
+        """
+        self.load_set = load_set
+        self.make_engine = make_engine
+        self.sets = list(sets) if sets is not None else list(range(n_sets))
+        self.budget_bytes = max(0, int(budget_bytes))
+        self._resident: "OrderedDict[int, tuple]" = OrderedDict()  # set → (engine, nbytes)
+        self._lock = threading.Lock()
+
+        # 메트릭
+        self.hits = 0
+        self.loads = 0
+        self.evictions = 0
+        self.over_budget = 0
+        self._load_sec = 0.0
+
+    @property
+    def resident_bytes(self) -> int:
+        return sum(n for _, n in self._resident.values())
+
+    def get(self, set_idx: int):
+        """세트 엔진 반환 (없으면 로딩 후 예산 초과분을 LRU 순으로 제거)."""
+        with self._lock:
+            item = self._resident.get(set_idx)
+            if item is not None:
+                self.hits += 1
+                self._resident.move_to_end(set_idx)
+                return item[0]
+
+            t0 = time.perf_counter()
+            stacked = self.load_set(set_idx)
+            engine = self.make_engine(stacked)
+            nbytes = stacked_nbytes(stacked, engine)
+            self._load_sec += time.perf_counter() - t0
+            self.loads += 1
+            self._resident[set_idx] = (engine, nbytes)
+
+            if self.budget_bytes:
+                while self.resident_bytes > self.budget_bytes and len(self._resident) > 1:
+                    evicted, _ = self._resident.popitem(last=False)
+                    self.evictions += 1
+                    print(f"[model_registry] evict set{evicted + 1}")
+                if self.resident_bytes > self.budget_bytes:
+                    # 세트 하나가 예산보다 큰 경우: 그 세트만 상주시키고 기록
+                    self.over_budget += 1
+            return engine
+
+    def evict(self, set_idx: Optional[int] = None) -> int:
+        """세트(없으면 전체) 제거 → 제거 개수."""
+        with self._lock:
+            keys = list(self._resident) if set_idx is None else [set_idx]
+            n = 0
+            for k in keys:
+                if self._resident.pop(k, None) is not None:
+                    n += 1
+                    self.evictions += 1
+            return n
+
+    def set_engines(self) -> List[Tuple[Any, np.ndarray]]:
+        """사용 세트별 (엔진, 모델 인덱스) — early_exit.sequential_ratio 입력."""
+        out = []
+        for s in self.sets:
+            engine = self.get(s)
+            out.append((engine, np.arange(engine.stacked.n_models)))
+        return out
+
+    def set_ratios(self, windows: np.ndarray) -> np.ndarray:
+        """(B, T, F) → 사용 세트별 이상 비율 (len(sets), B)."""
+        return np.concatenate([self.get(s).set_ratios(windows) for s in self.sets], axis=0)
+
+    def stats(self) -> dict:
+        return {
+            "sets": [s + 1 for s in self.sets],
+            "resident_sets": [s + 1 for s in self._resident],
+            "resident_mb": round(self.resident_bytes / 2**20, 2),
+            "budget_mb": round(self.budget_bytes / 2**20, 2) if self.budget_bytes else None,
+            "hits": self.hits,
+            "loads": self.loads,
+            "evictions": self.evictions,
+            "over_budget": self.over_budget,
+            "avg_load_ms": round(self._load_sec / self.loads * 1000, 2) if self.loads else 0.0,
+        }
+
+
+__all__ = ["SetRegistry", "pt_set_loader", "store_set_loader", "stacked_nbytes"]
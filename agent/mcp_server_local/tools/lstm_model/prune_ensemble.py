@@ -0,0 +1,232 @@
+# prune_ensemble.py
+"""
+LSTM-AE 앙상블 pruning (오프라인 분석 + 축소 번들 생성).
+
+사용법 (agent/mcp_server_local 에서):
+    python -m tools.lstm_model.prune_ensemble --data all_kospi_data.parquet --out weights_pruned
+        [--tol 0.01] [--holdout 0.2] [--stride 5] [--max-windows 50000]
+
+1) 여러 종목의 히스토리(--data: krx_dataset_merge 의 KOSPI 전종목 parquet, distill_student 와 같은 입력)에서
+   종목별 30일 윈도우를 뽑아 모델별 이상 판정(M, W)을 구하고,
+   모델 간 판정 일치율로 중복(거의 같은 판정을 내리는) 모델 쌍을 집계한다.
+2) 종목의 --holdout 비율은 선택에 쓰지 않고 검증용으로 떼어 둔다 (처음 보는 종목에 대한 오차).
+3) 세트 구조를 유지한 채 greedy forward selection 으로 모델을 하나씩 추가해,
+   나머지(fit) 종목 윈도우에서 전체 앙상블 anomaly_ratio 와의 최대 차이가 --tol 이하가 되는 최소 부분집합을 찾는다.
+4) 검증 종목에서도 최대 차이가 --tol 이하일 때만 선택된 모델을 담은 번들을 기존과 같은 구조로 쓴다.
+   넘으면 번들을 쓰지 않고 종료 코드 1 (배포 거부).
+       <out>/ensemble_weights/ensemble_weights_set{i}.pt
+       <out>/ensemble_thresholds/ensemble_thresholds_set{i}.csv
+       <out>/ensemble_store.bin, <out>/prune_report.json
+   LSTM_WEIGHT_BUNDLE=<out> 으로 지정하면 load_models()/get_engine() 이 그대로 사용한다.
+   추론 비용은 남은 모델 수에 비례해 줄어든다.
+"""
+import argparse
+import json
+import os
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+from . import lstm_model_service as svc
+from .ensemble_engine import StackedEnsemble, stack_ensemble
+from .distill_student import stock_windows
+from .weight_store import bundle_sources, source_stamps, write_store
+
+
+def ensemble_ratio(flags: np.ndarray, set_ids: np.ndarray, n_sets: int) -> np.ndarray:
+    """판정(M, W) → anomaly_ratio(W). 세트별 비율 평균 × 0.5, 빈 세트는 0 (서비스와 동일)."""
+    sums = np.zeros((n_sets, flags.shape[1]))
+    np.add.at(sums, set_ids, flags)
+    counts = np.maximum(np.bincount(set_ids, minlength=n_sets), 1)[:, None]
+    return (sums / counts).mean(axis=0) * 0.5
+
+
+def redundancy_summary(flags: np.ndarray, min_agreement: float = 0.99) -> dict:
+    """모델 간 판정 일치율 요약."""
+    f = flags.astype(np.float32)
+    n_win = f.shape[1]
+    # 일치 = 둘 다 1 + 둘 다 0
+    agree = (f @ f.T + (1 - f) @ (1 - f).T) / n_win
+    iu = np.triu_indices(len(f), k=1)
+    pair_agree = agree[iu]
+    has_twin = (agree - np.eye(len(f)) >= min_agreement).any(axis=1)
+    fire_rate = f.mean(axis=1)
+    return {
+        "pairs": int(pair_agree.size),
+        "mean_pair_agreement": float(pair_agree.mean()) if pair_agree.size else 1.0,
+        f"pairs_agreement_ge_{min_agreement}": int((pair_agree >= min_agreement).sum()),
+        f"models_with_twin_ge_{min_agreement}": int(has_twin.sum()),
+        "never_fire": int((fire_rate == 0).sum()),
+        "always_fire": int((fire_rate == 1).sum()),
+    }
+
+
+def select_subset(
+    flags: np.ndarray, set_ids: np.ndarray, n_sets: int, target: np.ndarray, tol: float
+) -> List[int]:
+    """
+    greedy forward selection: 매 단계 (최대 오차, 평균 오차) 를 가장 줄이는 모델을 추가.
+    최대 오차가 tol 이하가 되면 종료하고, 마지막으로 빼도 tol 을 지키는 모델은 제거한다.
+    """
+    n_models, n_win = flags.shape
+    f = flags.astype(np.float64)
+    sums = np.zeros((n_sets, n_win))
+    counts = np.zeros(n_sets)
+    selected: List[int] = []
+    remaining = np.ones(n_models, dtype=bool)
+
+    def _err(ratio: np.ndarray) -> np.ndarray:
+        return np.abs(ratio - target)
+
+    while True:
+        set_ratio = sums / np.maximum(counts, 1)[:, None]
+        if selected and _err(set_ratio.mean(axis=0) * 0.5).max() <= tol:
+            break
+        cand = np.flatnonzero(remaining)
+        if cand.size == 0:
+            break
+        s = set_ids[cand]
+        # 후보 m 을 넣었을 때 세트 s 의 비율만 바뀐다
+        new_set = (sums[s] + f[cand]) / (counts[s] + 1)[:, None]  # (C, W)
+        total = set_ratio.sum(axis=0)[None, :] - set_ratio[s] + new_set
+        err = _err(total / n_sets * 0.5)
+        score = err.max(axis=1) + err.mean(axis=1)
+        best = int(cand[np.argmin(score)])
+        selected.append(best)
+        remaining[best] = False
+        sums[set_ids[best]] += f[best]
+        counts[set_ids[best]] += 1
+
+    # backward pass: 없어도 tol 을 지키는 모델 제거
+    for m in list(selected):
+        trial = [x for x in selected if x != m]
+        if not trial:
+            continue
+        ratio = ensemble_ratio(flags[trial], set_ids[trial], n_sets)
+        if _err(ratio).max() <= tol:
+            selected = trial
+    return sorted(selected)
+
+
+def write_bundle(out_dir: str, stacked: StackedEnsemble, keep: List[int], report: dict) -> None:
+    """선택된 모델만으로 load_models() 호환 번들(.pt/.csv) + weight store 를 쓴다."""
+    import torch
+
+    w_dir = os.path.join(out_dir, "ensemble_weights")
+    t_dir = os.path.join(out_dir, "ensemble_thresholds")
+    os.makedirs(w_dir, exist_ok=True)
+    os.makedirs(t_dir, exist_ok=True)
+
+    keep_set = set(keep)
+    weights_out = []
+    thresholds_out = []
+    for s in range(stacked.n_sets):
+        idx = [m for m in range(stacked.n_models) if stacked.set_ids[m] == s and m in keep_set]
+        names = [stacked.names[m] for m in idx]
+        weights = {n: svc.ensemble_weights[s][n] for n in names}
+        thresholds = {n: svc.ensemble_thresholds[s][n] for n in names}
+        torch.save(weights, os.path.join(w_dir, f"ensemble_weights_set{s + 1}.pt"))
+        pd.DataFrame({"종목명": names, "임계값": [thresholds[n] for n in names]}).to_csv(
+            os.path.join(t_dir, f"ensemble_thresholds_set{s + 1}.csv"),
+            index=False,
+            encoding="utf-8-sig",
+        )
+        weights_out.append(weights)
+        thresholds_out.append(thresholds)
+
+    store_path = os.path.join(out_dir, "ensemble_store.bin")
+    sources = source_stamps(bundle_sources(w_dir, t_dir, stacked.n_sets), store_path)
+    write_store(stack_ensemble(weights_out, thresholds_out), store_path, sources=sources)
+    with open(os.path.join(out_dir, "prune_report.json"), "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+def holdout_mask(groups: np.ndarray, n_stocks: int, holdout: float, seed: int = 0) -> np.ndarray:
+    """윈도우별 검증 여부 (W,). 종목 단위로 holdout 비율만큼 무작위로 떼어 둔다."""
+    n_hold = int(round(n_stocks * holdout))
+    if holdout > 0 and n_stocks - n_hold < 1:
+        raise ValueError(f"종목 {n_stocks}개로는 holdout {holdout} 을 나눌 수 없음")
+    held = np.random.default_rng(seed).permutation(n_stocks)[:n_hold]
+    return np.isin(groups, held)
+
+
+def prune(
+    out_dir: Optional[str],
+    data_path: str,
+    tol: float,
+    holdout: float,
+    stride: int = 5,
+    max_windows: int = 50_000,
+    seed: int = 0,
+) -> dict:
+    from .torch_engine import TorchEnsembleEngine
+
+    windows, groups, stocks = stock_windows(data_path, stride, max_windows, seed)
+    if len(stocks) < 2:
+        raise ValueError(f"{data_path}: 종목 1개의 윈도우로는 선택할 수 없음 (다종목 parquet 필요)")
+    svc.load_models()
+    stacked = stack_ensemble(svc.ensemble_weights, svc.ensemble_thresholds)
+    errors = TorchEnsembleEngine(stacked).reconstruction_errors(windows)
+    flags = errors > stacked.thresholds[:, None]  # (M, W)
+    full = ensemble_ratio(flags, stacked.set_ids, stacked.n_sets)
+
+    hold = holdout_mask(groups, len(stocks), holdout, seed)
+    fit = ~hold
+    keep = select_subset(flags[:, fit], stacked.set_ids, stacked.n_sets, full[fit], tol)
+
+    pruned = ensemble_ratio(flags[keep], stacked.set_ids[keep], stacked.n_sets)
+    diff = np.abs(pruned - full)
+    hold_diff = float(diff[hold].max()) if hold.any() else None
+    report = {
+        "data": os.path.basename(data_path),
+        "stocks": len(stocks),
+        "holdout_stocks": int(len(np.unique(groups[hold]))),
+        "windows": int(flags.shape[1]),
+        "holdout_windows": int(hold.sum()),
+        "tol": tol,
+        "models_before": int(stacked.n_models),
+        "models_after": len(keep),
+        "cost_ratio": round(len(keep) / stacked.n_models, 4),
+        "per_set_after": np.bincount(stacked.set_ids[keep], minlength=stacked.n_sets).tolist(),
+        "max_abs_ratio_diff_fit": float(diff[fit].max()),
+        "max_abs_ratio_diff_holdout": hold_diff,
+        "mean_abs_ratio_diff": float(diff.mean()),
+        # 검증 종목이 없으면 일반화 오차를 확인할 수 없으므로 통과로 보지 않는다
+        "passed": hold_diff is not None and hold_diff <= tol,
+        "redundancy": redundancy_summary(flags),
+        "kept": [
+            {"set": int(stacked.set_ids[m]) + 1, "name": stacked.names[m]} for m in keep
+        ],
+    }
+    if out_dir and report["passed"]:
+        write_bundle(out_dir, stacked, keep, report)
+        report["out"] = out_dir
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="LSTM-AE 앙상블 중복 모델 pruning")
+    parser.add_argument("--data", required=True, help="KOSPI 전종목 parquet (krx_dataset_merge)")
+    parser.add_argument("--out", default=None, help="축소 번들 출력 폴더 (생략 시 분석만)")
+    parser.add_argument("--tol", type=float, default=0.01, help="허용 anomaly_ratio 최대 차이")
+    parser.add_argument("--holdout", type=float, default=0.2, help="검증용 종목 비율")
+    parser.add_argument("--stride", type=int, default=5)
+    parser.add_argument("--max-windows", type=int, default=50_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    result = prune(
+        args.out,
+        args.data,
+        args.tol,
+        args.holdout,
+        stride=args.stride,
+        max_windows=args.max_windows,
+        seed=args.seed,
+    )
+    summary = {k: v for k, v in result.items() if k != "kept"}
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+    if not result["passed"]:
+        print("[prune_ensemble] 검증 종목 anomaly_ratio 차이가 --tol 초과 → 번들을 쓰지 않음")
+        raise SystemExit(1)
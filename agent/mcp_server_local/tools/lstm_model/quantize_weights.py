@@ -0,0 +1,148 @@
+# quantize_weights.py
+"""
+축소 정밀도(bfloat16 / float16 / int8) weight store 변환 + 정확도 게이트.
+
+사용법 (agent/mcp_server_local 에서):
+    python -m tools.lstm_model.quantize_weights --precision int8 [--min-agreement 0.99]
+
+- float32 기준(store 또는 .pt)과 변환본으로 model/data/anomaly_data.csv 의 모든 30일 윈도우를
+  평가해 (모델, 윈도우)별 이상 판정 일치율과 anomaly_ratio 최대 차이를 계산한다.
+- 일치율이 --min-agreement 미만이면 산출물을 쓰지 않고 종료 코드 1 로 끝난다 (배포 거부).
+- 통과한 파일은 LSTM_WEIGHT_STORE 로 지정해 사용한다.
+    bfloat16 / float16: torch 엔진이 그 정밀도로 직접 matmul (가중치 파일/page cache/상주 메모리 절반)
+    int8: 파일/page cache 크기 1/4 만 줄어든다 (두 엔진 모두 로딩 시 float32 로 복원해 계산하므로 상주 메모리는 늘어남)
+    numpy 엔진은 모든 축소 정밀도를 float32 로 복원해 계산 (파일/page cache 만 줄어든다)
+
+torch.ao 의 dynamic quantization 은 nn.LSTM/nn.Linear 모듈 단위라 배치 엔진에는 적용되지 않으므로,
+int8 은 출력 채널별 대칭 weight-only 양자화로 구현했다.
+"""
+import argparse
+import json
+import os
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from . import lstm_model_service as svc
+from .ensemble_engine import PRECISIONS, NumpyEnsembleEngine, StackedEnsemble, stack_ensemble
+from .weight_store import open_store, source_stamps, stale_sources, write_store
+
+
+def _find_anomaly_csv(max_up: int = 6) -> Optional[str]:
+    """현재 파일 기준으로 위로 올라가며 model/data/anomaly_data.csv 를 찾는다."""
+    d = os.path.abspath(os.path.dirname(__file__))
+    for _ in range(max_up):
+        d = os.path.dirname(d)
+        candidate = os.path.join(d, "model", "data", "anomaly_data.csv")
+        if os.path.exists(candidate):
+            return candidate
+    return None
+
+
+def load_eval_windows(csv_path: str) -> np.ndarray:
+    """KRX 형식 CSV(최신 → 과거) → 윈도우별 스케일링된 (W, T, F)."""
+    df = pd.read_csv(csv_path, encoding="cp949")
+    hist = svc._preprocess_krx_frame(df)
+    return svc.sliding_scaled_windows(hist.values)
+
+
+def _baseline_stacked(src: Optional[str]) -> StackedEnsemble:
+    path = src or svc.weight_store_path
+    if os.path.exists(path):
+        stale = stale_sources(path, svc.store_sources())
+        if stale:
+            raise ValueError(
+                f"{path}: 원본(.pt/.csv)보다 오래된 기준 store ({', '.join(stale[:3])}), "
+                "export_weights 로 다시 변환 필요"
+            )
+        stacked = open_store(path)
+        if stacked.precision != "float32":
+            raise ValueError(f"{path}: 기준 store 는 float32 여야 합니다 ({stacked.precision})")
+        return stacked
+    svc.load_models()
+    return stack_ensemble(svc.ensemble_weights, svc.ensemble_thresholds)
+
+
+def _make_engine(stacked: StackedEnsemble, kind: str):
+    if kind == "numpy":
+        return NumpyEnsembleEngine(stacked)
+    from .torch_engine import TorchEnsembleEngine
+
+    return TorchEnsembleEngine(stacked)
+
+
+def compare(base: StackedEnsemble, variant: StackedEnsemble, windows: np.ndarray, engine: str) -> dict:
+    """float32 기준 대비 변환본의 판정 일치율/오차 리포트."""
+    err_base = _make_engine(base, engine).reconstruction_errors(windows)
+    err_var = _make_engine(variant, engine).reconstruction_errors(windows)
+
+    flags_base = err_base > base.thresholds[:, None]
+    flags_var = err_var > variant.thresholds[:, None]
+    ratio_base = base.set_ratios(err_base).mean(axis=0) * 0.5
+    ratio_var = variant.set_ratios(err_var).mean(axis=0) * 0.5
+    return {
+        "windows": int(windows.shape[0]),
+        "models": int(base.n_models),
+        "decision_agreement": float(np.mean(flags_base == flags_var)),
+        "max_abs_ratio_diff": float(np.max(np.abs(ratio_base - ratio_var))),
+        "max_rel_err_diff": float(
+            np.max(np.abs(err_base - err_var) / np.maximum(err_base, 1e-12))
+        ),
+    }
+
+
+def quantize(
+    precision: str,
+    out_path: str,
+    data_path: str,
+    min_agreement: float,
+    src: Optional[str] = None,
+    engine: str = "torch",
+) -> dict:
+    base = _baseline_stacked(src)
+    windows = load_eval_windows(data_path)
+
+    tmp_path = f"{out_path}.candidate"
+    # 원본 정보는 최종 경로 기준으로 기록 (서비스의 staleness 검사 대상)
+    write_store(base, tmp_path, precision=precision, sources=source_stamps(svc.store_sources(), out_path))
+    try:
+        report = compare(base, open_store(tmp_path), windows, engine)
+        report.update(
+            {
+                "precision": precision,
+                "engine": engine,
+                "min_agreement": min_agreement,
+                "size_bytes": os.path.getsize(tmp_path),
+                "passed": report["decision_agreement"] >= min_agreement,
+                "out": out_path,
+            }
+        )
+        if report["passed"]:
+            os.replace(tmp_path, out_path)
+        return report
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="LSTM-AE 앙상블 축소 정밀도 변환 + 정확도 게이트")
+    parser.add_argument("--precision", required=True, choices=[p for p in PRECISIONS if p != "float32"])
+    parser.add_argument("--src", default=None, help="float32 store 경로 (없으면 .pt 에서 로딩)")
+    parser.add_argument("--out", default=None)
+    parser.add_argument("--data", default=_find_anomaly_csv())
+    parser.add_argument("--min-agreement", type=float, default=0.99)
+    parser.add_argument("--engine", choices=["torch", "numpy"], default="torch")
+    args = parser.parse_args()
+
+    if not args.data or not os.path.exists(args.data):
+        raise SystemExit("평가 데이터(anomaly_data.csv)를 찾을 수 없습니다: --data 로 지정하세요.")
+    out = args.out or os.path.join(
+        os.path.dirname(svc.weight_store_path), f"ensemble_store.{args.precision}.bin"
+    )
+    result = quantize(args.precision, out, args.data, args.min_agreement, args.src, args.engine)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    if not result["passed"]:
+        print("[quantize_weights] 판정 일치율이 기준 미만 → 배포하지 않음")
+        raise SystemExit(1)
@@ -0,0 +1,299 @@
+# result_cache.py
+"""
+LSTM 이상탐지 결과 캐시 (메모리 LRU + 선택적 디스크 계층).
+
+- key = (결과 종류, 정규화한 종목명, 최신 일봉 일자[, 채점 설정 지문]). 일봉 일자는 KRX 거래일 달력
+  (TradingCalendar, KST)의 last_bar_day 로 계산한다 (시세 저장소가 켜져 있으면 전종목 시세로 확인한 휴장일까지 반영).
+  지문(fingerprint 함수)은 엔진/student/세트 설정과 가중치 번들 내용을 담아, 디스크 계층을 공유하는 워커끼리
+  설정이 다르거나 장중에 번들이 바뀌어도 다른 설정의 결과를 돌려주지 않게 한다.
+- 만료 규칙
+    장중 (거래일 09:00 ~ 15:30) : 당일 일봉이 계속 바뀌므로 intraday_ttl 초 또는 장 마감 중 이른 시각
+    장 마감 후 / 휴장일         : 다음 거래일 정규장 시작까지 (그 전에는 답이 바뀌지 않음)
+- 같은 key 로 동시에 들어온 호출은 한 번만 계산한다 (크롤링/추론 중복 방지).
+- cache_dir 를 주면 SQLite 파일(lstm_result_cache.sqlite3, WAL)에 항목 단위로 함께 저장한다.
+  재시작 후에도 쓰고, 같은 폴더를 쓰는 다른 워커 프로세스가 계산한 결과도 메모리 miss 때 읽는다.
+  get_or_compute 의 디스크 읽기/쓰기는 이벤트 루프 밖(기본 스레드 풀)에서 실행한다.
+"""
+import asyncio
+import json
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+from collections import OrderedDict
+from datetime import date, datetime, time as dtime, timedelta
+from typing import Awaitable, Callable, Dict, Optional
+
+from ..krx.krx_client import KST
+from ..krx.price_store import get_store as get_price_store
+from ..krx.trading_calendar import MARKET_OPEN, TradingCalendar
+
+MARKET_CLOSE = dtime(15, 30)
+# 달력을 주지 않을 때: 주말 + 양력 고정 휴장일만
+_DEFAULT_CALENDAR = TradingCalendar()
+
+
+# ----------------------------
+# 정규장 시간
+# ----------------------------
+def last_bar_date(now: datetime, calendar: Optional[TradingCalendar] = None) -> date:
+    """now(KST) 시점에 KRX 시세에 존재하는 최신 일봉 일자 (장중이면 당일)."""
+    return (calendar or _DEFAULT_CALENDAR).last_bar_day(now)
+
+
+def expires_at(now: datetime, intraday_ttl: float, calendar: Optional[TradingCalendar] = None) -> datetime:
+    """now(KST) 에 계산한 결과가 유효한 마지막 시각."""
+    cal = calendar or _DEFAULT_CALENDAR
+    today = now.date()
+    if cal.is_trading_day(today) and MARKET_OPEN <= now.time() < MARKET_CLOSE:
+        close = datetime.combine(today, MARKET_CLOSE, tzinfo=KST)
+        return min(now + timedelta(seconds=intraday_ttl), close)
+    d = today if (cal.is_trading_day(today) and now.time() < MARKET_OPEN) else today + timedelta(days=1)
+    while not cal.is_trading_day(d):
+        d += timedelta(days=1)
+    return datetime.combine(d, MARKET_OPEN, tzinfo=KST)
+
+
+def normalize_stock_name(name: str) -> str:
+    """전각/공백/대소문자 차이를 없앤 종목명 (캐시 key 용)."""
+    name = unicodedata.normalize("NFKC", str(name))
+    return re.sub(r"\s+", "", name).upper()
+
+
+# ----------------------------
+# 캐시
+# ----------------------------
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    expires REAL NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+class ResultCache:
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        intraday_ttl: float = 600.0,
+        cache_dir: Optional[str] = None,
+        now_fn: Callable[[], datetime] = lambda: datetime.now(KST),
+        calendar: Optional[TradingCalendar] = None,
+        fingerprint: Optional[Callable[[], str]] = None,
+    ):
+        self.max_entries = max(1, int(max_entries))
+        self.calendar = calendar or _DEFAULT_CALENDAR
+        self.intraday_ttl = float(intraday_ttl)
+        self.now_fn = now_fn
+        self.fingerprint = fingerprint
+        self.path = os.path.join(cache_dir, "lstm_result_cache.sqlite3") if cache_dir else None
+
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key → (value, expires_ts)
+        self._lock = threading.Lock()
+        self._inflight: Dict[tuple, asyncio.Task] = {}
+        self._local = threading.local()
+
+        # 메트릭
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.disk_errors = 0
+        self.coalesced = 0
+        self.expired = 0
+        self.evictions = 0
+        if self.path:
+            os.makedirs(cache_dir, exist_ok=True)
+            self._disk("DELETE FROM results WHERE expires <= ?", (self.now_fn().timestamp(),))
+
+    def key(self, kind: str, stock_name: str, now: Optional[datetime] = None) -> str:
+        now = now or self.now_fn()
+        key = f"{kind}|{normalize_stock_name(stock_name)}|{last_bar_date(now, self.calendar).isoformat()}"
+        return f"{key}|{self.fingerprint()}" if self.fingerprint else key
+
+    # ---------- 디스크 계층 (SQLite, 스레드별 연결) ----------
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def _disk(self, sql: str, params: tuple = ()) -> list:
+        """디스크 계층 질의. 실패(잠금 대기 초과 등)는 캐시 miss 로 보고 넘어간다."""
+        if not self.path:
+            return []
+        try:
+            conn = self._conn()
+            with conn:
+                return conn.execute(sql, params).fetchall()
+        except sqlite3.Error as e:
+            self.disk_errors += 1
+            print(f"[result_cache] 디스크 캐시 오류 무시: {e}")
+            return []
+
+    def _disk_get(self, key: str) -> Optional[tuple]:
+        rows = self._disk(
+            "SELECT value, expires FROM results WHERE key = ? AND expires > ?",
+            (key, self.now_fn().timestamp()),
+        )
+        return (json.loads(rows[0][0]), rows[0][1]) if rows else None
+
+    def _disk_put(self, key: str, value: dict, exp: float) -> None:
+        self._disk(
+            "INSERT OR REPLACE INTO results (key, value, expires) VALUES (?, ?, ?)",
+            (key, json.dumps(value, ensure_ascii=False), exp),
+        )
+
+    # ---------- 메모리 계층 ----------
+    def _remember(self, key: str, value: dict, exp: float) -> None:
+        with self._lock:
+            self._entries[key] = (dict(value), exp)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get(self, key: str) -> Optional[dict]:
+        """메모리 계층만 조회 (디스크는 get_or_compute / load 에서)."""
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            value, exp = item
+            if exp <= self.now_fn().timestamp():
+                del self._entries[key]
+                self.expired += 1
+                return None
+            self._entries.move_to_end(key)
+            return dict(value)
+
+    def load(self, key: str) -> Optional[dict]:
+        """메모리 → 디스크 순으로 조회 (디스크 hit 은 메모리에 올림). 동기 호출용."""
+        value = self.get(key)
+        if value is not None:
+            return value
+        item = self._disk_get(key)
+        if item is None:
+            return None
+        self.disk_hits += 1
+        self._remember(key, *item)
+        return dict(item[0])
+
+    def _expiry(self, now: Optional[datetime]) -> float:
+        return expires_at(now or self.now_fn(), self.intraday_ttl, self.calendar).timestamp()
+
+    def put(self, key: str, value: dict, now: Optional[datetime] = None) -> None:
+        """메모리 + 디스크 저장 (동기 호출용, 이벤트 루프에서는 get_or_compute 사용)."""
+        exp = self._expiry(now)
+        self._remember(key, value, exp)
+        self._disk_put(key, dict(value), exp)
+
+    def invalidate(self, stock_name: Optional[str] = None) -> int:
+        """종목(없으면 전체) 항목 삭제 → 메모리에서 삭제한 개수 (디스크 항목도 함께 삭제)."""
+        with self._lock:
+            if stock_name is None:
+                keys = list(self._entries)
+            else:
+                norm = normalize_stock_name(stock_name)
+                keys = [k for k in self._entries if k.split("|")[1] == norm]
+            for k in keys:
+                del self._entries[k]
+        if stock_name is None:
+            self._disk("DELETE FROM results")
+        else:
+            # key = kind|종목|일자 (종목명 안의 LIKE 와일드카드 '%', '_' 는 escape)
+            norm = re.sub(r"([%_\\])", r"\\\1", normalize_stock_name(stock_name))
+            self._disk("DELETE FROM results WHERE key LIKE ? ESCAPE '\\'", (f"%|{norm}|%",))
+        return len(keys)
+
+    async def get_or_compute(
+        self, kind: str, stock_name: str, compute: Callable[[], Awaitable[dict]]
+    ) -> dict:
+        """캐시 hit 이면 바로 반환, miss 면 compute() 결과를 저장. 같은 key 동시 호출은 합친다."""
+        now = self.now_fn()
+        key = self.key(kind, stock_name, now)
+        cached = self.get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        loop = asyncio.get_running_loop()
+        flight = (id(loop), key)
+        task = self._inflight.get(flight)
+        if task is not None:
+            self.coalesced += 1
+            return dict(await asyncio.shield(task))
+
+        task = loop.create_task(self._fill(key, now, compute))
+        self._inflight[flight] = task
+        try:
+            value = await asyncio.shield(task)
+        finally:
+            self._inflight.pop(flight, None)
+        return dict(value)
+
+    async def _fill(self, key: str, now: datetime, compute: Callable[[], Awaitable[dict]]) -> dict:
+        """디스크(다른 워커/재시작 전 결과) → 없으면 compute() 후 메모리/디스크 저장. 디스크 I/O 는 스레드에서."""
+        if self.path:
+            item = await asyncio.to_thread(self._disk_get, key)
+            if item is not None:
+                self.hits += 1
+                self.disk_hits += 1
+                self._remember(key, *item)
+                return item[0]
+        self.misses += 1
+        value = await compute()
+        exp = self._expiry(now)
+        self._remember(key, value, exp)
+        if self.path:
+            await asyncio.to_thread(self._disk_put, key, dict(value), exp)
+        return value
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "disk_hits": self.disk_hits,
+            "disk_errors": self.disk_errors,
+            "coalesced": self.coalesced,
+            "expired": self.expired,
+            "evictions": self.evictions,
+            "hit_rate": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+            "disk": self.path,
+        }
+
+
+def _store_holidays() -> set:
+    """시세 저장소가 전종목 시세로 확인한 휴장일 (저장소를 처음 쓸 때 연다, 꺼져 있으면 없음)."""
+    store = get_price_store()
+    return store.holidays() if store is not None else set()
+
+
+def cache_from_env(fingerprint: Optional[Callable[[], str]] = None) -> Optional[ResultCache]:
+    """LSTM_CACHE=0 이면 None (캐시 미사용). fingerprint: 채점 설정 지문 (key 에 포함)."""
+    if os.environ.get("LSTM_CACHE", "1").strip().lower() in ("0", "false", "no"):
+        return None
+    return ResultCache(
+        max_entries=int(os.environ.get("LSTM_CACHE_MAX", "1024")),
+        intraday_ttl=float(os.environ.get("LSTM_CACHE_INTRADAY_TTL", "600")),
+        cache_dir=os.environ.get("LSTM_CACHE_DIR") or None,
+        calendar=TradingCalendar(_store_holidays),
+        fingerprint=fingerprint,
+    )
+
+
+__all__ = [
+    "ResultCache",
+    "cache_from_env",
+    "expires_at",
+    "last_bar_date",
+    "normalize_stock_name",
+]
@@ -0,0 +1,75 @@
+# student_model.py
+"""
+앙상블 anomaly_ratio 를 근사하는 distilled student (torch 미사용 NumPy 추론).
+
+- distill_student 가 만든 .npz (MLP 가중치 + 메타데이터) 를 읽는다.
+- 입력은 서비스와 같은 윈도우별 MinMax 스케일링 (B, T, F), 출력은 anomaly_ratio (B,) ∈ [0, 0.5].
+- 판정 경계(cutoff) ± margin 안에 들어온 점수는 borderline 으로 보고 앙상블로 재계산한다.
+"""
+import json
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+# 앙상블 anomaly_ratio 의 최댓값 (세트 비율 평균 × 0.5)
+RATIO_SCALE = 0.5
+
+
+class StudentModel:
+    def __init__(self, layers: List[tuple], meta: dict):
+        """
+        Args:
+            layers: [(W (in, out), b (out,)), ...] float32. 마지막 층 뒤에는 sigmoid × RATIO_SCALE.
+            meta: window_size / n_features / 검증 지표 등
+        """
+        self.layers = layers
+        self.meta = meta
+        self.window_size = int(meta["window_size"])
+        self.n_features = int(meta["n_features"])
+
+    def predict(self, windows: np.ndarray) -> np.ndarray:
+        """(B, T, F) → anomaly_ratio 근사값 (B,)."""
+        x = np.asarray(windows, dtype=np.float32)
+        if x.ndim != 3 or x.shape[1:] != (self.window_size, self.n_features):
+            raise ValueError(
+                f"입력 shape {x.shape} != (B, {self.window_size}, {self.n_features})"
+            )
+        h = x.reshape(x.shape[0], -1)
+        for i, (w, b) in enumerate(self.layers):
+            h = h @ w + b
+            if i < len(self.layers) - 1:
+                np.maximum(h, 0.0, out=h)
+        return (RATIO_SCALE / (1.0 + np.exp(-h[:, 0]))).astype(np.float32)
+
+    def borderline(
+        self, ratios: np.ndarray, cutoffs: Sequence[float], margin: Optional[float] = None
+    ) -> np.ndarray:
+        """cutoff 중 하나와의 거리가 margin 이하인 점수 → True (앙상블 fallback 대상)."""
+        if margin is None:
+            margin = float(self.meta.get("val_abs_err_p95", 0.05))
+        ratios = np.asarray(ratios, dtype=np.float64)
+        if not len(cutoffs):
+            return np.zeros(ratios.shape, dtype=bool)
+        dist = np.abs(ratios[:, None] - np.asarray(cutoffs, dtype=np.float64)[None, :])
+        return (dist <= margin).any(axis=1)
+
+
+def save_student(path: str, layers: List[tuple], meta: dict) -> None:
+    arrays = {}
+    for i, (w, b) in enumerate(layers):
+        arrays[f"w{i}"] = np.asarray(w, dtype=np.float32)
+        arrays[f"b{i}"] = np.asarray(b, dtype=np.float32)
+    arrays["meta"] = np.frombuffer(json.dumps(meta, ensure_ascii=False).encode("utf-8"), dtype=np.uint8)
+    with open(path, "wb") as f:
+        np.savez(f, **arrays)
+
+
+def load_student(path: str) -> StudentModel:
+    with np.load(path) as z:
+        meta = json.loads(z["meta"].tobytes().decode("utf-8"))
+        n_layers = sum(1 for k in z.files if k.startswith("w"))
+        layers = [(z[f"w{i}"], z[f"b{i}"]) for i in range(n_layers)]
+    return StudentModel(layers, meta)
+
+
+__all__ = ["RATIO_SCALE", "StudentModel", "save_student", "load_student"]
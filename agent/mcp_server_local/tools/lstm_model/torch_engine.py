@@ -0,0 +1,151 @@
+# torch_engine.py
+"""
+torch 의존 구성요소 모음 (LSTMAutoEncoder 정의, torch 배치 엔진).
+NumPy 엔진만 쓰는 배포에서는 이 모듈이 import 되지 않는다.
+"""
+import warnings
+from typing import Dict, List, Optional
+
+import numpy as np
+import torch
+
+from .ensemble_engine import WEIGHT_KEYS, StackedEnsemble
+
+device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+
+
+# ----------------------------
+# 모델 정의
+# ----------------------------
+class LSTMAutoEncoder(torch.nn.Module):
+    def __init__(self, input_dim, hidden_dim=64, latent_dim=16):
+        super().__init__()
+        self.encoder = torch.nn.LSTM(input_dim, hidden_dim, batch_first=True)
+        self.latent = torch.nn.Linear(hidden_dim, latent_dim)
+        self.decoder_input = torch.nn.Linear(latent_dim, hidden_dim)
+        self.decoder = torch.nn.LSTM(hidden_dim, input_dim, batch_first=True)
+
+    def forward(self, x):
+        _, (h_n, _) = self.encoder(x)
+        z = self.latent(h_n[-1])
+        dec_input = self.decoder_input(z).unsqueeze(1).repeat(1, x.size(1), 1)
+        out, _ = self.decoder(dec_input)
+        return out
+
+
+# ----------------------------
+# torch 배치 엔진
+# ----------------------------
+def _lstm_cell(gates: torch.Tensor, c: torch.Tensor):
+    i, f, g, o = gates.chunk(4, dim=-1)
+    c = torch.sigmoid(f) * c + torch.sigmoid(i) * torch.tanh(g)
+    h = torch.sigmoid(o) * torch.tanh(c)
+    return h, c
+
+
+# store precision → matmul 정밀도 (없으면 float32 로 복원해 계산)
+_COMPUTE_DTYPES = {"bfloat16": torch.bfloat16, "float16": torch.float16}
+
+
+class TorchEnsembleEngine:
+    """
+    StackedEnsemble 을 torch 텐서로 올려두고 (B, T, F) 윈도우를 M개 모델에 한 번에 통과시킨다.
+    시점 루프(T)만 남고 모델 루프는 모두 배치 matmul 로 대체된다.
+
+    bfloat16 / float16 store 는 mmap 배열을 그대로 텐서로 보고(복사 없음) 그 정밀도로 matmul 한다.
+    int8 store 는 로딩 시 float32 로 복원해 계산한다 (int8 은 파일/page cache 만 줄어든다).
+    LSTM cell state 와 재구성 오차 누적은 항상 float32.
+    """
+
+    name = "torch"
+
+    def __init__(
+        self,
+        stacked: StackedEnsemble,
+        device: Optional[torch.device] = None,
+        max_batch: int = 128,
+    ):
+        self.stacked = stacked
+        self.device = device or torch.device("cpu")
+        self.max_batch = max(1, int(max_batch))
+        self.dtype = _COMPUTE_DTYPES.get(stacked.precision, torch.float32)
+        params = stacked.params if self.dtype != torch.float32 else stacked.float32_params()
+        with warnings.catch_warnings():
+            # weight store(mmap, read-only) 배열을 복사 없이 공유 → 쓰기는 하지 않음
+            warnings.filterwarnings("ignore", message=".*not writable.*")
+            self._p = {}
+            for k, v in params.items():
+                t = torch.from_numpy(np.ascontiguousarray(v))
+                if k in WEIGHT_KEYS and self.dtype == torch.bfloat16:
+                    t = t.view(torch.bfloat16)  # uint16 비트열
+                elif k not in WEIGHT_KEYS:
+                    t = t.to(self.dtype)  # 바이어스 (store 에는 float32)
+                self._p[k] = t.to(self.device)
+
+    def param_arrays(self) -> List[torch.Tensor]:
+        """계산에 쓰는 파라미터 텐서 (int8 store 면 float32 복원본)."""
+        return list(self._p.values())
+
+    @torch.no_grad()
+    def _forward_errors(self, x: torch.Tensor, p: Dict[str, torch.Tensor]) -> torch.Tensor:
+        n_models = p["enc_w_ih"].shape[0]
+        batch, steps, n_feat = x.shape
+        hidden = p["enc_w_hh"].shape[1]
+
+        xc = x.to(self.dtype)  # 계산용 (bf16/f16 store 면 그 정밀도), 오차는 원본 float32 기준
+
+        # 인코더: 마지막 hidden state 만 사용
+        # cell state 는 정밀도 유지를 위해 항상 float32 로 누적
+        h = xc.new_zeros((n_models, batch, hidden))
+        c = x.new_zeros((n_models, batch, hidden))
+        enc_b = p["enc_b"].unsqueeze(1)
+        for t in range(steps):
+            gates = torch.matmul(xc[:, t], p["enc_w_ih"]) + enc_b
+            gates = torch.baddbmm(gates, h, p["enc_w_hh"])
+            h, c = _lstm_cell(gates.float(), c)
+            h = h.to(self.dtype)
+
+        z = torch.baddbmm(p["lat_b"].unsqueeze(1), h, p["lat_w"])
+        dec_in = torch.baddbmm(p["dec_in_b"].unsqueeze(1), z, p["dec_in_w"])
+        # 디코더 입력은 모든 시점에서 동일 → 입력 투영은 한 번만 계산
+        dec_x = torch.baddbmm(p["dec_b"].unsqueeze(1), dec_in, p["dec_w_ih"])
+
+        hd = xc.new_zeros((n_models, batch, n_feat))
+        cd = x.new_zeros((n_models, batch, n_feat))
+        sq_err = x.new_zeros((n_models, batch))
+        for t in range(steps):
+            gates = torch.baddbmm(dec_x, hd, p["dec_w_hh"])
+            hd32, cd = _lstm_cell(gates.float(), cd)
+            sq_err += ((x[:, t] - hd32) ** 2).sum(dim=-1)
+            hd = hd32.to(self.dtype)
+        return sq_err / (steps * n_feat)
+
+    def reconstruction_errors(
+        self, windows: np.ndarray, models: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        (B, T, F) 스케일링된 윈도우 → (M, B) 재구성 MSE.
+        models (모델 인덱스 배열) 를 주면 그 모델들만 계산해 (len(models), B) 를 반환한다.
+        """
+        windows = np.asarray(windows, dtype=np.float32)
+        if windows.ndim == 2:
+            windows = windows[None]
+        if models is None:
+            p = self._p
+        else:
+            idx = torch.as_tensor(np.asarray(models, dtype=np.int64), device=self.device)
+            p = {k: v.index_select(0, idx) for k, v in self._p.items()}
+        out = []
+        for s in range(0, windows.shape[0], self.max_batch):
+            x = torch.from_numpy(
+                np.ascontiguousarray(windows[s : s + self.max_batch])
+            ).to(self.device)
+            out.append(self._forward_errors(x, p).cpu().numpy())
+        return np.concatenate(out, axis=1)
+
+    def set_ratios(self, windows: np.ndarray) -> np.ndarray:
+        """(B, T, F) 윈도우 → 세트별 이상 비율 (S, B)."""
+        return self.stacked.set_ratios(self.reconstruction_errors(windows))
+
+
+__all__ = ["device", "LSTMAutoEncoder", "TorchEnsembleEngine"]
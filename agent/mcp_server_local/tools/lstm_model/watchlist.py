@@ -0,0 +1,408 @@
+# watchlist.py
+"""
+관심 종목 증분(rolling window) 이상탐지.
+
+종목마다 최근 30거래일 피처 행을 고정 크기 ring buffer 에 보관하고,
+새 일봉이 들어오면 그 종목의 새 윈도우 하나만 스케일링/추론해 일별 feed 에 추가한다.
+(종목마다 6개월 CSV 재크롤링 + 재전처리 불필요)
+
+사용법 (agent/mcp_server_local 에서):
+    python -m tools.lstm_model.watchlist add 삼성전자 SK하이닉스    # 최초 1회 시세 수집으로 buffer 채움
+    python -m tools.lstm_model.watchlist update kospi_20250815.csv   # 전 종목 일별 시세 → 관심 종목 일봉 반영
+    python -m tools.lstm_model.watchlist feed [--stock 삼성전자] [--alerts]
+
+- 상태(buffer)는 LSTM_WATCHLIST_DIR/watchlist_state.npz 에 원자적으로 저장되어 재시작 후에도 유지된다.
+  상태 파일의 mtime 이 바뀌면(다른 프로세스의 update/add) 조회·변경 전에 다시 읽는다 (MCP 서버 ↔ CLI).
+- feed 는 같은 폴더의 watchlist_feed.jsonl (일자, 종목, anomaly_ratio, alert) 에 누적된다.
+- 새 일봉은 마지막 반영일의 다음 거래일(TradingCalendar)이어야 하고, 그 기준가(종가 - 대비)가 buffer 의 마지막
+  종가와 같아야 한다 (PriceStore.ingest_snapshot 과 같은 수정주가 검사). 사이 거래일이 빠졌거나(일별 파일 누락)
+  기준가가 다르면(분할/증자 등으로 과거 수정주가가 바뀜) ring 에 이어 붙이지 않고 그 날까지의 시세를 다시 받아
+  buffer 를 새로 채운다. 받지 못하면 buffer 를 비우고 그 날부터 다시 쌓는다 (윈도우가 다시 찰 때까지 feed 없음).
+"""
+import argparse
+import asyncio
+import json
+import os
+import threading
+from datetime import date as ddate, timedelta
+from typing import Callable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from ..krx.krx_client import KRXClientError, get_client as get_krx_client
+from ..krx.price_store import get_store as get_price_store
+from ..krx.trading_calendar import TradingCalendar
+from . import lstm_model_service as svc
+
+watchlist_dir = os.environ.get("LSTM_WATCHLIST_DIR") or os.path.join(svc.BASE_DIR, "watchlist")
+# feed 의 alert 기준 anomaly_ratio
+alert_threshold = float(os.environ.get("LSTM_WATCHLIST_ALERT", "0.25"))
+# 전 거래일 종가와 새 일봉 기준가(종가 - 대비)의 허용 차이 (PriceStore.ingest_snapshot 과 동일)
+READJUST_TOL = 0.5
+_CLOSE, _CHANGE = svc.features.index("종가"), svc.features.index("대비")
+
+
+class WatchlistScorer:
+    """
+    종목별 ring buffer (T, F) 상태 + 일별 anomaly feed.
+    buffer 의 head 는 다음에 쓸 위치이며, 윈도우는 서비스와 같은 최신 → 과거 순으로 꺼낸다.
+    """
+
+    def __init__(
+        self,
+        base_dir: str = watchlist_dir,
+        alert: float = alert_threshold,
+        calendar: Optional[TradingCalendar] = None,
+        history_fn: Optional[Callable[[str, str], pd.DataFrame]] = None,
+    ):
+        """
+        calendar: 거래일 달력 (기본: 시세 저장소의 달력, 저장소가 꺼져 있으면 주말 + 고정 휴장일)
+        history_fn: (종목, 'YYYY-MM-DD') → 그 날까지 최신 → 과거 피처 (누락 구간 복구용, 기본 history_until)
+        """
+        self.state_path = os.path.join(base_dir, "watchlist_state.npz")
+        self.feed_path = os.path.join(base_dir, "watchlist_feed.jsonl")
+        self.alert = alert
+        self.calendar = calendar
+        self.history_fn = history_fn or history_until
+        self.size = svc.window_size
+        self.n_features = len(svc.features)
+        self._lock = threading.Lock()
+        self._state_mtime: Optional[int] = None
+        self._clear()
+        self._load()
+
+    # ----------------------------
+    # 상태 저장/복원
+    # ----------------------------
+    def _clear(self) -> None:
+        self.names: List[str] = []
+        self.buffers = np.zeros((0, self.size, self.n_features), dtype=np.float64)
+        self.heads = np.zeros(0, dtype=np.int64)
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.last_dates: List[str] = []
+
+    def _mtime(self) -> Optional[int]:
+        try:
+            return os.stat(self.state_path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _refresh(self) -> None:
+        """상태 파일이 마지막으로 읽거나 쓴 뒤 바뀌었으면 다시 읽는다 (self._lock 안에서 호출)."""
+        mtime = self._mtime()
+        if mtime == self._state_mtime:
+            return
+        self._clear()
+        self._load()
+
+    def refresh(self) -> None:
+        with self._lock:
+            self._refresh()
+
+    def _load(self) -> None:
+        self._state_mtime = self._mtime()
+        if self._state_mtime is None:
+            return
+        with np.load(self.state_path) as z:
+            meta = json.loads(z["meta"].tobytes().decode("utf-8"))
+            if meta["window_size"] != self.size or meta["n_features"] != self.n_features:
+                raise ValueError(f"{self.state_path}: 윈도우/피처 크기가 현재 설정과 다름")
+            self.buffers = z["buffers"].copy()
+            self.heads = z["heads"].copy()
+            self.counts = z["counts"].copy()
+        self.names = meta["names"]
+        self.last_dates = meta["last_dates"]
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+        meta = {
+            "window_size": self.size,
+            "n_features": self.n_features,
+            "names": self.names,
+            "last_dates": self.last_dates,
+        }
+        tmp = f"{self.state_path}.tmp{os.getpid()}"
+        with open(tmp, "wb") as f:
+            np.savez(
+                f,
+                buffers=self.buffers,
+                heads=self.heads,
+                counts=self.counts,
+                meta=np.frombuffer(json.dumps(meta, ensure_ascii=False).encode("utf-8"), dtype=np.uint8),
+            )
+        os.replace(tmp, self.state_path)
+        self._state_mtime = self._mtime()
+
+    # ----------------------------
+    # 종목 관리
+    # ----------------------------
+    def _index(self, stock: str) -> Optional[int]:
+        try:
+            return self.names.index(stock)
+        except ValueError:
+            return None
+
+    def seed(self, stock: str, history: pd.DataFrame) -> None:
+        """
+        최신 → 과거 순 피처 DataFrame (_preprocess_krx_frame 결과, index=일자) 으로 buffer 를 채운다.
+        이미 있는 종목이면 덮어쓴다.
+        """
+        rows = history.dropna().head(self.size)
+        if rows.empty:
+            raise ValueError(f"{stock}: 유효한 시세 행이 없음")
+        with self._lock:
+            self._refresh()
+            i = self._index(stock)
+            if i is None:
+                self.names.append(stock)
+                self.last_dates.append("")
+                self.buffers = np.concatenate(
+                    [self.buffers, np.zeros((1, self.size, self.n_features))]
+                )
+                self.heads = np.append(self.heads, 0)
+                self.counts = np.append(self.counts, 0)
+                i = len(self.names) - 1
+            self._fill(i, rows)
+
+    def _fill(self, i: int, rows: pd.DataFrame) -> None:
+        """종목 i 의 buffer 를 rows(최신 → 과거, 최대 size 행)로 덮어쓴다."""
+        n = len(rows)
+        # 과거 → 최신 순으로 0..n-1 에 기록, head 는 다음 쓰기 위치
+        self.buffers[i] = 0.0
+        self.buffers[i, :n] = rows.values[::-1]
+        self.heads[i] = n % self.size
+        self.counts[i] = n
+        self.last_dates[i] = _norm_date(rows.index[0]) if n else ""
+
+    def remove(self, stock: str) -> bool:
+        with self._lock:
+            self._refresh()
+            i = self._index(stock)
+            if i is None:
+                return False
+            keep = np.arange(len(self.names)) != i
+            self.buffers, self.heads, self.counts = self.buffers[keep], self.heads[keep], self.counts[keep]
+            del self.names[i]
+            del self.last_dates[i]
+            return True
+
+    def window(self, i: int) -> np.ndarray:
+        """종목 i 의 현재 윈도우 (T, F), 최신 → 과거 순 (스케일링 전)."""
+        order = (self.heads[i] - 1 - np.arange(self.size)) % self.size
+        return self.buffers[i, order]
+
+    # ----------------------------
+    # 증분 업데이트
+    # ----------------------------
+    def _calendar(self) -> TradingCalendar:
+        if self.calendar is None:
+            store = get_price_store()
+            self.calendar = store.calendar if store is not None else TradingCalendar()
+        return self.calendar
+
+    def missed_days(self, last_date: str, date: str) -> List[str]:
+        """last_date 와 date 사이(양끝 제외)의 거래일 — 비어 있어야 date 를 ring 에 이어 붙일 수 있다."""
+        lo = ddate.fromisoformat(last_date) + timedelta(days=1)
+        hi = ddate.fromisoformat(date) - timedelta(days=1)
+        return [d.isoformat() for d in self._calendar().trading_days(lo, hi)]
+
+    def _splice_problem(self, i: int, date: str, row: np.ndarray) -> Optional[str]:
+        """종목 i 의 ring 에 date 일봉 row 를 이어 붙일 수 없는 이유 (없으면 None)."""
+        missed = self.missed_days(self.last_dates[i], date)
+        if missed:
+            return f"{self.last_dates[i]} → {date} 사이 거래일 {len(missed)}일 누락 ({missed[0]}~{missed[-1]})"
+        prev_close = self.window(i)[0, _CLOSE]
+        base = row[_CLOSE] - row[_CHANGE]
+        if abs(prev_close - base) > READJUST_TOL:
+            return f"{date} 기준가 {base:g} ≠ {self.last_dates[i]} 종가 {prev_close:g} (수정주가 변경)"
+        return None
+
+    def _repair(self, i: int, date: str, reason: str) -> None:
+        """ring 에 이어 붙일 수 없는 종목 i: date 까지의 시세로 다시 채우고, 실패하면 buffer 를 비운다."""
+        stock = self.names[i]
+        print(f"[watchlist] {stock}: {reason}, 시세를 다시 받아 buffer 재구성")
+        try:
+            rows = self.history_fn(stock, date).dropna()
+            rows = rows[[_norm_date(d) <= date for d in rows.index]].head(self.size)
+            if rows.empty:
+                raise ValueError("유효한 시세 행이 없음")
+            self._fill(i, rows)
+            if self.last_dates[i] == date or not self.missed_days(self.last_dates[i], date):
+                return
+            reason = f"받은 시세가 {self.last_dates[i]} 까지뿐"
+        except (KRXClientError, RuntimeError, ValueError) as e:
+            reason = str(e)
+        print(f"[watchlist] {stock}: buffer 재구성 실패 ({reason}) → 비우고 {date} 부터 다시 쌓음")
+        self._fill(i, pd.DataFrame(columns=svc.features))
+
+    def append_bars(self, date: str, bars: pd.DataFrame) -> List[dict]:
+        """
+        하루치 일봉 (index=종목명, columns=features 숫자) 을 관심 종목에 반영하고,
+        윈도우가 찬 종목만 한 번의 배치로 추론해 feed 항목을 반환/기록한다.
+        이미 반영된 일자(last_date 이후가 아닌)의 일봉은 무시한다.
+        마지막 반영일과 date 사이에 거래일이 빠져 있거나 수정주가가 바뀌었으면 _repair 로 buffer 를 다시 만든 뒤 반영한다.
+        """
+        date = _norm_date(date)
+        updated = []
+        with self._lock:
+            self._refresh()
+            for i, stock in enumerate(self.names):
+                if stock not in bars.index or (self.last_dates[i] and date <= self.last_dates[i]):
+                    continue
+                row = bars.loc[stock, svc.features].to_numpy(dtype=np.float64)
+                if np.isnan(row).any():
+                    continue
+                if self.last_dates[i]:
+                    problem = self._splice_problem(i, date, row)
+                    if problem:
+                        self._repair(i, date, problem)
+                        if self.last_dates[i] == date:  # 받은 시세에 date 일봉까지 포함
+                            if self.counts[i] == self.size:
+                                updated.append(i)
+                            continue
+                self.buffers[i, self.heads[i]] = row
+                self.heads[i] = (self.heads[i] + 1) % self.size
+                self.counts[i] = min(self.counts[i] + 1, self.size)
+                self.last_dates[i] = date
+                if self.counts[i] == self.size:
+                    updated.append(i)
+
+            entries: List[dict] = []
+            if updated:
+                windows = np.concatenate(
+                    [svc.sliding_scaled_windows(self.window(i)) for i in updated]
+                )
+                ratios = svc.score_windows(windows).mean(axis=0) * 0.5
+                entries = [
+                    {
+                        "date": date,
+                        "stock": self.names[i],
+                        "anomaly_ratio": round(float(r), 4),
+                        "alert": bool(r >= self.alert),
+                    }
+                    for i, r in zip(updated, ratios)
+                ]
+                self._write_feed(entries)
+            self.save()
+        return entries
+
+    def _write_feed(self, entries: List[dict]) -> None:
+        os.makedirs(os.path.dirname(self.feed_path), exist_ok=True)
+        with open(self.feed_path, "a", encoding="utf-8") as f:
+            for e in entries:
+                f.write(json.dumps(e, ensure_ascii=False) + "\n")
+
+    def read_feed(
+        self, stock: Optional[str] = None, since: Optional[str] = None, alerts_only: bool = False
+    ) -> List[dict]:
+        if not os.path.exists(self.feed_path):
+            return []
+        since = _norm_date(since) if since else None
+        out = []
+        with open(self.feed_path, encoding="utf-8") as f:
+            for line in f:
+                e = json.loads(line)
+                if stock and e["stock"] != stock:
+                    continue
+                if since and e["date"] < since:
+                    continue
+                if alerts_only and not e["alert"]:
+                    continue
+                out.append(e)
+        return out
+
+    def status(self) -> List[dict]:
+        self.refresh()
+        return [
+            {"stock": n, "last_date": d, "rows": int(c), "ready": bool(c == self.size)}
+            for n, d, c in zip(self.names, self.last_dates, self.counts)
+        ]
+
+
+def _norm_date(value) -> str:
+    """'2025/08/14', '20250814', Timestamp → '2025-08-14'."""
+    return pd.to_datetime(str(value).replace("/", "-")).strftime("%Y-%m-%d")
+
+
+def read_daily_bars(path: str, date: Optional[str] = None) -> tuple:
+    """
+    KRX 전 종목 일별 시세 CSV (krx_dataset_crawling 의 kospi_YYYYMMDD.csv) → (일자, 종목명 index 피처 DataFrame).
+    date 가 없으면 파일명에서 YYYYMMDD 를 읽는다.
+    """
+    if date is None:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        digits = "".join(ch for ch in stem if ch.isdigit())
+        if len(digits) < 8:
+            raise ValueError(f"{path}: 파일명에서 일자를 찾을 수 없음 (--date 필요)")
+        date = digits[-8:]
+    try:
+        df = pd.read_csv(path, encoding="euc-kr")
+    except UnicodeDecodeError:
+        df = pd.read_csv(path, encoding="utf-8-sig")
+    bars = svc._preprocess_krx_frame(df.drop(columns="일자", errors="ignore"), min_rows=0)
+    bars.index = df.loc[bars.index, "종목명"].astype(str).str.strip().values
+    return _norm_date(date), bars[~bars.index.duplicated()]
+
+
+def history_until(stock: str, date: str) -> pd.DataFrame:
+    """date('YYYY-MM-DD') 까지 최근 window_size 거래일 피처 (최신 → 과거). 시세 저장소가 있으면 빈 거래일만 KRX 요청."""
+    source = get_price_store() or get_krx_client()
+    raw = source.stock_prices(stock, months=3, end=date.replace("-", ""))
+    return svc._preprocess_krx_frame(raw, n_rows=svc.window_size)
+
+
+_scorer: Optional[WatchlistScorer] = None
+
+
+def get_watchlist() -> WatchlistScorer:
+    global _scorer
+    if _scorer is None:
+        _scorer = WatchlistScorer()
+    return _scorer
+
+
+async def add_stocks(stocks: List[str]) -> List[dict]:
+    """관심 종목 추가: 최초 1회만 KRX 시세를 받아 buffer 를 채운다."""
+    wl = get_watchlist()
+    for stock in stocks:
+        hist = await svc.fetch_recent_data(stock)
+        wl.seed(stock, hist)
+        print(f"[watchlist] seeded {stock} ({len(hist)} rows, last={_norm_date(hist.index[0])})")
+    wl.save()
+    return wl.status()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="관심 종목 증분 LSTM-AE 이상탐지")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_add = sub.add_parser("add")
+    p_add.add_argument("stocks", nargs="+")
+    p_rm = sub.add_parser("remove")
+    p_rm.add_argument("stocks", nargs="+")
+    p_up = sub.add_parser("update")
+    p_up.add_argument("files", nargs="+", help="전 종목 일별 시세 CSV (오래된 날짜부터)")
+    p_up.add_argument("--date", default=None)
+    p_feed = sub.add_parser("feed")
+    p_feed.add_argument("--stock", default=None)
+    p_feed.add_argument("--since", default=None)
+    p_feed.add_argument("--alerts", action="store_true")
+    sub.add_parser("status")
+    args = parser.parse_args()
+
+    wl = get_watchlist()
+    if args.cmd == "add":
+        result = asyncio.run(add_stocks(args.stocks))
+    elif args.cmd == "remove":
+        result = {s: wl.remove(s) for s in args.stocks}
+        wl.save()
+    elif args.cmd == "update":
+        result = []
+        for path in args.files:
+            date, bars = read_daily_bars(path, args.date)
+            result += wl.append_bars(date, bars)
+    elif args.cmd == "feed":
+        result = wl.read_feed(args.stock, args.since, args.alerts)
+    else:
+        result = wl.status()
+    print(json.dumps(result, ensure_ascii=False, indent=2))
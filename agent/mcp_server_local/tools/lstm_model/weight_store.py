@@ -0,0 +1,268 @@
+# weight_store.py
+"""
+LSTM-AE 앙상블 단일 파일 가중치 저장소 (read-only memory map).
+
+파일 구조 (little-endian):
+    [0:8)    MAGIC  b"LSTMAE01"
+    [8:16)   uint64 index 길이(바이트)
+    [16:..)  index (UTF-8 JSON)
+    ...      ALIGN 바이트 경계로 정렬된 텐서 블록들 (C-order)
+
+index 예:
+    {
+      "version": 1, "dtype": "float32", "n_sets": 10,
+      "tensors": {"enc_w_ih": {"offset": 4096, "shape": [298, 10, 256], "dtype": "float32"}, ...},
+      "models": [{"set": 0, "name": "삼성생명", "threshold": 0.031}, ...],
+      "sources": {"ensemble_weights/ensemble_weights_set1.pt": {"size": ..., "mtime_ns": ..., "sha1": ...}, ...}
+    }
+모델 m 의 텐서 k 위치 = tensors[k].offset + m * (shape[1:] 원소 수 * itemsize).
+
+top-level dtype(precision) 이 float32 가 아니면 가중치 행렬(WEIGHT_KEYS)은
+bfloat16(uint16 비트열) / float16 / int8 로 저장되고, int8 은 "{key}.scale" 텐서
+((M, 1, out) float32, 출력 채널별 대칭 scale)를 함께 가진다. 바이어스는 항상 float32.
+torch 엔진은 bfloat16/float16 가중치를 그대로 matmul 에 쓰고, int8(및 numpy 엔진의 모든 축소 정밀도)은
+로딩 시 float32 로 복원한다 → int8 로 줄어드는 것은 파일/page cache 뿐이다.
+
+워커들은 같은 파일을 np.memmap(mode="r") 으로 열기 때문에
+pickle 해제 비용 없이 OS page cache 한 벌을 공유한다.
+
+sources 는 store 를 만든 원본(.pt / 임계값 .csv)의 크기·mtime·sha1 (store 폴더 기준 상대경로).
+stale_sources 로 원본이 바뀐 뒤 다시 만들지 않은 store 를 찾는다 (mtime 만 바뀐 경우는 sha1 로 판정).
+"""
+import hashlib
+import json
+import os
+import struct
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .ensemble_engine import (
+    PARAM_KEYS,
+    PRECISIONS,
+    WEIGHT_KEYS,
+    StackedEnsemble,
+    float32_to_bf16,
+)
+
+MAGIC = b"LSTMAE01"
+ALIGN = 64
+STORE_VERSION = 1
+_HEADER = struct.Struct("<8sQ")
+
+
+# index dtype 이름 → 파일 상 numpy dtype (bfloat16 은 uint16 비트열로 보관)
+_FILE_DTYPES = {
+    "float32": "<f4",
+    "float16": "<f2",
+    "bfloat16": "<u2",
+    "int8": "i1",
+}
+
+
+def _align(n: int) -> int:
+    return (n + ALIGN - 1) // ALIGN * ALIGN
+
+
+def _quantize(stacked: StackedEnsemble, precision: str) -> Dict[str, tuple]:
+    """float32 파라미터 → {이름: (배열, dtype 이름)}. int8 scale 은 "{key}.scale" 로 추가."""
+    if precision not in PRECISIONS:
+        raise ValueError(f"지원하지 않는 precision: {precision}")
+    params = stacked.float32_params()
+    out: Dict[str, tuple] = {}
+    for k in PARAM_KEYS:
+        w = params[k]
+        if k not in WEIGHT_KEYS or precision == "float32":
+            out[k] = (w, "float32")
+        elif precision == "bfloat16":
+            out[k] = (float32_to_bf16(w), "bfloat16")
+        elif precision == "float16":
+            out[k] = (w.astype(np.float16), "float16")
+        else:
+            # (M, in, out) → 출력 채널(M, out)별 대칭 int8
+            absmax = np.abs(w).max(axis=1, keepdims=True)
+            scale = np.where(absmax > 0, absmax / 127.0, 1.0).astype(np.float32)
+            q = np.clip(np.rint(w / scale), -127, 127).astype(np.int8)
+            out[k] = (q, "int8")
+            out[f"{k}.scale"] = (scale, "float32")
+    return out
+
+
+def write_store(
+    stacked: StackedEnsemble,
+    path: str,
+    precision: str = "float32",
+    sources: Optional[Dict[str, dict]] = None,
+) -> None:
+    """
+    StackedEnsemble → 단일 정렬 파일. 임시 파일에 쓴 뒤 rename 하여 원자적으로 교체.
+    precision 으로 가중치 행렬의 저장 정밀도를 지정한다 (float32 | bfloat16 | float16 | int8).
+    sources: 원본 파일 정보 (source_stamps 결과). index 에 그대로 기록된다.
+    """
+    arrays = {
+        name: (np.ascontiguousarray(a, dtype=_FILE_DTYPES[dt]), dt)
+        for name, (a, dt) in _quantize(stacked, precision).items()
+    }
+    models = [
+        {"set": int(s), "name": n, "threshold": float(t)}
+        for s, n, t in zip(stacked.set_ids, stacked.names, stacked.thresholds)
+    ]
+
+    # index 크기가 offset 에 영향을 주므로, offset 자릿수가 안정될 때까지 반복 계산
+    data_start = _align(_HEADER.size + 1024)
+    while True:
+        tensors: Dict[str, dict] = {}
+        offset = data_start
+        for name, (a, dt) in arrays.items():
+            tensors[name] = {"offset": offset, "shape": list(a.shape), "dtype": dt}
+            offset = _align(offset + a.nbytes)
+        index = json.dumps(
+            {
+                "version": STORE_VERSION,
+                "dtype": precision,
+                "n_sets": stacked.n_sets,
+                "tensors": tensors,
+                "models": models,
+                "sources": sources or {},
+            },
+            ensure_ascii=False,
+            separators=(",", ":"),
+        ).encode("utf-8")
+        needed = _align(_HEADER.size + len(index))
+        if needed <= data_start:
+            break
+        data_start = needed
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, len(index)))
+        f.write(index)
+        for name, (a, _) in arrays.items():
+            f.seek(tensors[name]["offset"])
+            f.write(a.tobytes(order="C"))
+        f.truncate(offset)
+    os.replace(tmp_path, path)
+
+
+def read_index(path: str) -> dict:
+    """텐서 데이터는 건드리지 않고 index 만 읽는다."""
+    with open(path, "rb") as f:
+        magic, index_len = _HEADER.unpack(f.read(_HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path}: LSTM-AE weight store 파일이 아님")
+        index = json.loads(f.read(index_len).decode("utf-8"))
+    if index.get("version") != STORE_VERSION:
+        raise ValueError(f"{path}: 지원하지 않는 store 버전 {index.get('version')}")
+    return index
+
+
+def open_store(path: str) -> StackedEnsemble:
+    """
+    store 파일을 read-only memory map 으로 열어 StackedEnsemble 을 만든다.
+    params 는 모두 파일에 대한 view 이므로 복사/역직렬화가 발생하지 않는다.
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(
+            f"{path} 없음: 'python -m tools.lstm_model.export_weights' 로 먼저 변환 필요"
+        )
+    index = read_index(path)
+    mm = np.memmap(path, dtype=np.uint8, mode="r")
+
+    def _view(meta: dict) -> np.ndarray:
+        dt = np.dtype(_FILE_DTYPES[meta.get("dtype", "float32")])
+        shape = tuple(meta["shape"])
+        start = int(meta["offset"])
+        nbytes = int(np.prod(shape)) * dt.itemsize
+        return mm[start : start + nbytes].view(dt).reshape(shape)
+
+    tensors = index["tensors"]
+    params = {k: _view(tensors[k]) for k in PARAM_KEYS}
+    scales = {
+        k: _view(tensors[f"{k}.scale"]) for k in WEIGHT_KEYS if f"{k}.scale" in tensors
+    }
+
+    models = index["models"]
+    return StackedEnsemble(
+        params=params,
+        thresholds=np.array([m["threshold"] for m in models], dtype=np.float32),
+        set_ids=np.array([m["set"] for m in models], dtype=np.int64),
+        names=[m["name"] for m in models],
+        n_sets=int(index["n_sets"]),
+        precision=index.get("dtype", "float32"),
+        scales=scales,
+    )
+
+
+# ----------------------------
+# 원본(.pt / .csv) 대비 최신 여부
+# ----------------------------
+def bundle_sources(weight_dir: str, threshold_dir: str, n_sets: int) -> List[str]:
+    """세트별 ensemble_weights_set{i}.pt / ensemble_thresholds_set{i}.csv 경로."""
+    files = []
+    for i in range(1, n_sets + 1):
+        files.append(os.path.join(weight_dir, f"ensemble_weights_set{i}.pt"))
+        files.append(os.path.join(threshold_dir, f"ensemble_thresholds_set{i}.csv"))
+    return files
+
+
+def _sha1(path: str) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _rel(path: str, store_path: str) -> str:
+    return os.path.relpath(os.path.abspath(path), os.path.dirname(os.path.abspath(store_path)))
+
+
+def source_stamps(files: Sequence[str], store_path: str) -> Dict[str, dict]:
+    """원본 파일 → {store 폴더 기준 상대경로: {"size", "mtime_ns", "sha1"}}. 없는 파일은 제외."""
+    out = {}
+    for f in files:
+        if os.path.exists(f):
+            st = os.stat(f)
+            out[_rel(f, store_path)] = {
+                "size": st.st_size,
+                "mtime_ns": st.st_mtime_ns,
+                "sha1": _sha1(f),
+            }
+    return out
+
+
+def stale_sources(store_path: str, files: Sequence[str]) -> List[str]:
+    """
+    store 를 만든 뒤 바뀌었거나 추가/삭제된 원본 (상대경로 목록, 비어 있으면 최신).
+    - 원본이 하나도 없으면(store 만 배포) 비교할 대상이 없으므로 []
+    - 크기·mtime 이 같으면 그대로 최신으로 보고, 다르면 sha1 로 내용을 비교
+    - sources 기록이 없는 store(이전 버전 export)는 원본이 있으면 모두 바뀐 것으로 본다
+    """
+    present = [f for f in files if os.path.exists(f)]
+    if not present:
+        return []
+    recorded = read_index(store_path).get("sources") or {}
+    current = {_rel(f, store_path): f for f in present}
+    stale = []
+    for rel in sorted(set(current) | set(recorded)):
+        rec, f = recorded.get(rel), current.get(rel)
+        if rec is None or f is None:
+            stale.append(rel)
+            continue
+        st = os.stat(f)
+        if st.st_size != rec.get("size"):
+            stale.append(rel)
+        elif st.st_mtime_ns != rec.get("mtime_ns") and _sha1(f) != rec.get("sha1"):
+            stale.append(rel)
+    return stale
+
+
+__all__ = [
+    "write_store",
+    "read_index",
+    "open_store",
+    "bundle_sources",
+    "source_stamps",
+    "stale_sources",
+]
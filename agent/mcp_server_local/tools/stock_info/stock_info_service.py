@@ -1,69 +1,21 @@
 # stock_info_service.py
-import os
+import io
 import time
 import json
-import glob
-from datetime import datetime
-from typing import Optional
 
 import numpy as np
 import pandas as pd
 
-from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import NoSuchElementException, TimeoutException, StaleElementReferenceException
-from webdriver_manager.chrome import ChromeDriverManager
+from selenium.common.exceptions import NoSuchElementException
 
-
-# =============================================================================
-# 다운로드 기본 경로 (환경변수 우선)
-#   - STOCK_INFO_DOWNLOAD_DIR 이 설정되어 있으면 그 값을 사용
-#   - 없으면 OS 별 기본값 사용 (서버/컨테이너 친화적)
-# =============================================================================
-def _resolve_base_download_dir() -> str:
-    env = os.environ.get("STOCK_INFO_DOWNLOAD_DIR")
-    if env:
-        base = env
-    else:
-        if os.name == "nt":
-            base = os.path.join(
-                os.environ.get("TEMP", r"C:\Temp"), "stock_info_downloads"
-            )
-        else:
-            base = "/tmp/stock_info_downloads"
-    os.makedirs(base, exist_ok=True)
-    return base
-
-
-# =============================================================================
-# 크롬 옵션(headless + 다운로드 고정) 구성
-#   - 요청별 전용 하위 폴더(prefix로 타임스탬프 붙임)
-#   - 절대경로 필수
-# =============================================================================
-def _build_chrome_options(download_dir: str) -> Options:
-    opts = webdriver.ChromeOptions()
-    # 서버/CI 친화 옵션
-    # opts.add_argument("--headless=new")
-    opts.add_argument("--no-sandbox")
-    opts.add_argument("--disable-dev-shm-usage")
-    opts.add_argument("--window-size=1920,1080")
-    opts.add_argument("--lang=ko-KR")
-    opts.add_argument("--disable-gpu")
-
-    # 다운로드 환경 설정
-    prefs = {
-        "download.default_directory": os.path.abspath(download_dir),
-        "download.prompt_for_download": False,
-        "download.directory_upgrade": True,
-        "safebrowsing.enabled": True,
-        "plugins.always_open_pdf_externally": True,
-    }
-    opts.add_experimental_option("prefs", prefs)
-    return opts
+from ..browser.cdp_capture import DownloadCapture
+from ..browser.driver_pool import get_pool as get_driver_pool
+from ..krx.krx_client import KRXClientError, fetch_mode as krx_fetch_mode, get_client as get_krx_client
+from ..krx.krx_page import select_issue
+from ..krx.price_store import get_store as get_price_store
 
 
 # =============================================================================
@@ -139,45 +91,6 @@ def set_calendar_by_arrows(
     time.sleep(0.2)
 
 
-# =============================================================================
-# 다운로드 보조: 특정 폴더에 새 CSV가 내려올 때까지 기다리고 경로 반환
-#   - .crdownload 파일이 사라질 때까지 대기
-#   - timeout 초과 시 예외
-# =============================================================================
-def _wait_download_csv(download_dir: str, start_ts: float, timeout: int = 60) -> str:
-    """
-    download_dir: 이번 요청 전용 하위 폴더
-    start_ts: 다운로드 시작 시각 (time.time())
-    """
-    deadline = time.time() + timeout
-    last_seen_csv: Optional[str] = None
-
-    while time.time() < deadline:
-        # .crdownload가 없는 최신 CSV 탐색 (요청 시작 이후 생성된 파일만)
-        csv_candidates = []
-        for path in glob.glob(os.path.join(download_dir, "*.csv")):
-            try:
-                if os.path.getmtime(path) >= start_ts:
-                    csv_candidates.append(path)
-            except FileNotFoundError:
-                pass
-
-        # 가장 최신 CSV
-        if csv_candidates:
-            latest = max(csv_candidates, key=os.path.getmtime)
-            # .crdownload 동반 여부 체크 (크롬은 csv.crdownload 형태를 씀)
-            cr_path = latest + ".crdownload"
-            if not os.path.exists(cr_path):
-                return latest
-            last_seen_csv = latest
-
-        time.sleep(0.5)
-
-    raise TimeoutException(
-        f"CSV 파일 다운로드 대기 시간 초과 (마지막 감지: {last_seen_csv or '없음'})"
-    )
-
-
 # =============================================================================
 # 숫자/퍼센트 파서 + 분석 함수 (원본 유지)
 # =============================================================================
@@ -308,12 +221,13 @@ def analyze_individual_stock_df(df: pd.DataFrame) -> dict:
 # =============================================================================
 # 메인 크롤링 + 분석 함수
 #   - 기존 individual_stock_trend()를 서버/컨테이너 친화적으로 개선
-#   - 요청별 다운로드 폴더를 만들어 충돌/오검출 방지
+#   - CSV 는 DevTools 로 응답 본문을 바로 받아 파일/폴더를 거치지 않음 (동시 요청 충돌 없음)
 # =============================================================================
 def individual_stock_trend(stock_name: str, target_date: str) -> dict:
     """
-    [주식] -> [종목시세] -> [개별종목 시세 추이]
-    종목 검색 → 첫 행 선택 → 달력 열기 → cal-start=2020-05-25 → cal-end=target_date → CSV 다운로드 → 분석
+    [주식] -> [종목시세] -> [개별종목 시세 추이] 1개월 데이터 → 분석
+    KRX_FETCH=auto 면 HTTP 클라이언트(target_date 까지 1개월, 로컬 시세 저장소가 있으면 빈 거래일만 요청),
+    실패 시 Selenium 다운로드로 재시도 (같은 구간을 달력으로 지정)
     """
     if not isinstance(stock_name, str) or not stock_name.strip():
         raise ValueError("stock_name은 비어있지 않은 문자열이어야 합니다.")
@@ -322,21 +236,46 @@ def individual_stock_trend(stock_name: str, target_date: str) -> dict:
     ):
         raise ValueError("target_date는 'YYYYMMDD' 형식의 문자열이어야 합니다.")
 
-    # --- 다운로드 폴더: 요청별 전용 하위 폴더 사용
-    base_dir = _resolve_base_download_dir()
-    stamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
-    req_dir = os.path.join(base_dir, f"req_{stamp}")
-    os.makedirs(req_dir, exist_ok=True)
+    mode = krx_fetch_mode()
+    if mode != "selenium":
+        try:
+            source = get_price_store() or get_krx_client()
+            df = source.stock_prices(stock_name.strip(), months=1, end=target_date)
+            return analyze_individual_stock_df(df)
+        except KRXClientError as e:
+            if mode == "http":
+                raise
+            print(f"[stock_info] KRX HTTP 조회 실패, Selenium 으로 재시도: {e}")
+    return _individual_stock_trend_selenium(stock_name, target_date)
+
+
+def trend_range(target_date: str, months: int = 1):
+    """target_date 까지 months 개월 조회 구간 (start, end) Timestamp. KRXClient.stock_prices 와 같은 구간."""
+    end = pd.Timestamp(target_date)
+    return end - pd.DateOffset(months=months), end
+
+
+def clip_trend_range(df: pd.DataFrame, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+    """다운로드 CSV 를 [start, end] 로 자름. 남는 행이 없으면 ValueError (다른 구간 결과를 분석하지 않음)."""
+    days = pd.to_datetime(df["일자"], errors="coerce")
+    out = df[(days >= start) & (days <= end)]
+    if out.empty:
+        raise ValueError(
+            f"KRX 화면 조회 결과에 {start:%Y%m%d}~{end:%Y%m%d} 구간 시세가 없습니다 "
+            f"(받은 구간: {days.min():%Y%m%d}~{days.max():%Y%m%d})"
+        )
+    return out
 
-    # --- 크롬 옵션(headless + 다운로드 설정)
-    options = _build_chrome_options(req_dir)
 
-    driver = webdriver.Chrome(
-        service=Service(ChromeDriverManager().install()), options=options
-    )
-    wait = WebDriverWait(driver, 12)
+def _individual_stock_trend_selenium(stock_name: str, target_date: str) -> dict:
+    """
+    종목 선택(종목코드 디렉터리, 없으면 검색 팝업) → 달력으로 target_date 까지 1개월 지정 → CSV 다운로드 → 분석
+    """
+    start, end = trend_range(target_date)
+    # --- 풀에서 Chrome 세션 대여 (반납 시 상태 초기화)
+    with get_driver_pool().driver() as driver:
+        wait = WebDriverWait(driver, 12)
 
-    try:
         # 1) 페이지 진입
         driver.get(
             "http://data.krx.co.kr/contents/MDC/MDI/mdiLoader/index.cmd?menuId=MDC0201"
@@ -358,75 +297,19 @@ def individual_stock_trend(stock_name: str, target_date: str) -> dict:
         # 5) 살짝 대기
         time.sleep(0.8)
 
-        # 6) 종목 검색 팝업 버튼 클릭
-        wait.until(
-            EC.element_to_be_clickable((By.ID, "btnisuCd_finder_stkisu0_0"))
-        ).click()
+        # 6~9) 종목 선택: 종목코드 디렉터리로 폼을 바로 채움 (없으면 검색 팝업 → 첫 행)
+        select_issue(driver, wait, stock_name)
 
-        # 7) 검색창에 종목명 입력
-        search_input = wait.until(
-            EC.presence_of_element_located((By.ID, "searchText__finder_stkisu0_0"))
-        )
-        search_input.clear()
-        search_input.send_keys(stock_name)
-        time.sleep(2.5)
-
-        # 8) 조회 버튼 클릭
+        # 10~12) 달력: 시작일 → 종료일(target_date) → 적용 (1개월 버튼은 오늘 기준이라 쓰지 않음)
         wait.until(
-            EC.element_to_be_clickable((By.ID, "searchBtn__finder_stkisu0_0"))
+            EC.element_to_be_clickable((By.CSS_SELECTOR, "button.cal-btn-open"))
         ).click()
-        time.sleep(2.5)
-
-        # 9) 결과 테이블 첫 번째 행 클릭 (stale 방어 버전)
-        grid_selector = "#jsGrid__finder_stkisu0_0 tbody tr.jsRow"
-        grid_locator = (By.CSS_SELECTOR, grid_selector)
-
-        # 결과가 나타날 때까지 대기 (한 개 이상)
-        wait.until(lambda d: len(d.find_elements(*grid_locator)) > 0)
-
-        # JS 클릭 헬퍼: WebElement 참조 없이 한 번에 처리 → stale 확률 낮음
-        def _js_click_first_row():
-            return driver.execute_script(
-                """
-                const el = document.querySelector(arguments[0]);
-                if (!el) return false;
-                el.scrollIntoView({block:'center'});
-                el.click();
-                return true;
-                """,
-                grid_selector,
-            )
-
-        clicked = False
-        # 최대 5회 재시도 (리렌더링 대비)
-        for _ in range(5):
-            try:
-                # 시도 1: JS로 직접 클릭
-                if _js_click_first_row():
-                    clicked = True
-                    break
-                # 시도 2: 다시 찾아서 파이썬 객체로 클릭
-                rows = driver.find_elements(*grid_locator)
-                if rows:
-                    row = rows[0]
-                    driver.execute_script(
-                        "arguments[0].scrollIntoView({block:'center'});", row
-                    )
-                    # 클릭 직전 최신 참조로 다시 가져오기
-                    row = driver.find_elements(*grid_locator)[0]
-                    row.click()
-                    clicked = True
-                    break
-            except StaleElementReferenceException:
-                time.sleep(0.2)  # 잠깐 대기 후 재시도
-            except Exception:
-                time.sleep(0.2)
-
-        if not clicked:
-            raise RuntimeError("결과 첫 행 클릭 실패(요소 stale 또는 미표시)")
-
+        set_calendar_by_arrows(driver, wait, "start", start.year, start.month, start.day)
+        set_calendar_by_arrows(driver, wait, "end", end.year, end.month, end.day)
         wait.until(
-            EC.element_to_be_clickable((By.CSS_SELECTOR, "button.cal-btn-range1m"))
+            EC.element_to_be_clickable(
+                (By.CSS_SELECTOR, "button.cal-btn-confirm.cal-btn-apply")
+            )
         ).click()
         wait.until(EC.element_to_be_clickable((By.ID, "jsSearchButton"))).click()
         time.sleep(0.5)
@@ -434,24 +317,20 @@ def individual_stock_trend(stock_name: str, target_date: str) -> dict:
         wait.until(
             EC.element_to_be_clickable((By.CSS_SELECTOR, "button.CI-MDI-UNIT-DOWNLOAD"))
         ).click()
-        start_ts = time.time()
-        wait.until(
-            EC.element_to_be_clickable((By.CSS_SELECTOR, 'div[data-type="csv"] a'))
-        ).click()
-
-        latest_csv = _wait_download_csv(req_dir, start_ts=start_ts, timeout=90)
-        df = pd.read_csv(latest_csv, encoding="euc-kr")
+        # CSV 응답 본문을 DevTools 로 바로 받음 (파일 저장/폴더 polling 없음)
+        with DownloadCapture(driver, url_hint="download.cmd") as cap:
+            wait.until(
+                EC.element_to_be_clickable((By.CSS_SELECTOR, 'div[data-type="csv"] a'))
+            ).click()
+            body = cap.wait(timeout=90)
+        df = pd.read_csv(io.BytesIO(body), encoding="euc-kr")
+        # 달력 적용이 안 됐어도 target_date 이후/이전 구간을 분석하지 않도록
+        df = clip_trend_range(df, start, end)
 
         # 18) 분석(JSON) 반환
         out = analyze_individual_stock_df(df)
         return out
 
-    finally:
-        try:
-            driver.quit()
-        except Exception:
-            pass
-
 
 if __name__ == "__main__":
     # 로컬 테스트용
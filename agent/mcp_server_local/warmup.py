@@ -0,0 +1,162 @@
+# warmup.py
+"""
+MCP 서버 시작 시 warm-up + readiness.
+
+create_app() 이 백그라운드 스레드에서 아래 항목을 미리 준비하고,
+GET /ready 는 warm-up 이 끝나고 필수 항목이 모두 성공했을 때만 200 을 반환한다 (그 전/실패 시 503).
+로드밸런서 readiness probe 를 /ready 로 두면 cold 워커로 트래픽이 가지 않는다.
+
+    lstm   : LSTM 앙상블 엔진(또는 레지스트리/student) 로딩 + 더미 forward
+    corp   : corpCode.zip 파싱 결과 메모리 캐시 (corp_info)
+    driver : 공용 DriverPool 에 headless Chrome 세션을 풀 크기만큼 미리 기동 (opt-in)
+
+MCP_WARMUP : 실행할 항목 (기본 "lstm,corp", "0"/빈 값이면 warm-up 없이 바로 ready)
+             이름 뒤에 '?' 를 붙이면 선택 항목: 실행은 하되 실패해도 ready 를 막지 않음
+             (예: "lstm,corp,driver?" — Chrome 이 없는 환경에서도 KRX HTTP 경로로 서비스)
+"""
+import asyncio
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+
+WARMUP_COMPONENTS = ("lstm", "corp", "driver")
+# driver 는 Chrome 이 있어야 성공하므로 기본값에서 제외 (KRX_FETCH=http/auto 는 Chrome 없이 동작)
+DEFAULT_WARMUP = ("lstm", "corp")
+OPTIONAL_MARK = "?"
+
+
+def warmup_components_from_env() -> List[str]:
+    """MCP_WARMUP → 항목 목록 (선택 항목은 이름 끝에 '?' 를 유지)."""
+    raw = os.environ.get("MCP_WARMUP", ",".join(DEFAULT_WARMUP)).strip().lower()
+    if raw in ("", "0", "false", "no"):
+        return []
+    names = [v.strip() for v in raw.split(",") if v.strip()]
+    unknown = {n.rstrip(OPTIONAL_MARK) for n in names} - set(WARMUP_COMPONENTS)
+    if unknown:
+        raise ValueError(f"MCP_WARMUP 에 알 수 없는 항목: {sorted(unknown)}")
+    return names
+
+
+# ----------------------------
+# 항목별 warm-up
+# ----------------------------
+def _warm_lstm() -> dict:
+    from tools.lstm_model.lstm_model_service import warm_up_async
+
+    return asyncio.run(warm_up_async())
+
+
+def _warm_corp() -> dict:
+    from tools.corp_info.corp_info_service import get_corp_code_xml_path, load_corp_index
+
+    path = get_corp_code_xml_path()
+    corp_list = load_corp_index(path)
+    if not corp_list:
+        raise RuntimeError(f"{path} 파싱 실패")
+    return {"path": path, "corps": len(corp_list)}
+
+
+def _warm_driver() -> dict:
+    from tools.browser.driver_pool import get_pool
+
+    pool = get_pool()
+    launched = pool.prelaunch()
+    with pool.driver() as driver:
+        caps = driver.capabilities
+    return {
+        "launched": launched,
+        "pool": pool.stats(),
+        "browser_version": caps.get("browserVersion"),
+        "driver_version": (caps.get("chrome") or {}).get("chromedriverVersion", "").split(" ")[0],
+    }
+
+
+_WARMERS: Dict[str, Callable[[], dict]] = {
+    "lstm": _warm_lstm,
+    "corp": _warm_corp,
+    "driver": _warm_driver,
+}
+
+
+# ----------------------------
+# 상태
+# ----------------------------
+class WarmupState:
+    def __init__(self, components: List[str]):
+        """components: 항목 이름, '?' 로 끝나면 readiness 에 영향을 주지 않는 선택 항목."""
+        self.components = [c.rstrip(OPTIONAL_MARK) for c in components]
+        self.optional = {c.rstrip(OPTIONAL_MARK) for c in components if c.endswith(OPTIONAL_MARK)}
+        self.results: Dict[str, dict] = {
+            c: {"status": "pending", "optional": c in self.optional} for c in self.components
+        }
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def done(self) -> bool:
+        return self.finished_at is not None or not self.components
+
+    @property
+    def ready(self) -> bool:
+        return self.done and all(
+            r["status"] == "ok" for c, r in self.results.items() if c not in self.optional
+        )
+
+    def run(self) -> None:
+        """항목을 차례로 실행 (한 항목 실패가 다른 항목을 막지 않음)."""
+        self.started_at = time.time()
+        for name in self.components:
+            optional = name in self.optional
+            with self._lock:
+                self.results[name] = {"status": "running", "optional": optional}
+            t0 = time.perf_counter()
+            try:
+                detail = _WARMERS[name]()
+                result = {"status": "ok", "detail": detail}
+            except Exception as e:
+                result = {"status": "error", "error": f"{type(e).__name__}: {e}"}
+            result["optional"] = optional
+            result["elapsed_sec"] = round(time.perf_counter() - t0, 3)
+            with self._lock:
+                self.results[name] = result
+            print(f"[warmup] {name}: {result['status']} ({result['elapsed_sec']}s)")
+        self.finished_at = time.time()
+
+    def start(self) -> None:
+        if self._thread is None and self.components:
+            self._thread = threading.Thread(target=self.run, name="mcp-warmup", daemon=True)
+            self._thread.start()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return self.done
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            results = {k: dict(v) for k, v in self.results.items()}
+        elapsed = None
+        if self.started_at is not None:
+            elapsed = round((self.finished_at or time.time()) - self.started_at, 3)
+        return {
+            "ready": self.ready,
+            "done": self.done,
+            "elapsed_sec": elapsed,
+            "components": results,
+        }
+
+
+def register_readiness(mcp, state: WarmupState) -> None:
+    @mcp.custom_route("/ready", methods=["GET"])
+    async def ready_route(request: Request) -> JSONResponse:
+        snap = state.snapshot()
+        return JSONResponse(snap, status_code=200 if snap["ready"] else 503)
+
+
+__all__ = ["DEFAULT_WARMUP", "WarmupState", "register_readiness", "warmup_components_from_env"]
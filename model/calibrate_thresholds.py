@@ -0,0 +1,207 @@
+# calibrate_thresholds.py
+"""
+앙상블 임계값(임계값) 재보정.
+
+각 모델의 학습 윈도우(해당 종목 전체 히스토리, train_ensemble 과 같은 전처리)에 대한
+재구성 오차를 그룹 단위 batched forward 로 계산하고, 규칙에 따라 임계값을 다시 정해
+ensemble_thresholds_set{i}.csv 를 갱신한다. (노트북 재실행 불필요)
+
+규칙 (--rule):
+    mean_std : mean + k·std            (노트북 기본값, k=3)
+    quantile : q 분위수                 (예: --q 0.99)
+    iqr      : Q3 + k·(Q3 - Q1)
+
+사용법 (model/ 에서):
+    python calibrate_thresholds.py --data all_kospi_data.parquet --rule quantile --q 0.995 [--dry-run] [--no-store]
+
+- 보고서: {threshold_dir}/calibration_report.csv (모델별 이전/새 임계값, 변화율, 초과 비율)
+          + 요약 JSON 출력
+- 데이터가 없거나 윈도우가 부족한 종목은 이전 임계값을 그대로 둔다.
+- 임계값을 쓰면 weight_dir 옆의 ensemble_store.bin 도 다시 만든다 (--no-store 로 생략; 서비스는 원본보다
+  오래된 store 를 쓰지 않는다).
+"""
+import argparse
+import json
+import os
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+import torch
+
+from train_ensemble import (
+    PARAM_SHAPES,
+    WindowBank,
+    _read_history,
+    reconstruction_errors,
+    scale_history,
+)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+RULES = ("mean_std", "quantile", "iqr")
+
+
+def threshold_from_errors(errors: np.ndarray, rule: str, k: float = 3.0, q: float = 0.99) -> float:
+    if rule == "mean_std":
+        return float(np.mean(errors) + k * np.std(errors))
+    if rule == "quantile":
+        return float(np.quantile(errors, q))
+    if rule == "iqr":
+        q1, q3 = np.quantile(errors, [0.25, 0.75])
+        return float(q3 + k * (q3 - q1))
+    raise ValueError(f"rule 은 {RULES} 중 하나여야 함: {rule}")
+
+
+def _load_bundle(weight_dir: str, threshold_dir: str, n_sets: int):
+    """세트별 (종목명 → state_dict), (종목명 → 임계값), 임계값 CSV 원본."""
+    weights, thresholds, frames = [], [], []
+    for i in range(1, n_sets + 1):
+        w = torch.load(os.path.join(weight_dir, f"ensemble_weights_set{i}.pt"), map_location="cpu")
+        df = pd.read_csv(os.path.join(threshold_dir, f"ensemble_thresholds_set{i}.csv"))
+        weights.append(w)
+        thresholds.append(dict(zip(df["종목명"], df["임계값"])))
+        frames.append(df)
+    return weights, thresholds, frames
+
+
+def model_errors(
+    state_dicts: Dict[str, dict], series: Dict[str, np.ndarray], group_size: int = 50
+) -> Dict[str, np.ndarray]:
+    """종목명 → 그 종목 모델의 전체 학습 윈도우 재구성 오차. group_size 개씩 batched forward."""
+    names = [n for n in state_dicts if n in series]
+    out: Dict[str, np.ndarray] = {}
+    for s in range(0, len(names), group_size):
+        chunk = names[s : s + group_size]
+        params = {
+            k: torch.stack([state_dicts[n][k].float() for n in chunk]) for k in PARAM_SHAPES
+        }
+        bank = WindowBank([series[n] for n in chunk])
+        for n, e in zip(chunk, reconstruction_errors(params, bank)):
+            out[n] = e
+        print(f"[calibrate_thresholds] {min(s + group_size, len(names))}/{len(names)} models")
+    return out
+
+
+def calibrate(
+    data_path: str,
+    weight_dir: str,
+    threshold_dir: str,
+    n_sets: int = 10,
+    rule: str = "mean_std",
+    k: float = 3.0,
+    q: float = 0.99,
+    group_size: int = 50,
+    dry_run: bool = False,
+    store: bool = True,
+) -> dict:
+    if rule not in RULES:
+        raise ValueError(f"rule 은 {RULES} 중 하나여야 함: {rule}")
+    weights, old_thresholds, frames = _load_bundle(weight_dir, threshold_dir, n_sets)
+    state_dicts = {n: sd for w in weights for n, sd in w.items()}
+
+    df = _read_history(data_path, list(state_dicts))
+    series = {}
+    for name, g in df.groupby("종목명", sort=False):
+        scaled = scale_history(g)
+        if scaled is not None:
+            series[name] = scaled
+    del df
+    errors = model_errors(state_dicts, series, group_size)
+
+    rows: List[dict] = []
+    new_frames = []
+    for set_idx, (w, old, frame) in enumerate(zip(weights, old_thresholds, frames), 1):
+        new_vals = []
+        for name in frame["종목명"]:
+            prev = float(old[name])
+            e = errors.get(name)
+            if e is None or name not in w:
+                new_vals.append(prev)
+                rows.append({"set": set_idx, "종목명": name, "status": "no_data",
+                             "old": prev, "new": prev, "windows": 0})
+                continue
+            new = threshold_from_errors(e, rule, k, q)
+            new_vals.append(new)
+            rows.append(
+                {
+                    "set": set_idx,
+                    "종목명": name,
+                    "status": "ok",
+                    "old": prev,
+                    "new": new,
+                    "windows": int(len(e)),
+                    "old_exceed": float((e > prev).mean()),
+                    "new_exceed": float((e > new).mean()),
+                }
+            )
+        new_frames.append(frame.assign(임계값=new_vals))
+
+    report = pd.DataFrame(rows)
+    report["drift"] = report["new"] - report["old"]
+    report["rel_drift"] = report["drift"] / report["old"].where(report["old"] != 0)
+    ok = report[report["status"] == "ok"]
+
+    if not dry_run:
+        for set_idx, frame in enumerate(new_frames, 1):
+            path = os.path.join(threshold_dir, f"ensemble_thresholds_set{set_idx}.csv")
+            tmp = f"{path}.tmp{os.getpid()}"
+            frame.to_csv(tmp, index=False, encoding="utf-8-sig")
+            os.replace(tmp, path)
+        if store:
+            from weight_store import convert
+
+            store_path = os.path.join(os.path.dirname(weight_dir), "ensemble_store.bin")
+            convert(weight_dir, threshold_dir, n_sets, store_path)
+    report_path = os.path.join(threshold_dir, "calibration_report.csv")
+    report.to_csv(report_path, index=False, encoding="utf-8-sig")
+
+    abs_rel = ok["rel_drift"].abs()
+    return {
+        "rule": rule,
+        "k": k if rule != "quantile" else None,
+        "q": q if rule == "quantile" else None,
+        "models": int(len(report)),
+        "calibrated": int(len(ok)),
+        "no_data": int((report["status"] == "no_data").sum()),
+        "rel_drift_mean": round(float(abs_rel.mean()), 4) if len(ok) else None,
+        "rel_drift_p95": round(float(abs_rel.quantile(0.95)), 4) if len(ok) else None,
+        "rel_drift_max": round(float(abs_rel.max()), 4) if len(ok) else None,
+        "top_drift": ok.reindex(abs_rel.sort_values(ascending=False).index)
+        .head(5)[["set", "종목명", "old", "new", "rel_drift"]]
+        .to_dict("records"),
+        "old_exceed_mean": round(float(ok["old_exceed"].mean()), 4) if len(ok) else None,
+        "new_exceed_mean": round(float(ok["new_exceed"].mean()), 4) if len(ok) else None,
+        "written": not dry_run,
+        "report": report_path,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="LSTM-AE 앙상블 임계값 재보정")
+    parser.add_argument("--data", required=True, help="전 종목 시세 parquet (krx_dataset_merge) 또는 CSV")
+    parser.add_argument("--weight-dir", default=os.path.join(BASE_DIR, "weights", "ensemble_weights"))
+    parser.add_argument("--threshold-dir", default=os.path.join(BASE_DIR, "weights", "ensemble_thresholds"))
+    parser.add_argument("--n-sets", type=int, default=10)
+    parser.add_argument("--rule", choices=RULES, default="mean_std")
+    parser.add_argument("--k", type=float, default=3.0, help="mean_std / iqr 계수")
+    parser.add_argument("--q", type=float, default=0.99, help="quantile 규칙의 분위수")
+    parser.add_argument("--group-size", type=int, default=50)
+    parser.add_argument("--dry-run", action="store_true", help="보고서만 쓰고 임계값 파일은 유지")
+    parser.add_argument(
+        "--no-store", dest="store", action="store_false", help="ensemble_store.bin 재생성 생략 (기본: 재생성)"
+    )
+    args = parser.parse_args()
+
+    result = calibrate(
+        args.data,
+        args.weight_dir,
+        args.threshold_dir,
+        n_sets=args.n_sets,
+        rule=args.rule,
+        k=args.k,
+        q=args.q,
+        group_size=args.group_size,
+        dry_run=args.dry_run,
+        store=args.store,
+    )
+    print(json.dumps(result, ensure_ascii=False, indent=2, default=float))
@@ -0,0 +1,54 @@
+# ensemble_engine.py
+"""
+LSTM AutoEncoder 앙상블 배치 추론 엔진 (agent 와 공용 구현을 가져온다).
+
+구현은 agent/mcp_server_local/tools/lstm_model 의 ensemble_engine.py / torch_engine.py 한 벌뿐이고,
+이 모듈은 model/ 의 기존 import 경로(from ensemble_engine import ...)를 유지하기 위한 진입점이다.
+
+공용 구현 위치 (tools/lstm_model 이 들어 있는 폴더):
+    LSTM_SHARED_DIR 환경변수 → model/shared (docker 이미지) → ../agent/mcp_server_local (저장소)
+"""
+import os
+import sys
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+_SHARED_CANDIDATES = (
+    os.environ.get("LSTM_SHARED_DIR"),
+    os.path.join(BASE_DIR, "shared"),
+    os.path.join(os.path.dirname(BASE_DIR), "agent", "mcp_server_local"),
+)
+
+
+def shared_dir() -> str:
+    for d in _SHARED_CANDIDATES:
+        if d and os.path.exists(os.path.join(d, "tools", "lstm_model", "ensemble_engine.py")):
+            return d
+    raise ImportError(
+        "공용 LSTM 엔진(tools/lstm_model)을 찾을 수 없습니다: LSTM_SHARED_DIR 로 "
+        "agent/mcp_server_local 경로를 지정하세요."
+    )
+
+
+_shared = shared_dir()
+if _shared not in sys.path:
+    # model/ 모듈을 가리지 않도록 뒤에 추가
+    sys.path.append(_shared)
+
+from tools.lstm_model.ensemble_engine import (  # noqa: E402
+    PARAM_KEYS,
+    PRECISIONS,
+    WEIGHT_KEYS,
+    StackedEnsemble,
+    stack_ensemble,
+)
+from tools.lstm_model.torch_engine import TorchEnsembleEngine  # noqa: E402
+
+__all__ = [
+    "PARAM_KEYS",
+    "PRECISIONS",
+    "WEIGHT_KEYS",
+    "StackedEnsemble",
+    "stack_ensemble",
+    "TorchEnsembleEngine",
+    "shared_dir",
+]
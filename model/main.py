@@ -1,11 +1,14 @@
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 import torch
 import numpy as np
 import pandas as pd
 from sklearn.preprocessing import MinMaxScaler
+import asyncio
 import time
 import os
+from datetime import datetime
 from typing import Optional, List
 
 from selenium import webdriver
@@ -17,10 +20,18 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
 from webdriver_manager.chrome import ChromeDriverManager
 
+from ensemble_engine import TorchEnsembleEngine, stack_ensemble
+from weight_store import bundle_sources, open_store, stale_sources
+from micro_batcher import MicroBatcher
+
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
 ensemble_weight_dir = os.path.join(BASE_DIR, "weights", "ensemble_weights")
 ensemble_threshold_dir = os.path.join(BASE_DIR, "weights", "ensemble_thresholds")
+# 단일 memory-mappable 가중치 파일 (python weight_store.py 로 생성, 있으면 .pt 대신 사용)
+weight_store_path = os.environ.get("LSTM_WEIGHT_STORE") or os.path.join(
+    BASE_DIR, "weights", "ensemble_store.bin"
+)
 
 app = FastAPI()
 
@@ -64,14 +75,37 @@ n_ensembles = 10
 # 전역 캐시
 ALL_WEIGHTS = {}       # stock_name -> state_dict
 ALL_THRESHOLDS = {}    # stock_name -> threshold(float)
+ENGINE: Optional[TorchEnsembleEngine] = None  # 전 모델을 쌓은 배치 추론 엔진
+
+# micro-batching 서빙 모드: 동시 요청을 짧은 윈도우 동안 모아 한 번의 배치 forward 로 처리
+MICRO_BATCHING = os.environ.get("MICRO_BATCHING", "0").lower() in ("1", "true", "yes")
+MICRO_BATCH_MAX_SIZE = int(os.environ.get("MICRO_BATCH_MAX_SIZE", "32"))
+MICRO_BATCH_WAIT_MS = float(os.environ.get("MICRO_BATCH_WAIT_MS", "5"))
+BATCHER: Optional[MicroBatcher] = None
+READY = False  # 로딩 + warm-up forward 완료 여부 (/ready)
 
 # ====== 서버 시작 시 모든 가중치/임계값 로딩 ======
 @app.on_event("startup")
 def load_all_models():
-    global ALL_WEIGHTS, ALL_THRESHOLDS
+    global ALL_WEIGHTS, ALL_THRESHOLDS, ENGINE
     ALL_WEIGHTS.clear()
     ALL_THRESHOLDS.clear()
 
+    stale = []
+    if os.path.exists(weight_store_path):
+        stale = stale_sources(
+            weight_store_path, bundle_sources(ensemble_weight_dir, ensemble_threshold_dir, n_ensembles)
+        )
+        if stale:
+            # 원본(.pt/.csv)이 store 이후 바뀜 → 오래된 store 대신 원본에서 로딩
+            print(f"[Startup] {weight_store_path} is older than {', '.join(stale[:3])}; loading .pt files.")
+    if os.path.exists(weight_store_path) and not stale:
+        # read-only mmap: unpickle 없이 워커 간 page cache 공유
+        ENGINE = TorchEnsembleEngine(open_store(weight_store_path), device=device)
+        print(f"[Startup] Mapped {ENGINE.stacked.n_models} models from {weight_store_path}.")
+        warm_up_engine()
+        return
+
     for i in range(1, n_ensembles + 1):
         weights_path = os.path.join(ensemble_weight_dir, f"ensemble_weights_set{i}.pt")
         thresh_path = os.path.join(ensemble_threshold_dir, f"ensemble_thresholds_set{i}.csv")
@@ -85,7 +119,17 @@ def load_all_models():
             if stock_name in threshold_map:
                 ALL_THRESHOLDS[stock_name] = float(threshold_map[stock_name])
 
+    ENGINE = TorchEnsembleEngine(stack_ensemble([ALL_WEIGHTS], [ALL_THRESHOLDS]), device=device)
     print(f"[Startup] Loaded {len(ALL_WEIGHTS)} models, {len(ALL_THRESHOLDS)} thresholds.")
+    warm_up_engine()
+
+def warm_up_engine():
+    """더미 윈도우로 한 번 forward 해 첫 요청의 커널/메모리 초기화 비용을 startup 에서 치른다."""
+    global READY
+    t0 = time.time()
+    ENGINE.reconstruction_errors(np.zeros((1, window_size, len(features)), dtype=np.float32))
+    READY = True
+    print(f"[Startup] Warm-up forward done in {time.time() - t0:.3f}s.")
 
 # ====== 크롬 옵션 ======
 def _build_chrome_options(download_dir: str) -> Options:
@@ -125,9 +169,14 @@ def _wait_download_csv(download_dir: str, start_ts: float, timeout: int = 60) ->
 
 # ====== 데이터 수집 ======
 async def fetch_recent_data(stock_name: str) -> pd.DataFrame:
+    # 블로킹 크롤링은 스레드에서 실행 → 동시 요청이 이벤트 루프에서 겹칠 수 있음
+    return await asyncio.to_thread(_fetch_recent_data_sync, stock_name)
+
+def _fetch_recent_data_sync(stock_name: str) -> pd.DataFrame:
     base_dir = "/tmp/stock_info_downloads"
     os.makedirs(base_dir, exist_ok=True)
-    req_dir = os.path.join(base_dir, f"req_{int(time.time())}")
+    # 동시 요청끼리 다운로드 폴더가 겹치지 않도록 마이크로초 단위 stamp 사용
+    req_dir = os.path.join(base_dir, f"req_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}")
     os.makedirs(req_dir, exist_ok=True)
 
     options = _build_chrome_options(req_dir)
@@ -167,10 +216,16 @@ async def fetch_recent_data(stock_name: str) -> pd.DataFrame:
 
 # ====== 슬라이딩 윈도우 생성 ======
 def create_windows(data_2d: np.ndarray, window_size: int) -> np.ndarray:
-    return np.array([data_2d[i:i+window_size] for i in range(len(data_2d)-window_size)])
+    # 복사 없는 strided view (W, window_size, F). 기존과 같이 마지막 윈도우는 제외한다.
+    n = len(data_2d) - window_size
+    if n <= 0:
+        return np.empty((0, window_size) + data_2d.shape[1:], dtype=data_2d.dtype)
+    views = np.lib.stride_tricks.sliding_window_view(data_2d, window_size, axis=0)
+    return views[:n].transpose(0, 2, 1)
 
 # ====== 추론 ======
-def run_last_window_inference(df_input: pd.DataFrame) -> float:
+def prepare_last_window(df_input: pd.DataFrame) -> np.ndarray:
+    """입력 DataFrame → 스케일링된 최신 30일 윈도우 (T, F) float32."""
     # 1. 피처 강제 선택
     for col in features:
         if col not in df_input.columns:
@@ -185,36 +240,54 @@ def run_last_window_inference(df_input: pd.DataFrame) -> float:
     scaled_all = scaler.fit_transform(df_input.values)
 
     # 3. 최신 30일만 추출
-    last_30_scaled = scaled_all[-window_size:]
-    sequence = last_30_scaled.reshape(1, window_size, len(features))
-    x_tensor = torch.tensor(sequence, dtype=torch.float32, device=device)
-
-    # 4. 모든 모델에 대해 단일 윈도우 추론
-    num_total, num_anomalies = 0, 0
-    model = LSTMAutoEncoder(input_dim=len(features)).to(device)
-    model.eval()
-    with torch.no_grad():
-        for stock_name, state_dict in ALL_WEIGHTS.items():
-            threshold = ALL_THRESHOLDS.get(stock_name, None)
-            if threshold is None:
-                continue
-            model.load_state_dict(state_dict)
-            output = model(x_tensor)
-            recon_error = torch.mean((x_tensor - output) ** 2).item()
-            if recon_error > threshold:
-                num_anomalies += 1
-            num_total += 1
-
-    return num_anomalies / num_total if num_total > 0 else 0.0
+    return scaled_all[-window_size:].astype(np.float32)
+
+def score_windows(windows: np.ndarray) -> np.ndarray:
+    """(B, T, F) 윈도우 → 윈도우별 이상 비율 (B,). 모든 모델을 한 번의 배치 forward 로 평가."""
+    if ENGINE is None:
+        raise HTTPException(status_code=503, detail="모델이 아직 로딩되지 않았습니다.")
+    # 비율 = 이상 모델 수 / 전체 모델 수 (세트 구분 없음, 기존과 동일)
+    errors = ENGINE.reconstruction_errors(windows)
+    return np.mean(errors > ENGINE.stacked.thresholds[:, None], axis=0)
+
+def run_last_window_inference(df_input: pd.DataFrame) -> float:
+    return float(score_windows(prepare_last_window(df_input)[None])[0])
+
 # ====== API 엔드포인트 ======
+@app.on_event("startup")
+def init_batcher():
+    global BATCHER
+    if MICRO_BATCHING:
+        BATCHER = MicroBatcher(score_windows, max_batch=MICRO_BATCH_MAX_SIZE, max_wait_ms=MICRO_BATCH_WAIT_MS)
+        print(f"[Startup] micro-batching on (max_batch={MICRO_BATCH_MAX_SIZE}, wait={MICRO_BATCH_WAIT_MS}ms)")
+
+@app.on_event("shutdown")
+async def stop_batcher():
+    if BATCHER is not None:
+        await BATCHER.stop()
+
 @app.post("/predict")
 async def predict_anomaly(req: InferenceRequest):
     t_start = time.time()
     df_input = await fetch_recent_data(req.stock_name)
-    ratio = run_last_window_inference(df_input)
+    if BATCHER is not None:
+        ratio = await BATCHER.submit(prepare_last_window(df_input))
+    else:
+        ratio = run_last_window_inference(df_input)
     elapsed = time.time() - t_start
     return {
         "stock": req.stock_name,
         "anomaly_ratio": round(ratio, 4),
         "elapsed_sec": round(elapsed, 3)
     }
+
+@app.get("/ready")
+async def ready():
+    """로드밸런서 readiness probe: 가중치 로딩과 warm-up 이 끝난 뒤에만 200."""
+    if not READY:
+        return JSONResponse({"ready": False}, status_code=503)
+    return {"ready": True, "models": ENGINE.stacked.n_models}
+
+@app.get("/batch_stats")
+async def batch_stats():
+    return {"micro_batching": MICRO_BATCHING, **(BATCHER.stats() if BATCHER else {})}
@@ -0,0 +1,102 @@
+# micro_batcher.py
+"""
+동시 요청 micro-batching.
+
+짧은 윈도우(max_wait_ms) 동안 또는 max_batch 개가 찰 때까지 들어온 입력을 모아
+score_fn 한 번(배치 forward)으로 처리하고, 각 호출자에게 자기 결과를 돌려준다.
+대기 중인 요청이 없으면 첫 요청은 최대 max_wait_ms 만 기다린 뒤 바로 처리된다.
+"""
+import asyncio
+import time
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+
+class MicroBatcher:
+    def __init__(
+        self,
+        score_fn: Callable[[np.ndarray], np.ndarray],
+        max_batch: int = 32,
+        max_wait_ms: float = 5.0,
+    ):
+        """
+        Args:
+            score_fn: (B, T, F) → (B,) 결과. 이벤트 루프 밖(스레드)에서 실행된다.
+            max_batch: 한 번에 묶을 최대 요청 수
+            max_wait_ms: 첫 요청 이후 추가 요청을 기다리는 최대 시간
+        """
+        self.score_fn = score_fn
+        self.max_batch = max(1, int(max_batch))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+        # 메트릭
+        self.batches = 0
+        self.requests = 0
+        self.max_seen_batch = 0
+
+    def start(self) -> None:
+        if self._task is None:
+            self._queue = asyncio.Queue()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def submit(self, window: np.ndarray) -> float:
+        """(T, F) 윈도우 하나를 제출하고 배치 처리 결과를 기다린다."""
+        self.start()
+        fut = asyncio.get_running_loop().create_future()
+        await self._queue.put((np.asarray(window, dtype=np.float32), fut))
+        return await fut
+
+    async def _collect(self) -> List[Tuple[np.ndarray, asyncio.Future]]:
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._collect()
+            windows = np.stack([w for w, _ in batch])
+            try:
+                results = await asyncio.to_thread(self.score_fn, windows)
+            except Exception as e:
+                for _, fut in batch:
+                    if not fut.done():
+                        fut.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.requests += len(batch)
+            self.max_seen_batch = max(self.max_seen_batch, len(batch))
+            for (_, fut), r in zip(batch, results):
+                if not fut.done():
+                    fut.set_result(float(r))
+
+    def stats(self) -> dict:
+        return {
+            "max_batch": self.max_batch,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "batches": self.batches,
+            "requests": self.requests,
+            "avg_batch": round(self.requests / self.batches, 2) if self.batches else 0.0,
+            "max_seen_batch": self.max_seen_batch,
+            "pending": self._queue.qsize() if self._queue is not None else 0,
+        }
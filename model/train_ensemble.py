@@ -0,0 +1,503 @@
+# train_ensemble.py
+"""
+종목별 LSTM AutoEncoder 앙상블 배치 학습 (notebooks/training_ensemble_300.ipynb 의 CLI 버전).
+
+노트북은 300개 모델을 하나씩 순서대로 학습하지만, 여기서는 종목 G개를 하나의 그룹 모델로 묶어
+파라미터를 모델 축(G)으로 쌓고 한 번의 batched forward/backward 로 동시에 학습한다.
+- 모델 간 gradient 는 섞이지 않고, Adam 도 모델별 step 수로 따로 갱신하므로
+  결과는 종목마다 독립적으로 학습한 것과 같은 방식이다 (배치 순서만 다름).
+- 전처리/하이퍼파라미터/임계값(mean + k·std)은 노트북과 동일하다.
+- 윈도우는 전 종목 시계열을 이어 붙인 배열 위의 strided view (복사 없음) 에서 배치 인덱스로만 꺼낸다.
+- 그룹 단위로 여러 프로세스에서 학습하고, epoch 마다 checkpoint 를 남겨 중단 후 이어서 학습한다.
+
+사용법 (model/ 에서):
+    python train_ensemble.py --data all_kospi_data.parquet --out weights_trained [--workers 4] [--no-store]
+
+산출물 (서비스/weight_store 와 같은 구조):
+    {out}/ensemble_weights/ensemble_weights_set{i}.pt      dict(종목명 → state_dict)
+    {out}/ensemble_thresholds/ensemble_thresholds_set{i}.csv  종목명,임계값
+    {out}/ensemble_store.bin (기본 생성, --no-store 로 생략)
+"""
+import argparse
+import hashlib
+import json
+import math
+import os
+import shutil
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+features = ["종가", "대비", "등락률", "시가", "고가", "저가", "거래량", "거래대금", "시가총액", "상장주식수"]
+window_size = 30
+hidden_dim = 64
+latent_dim = 16
+min_sequences = 10
+
+
+# ----------------------------
+# 데이터
+# ----------------------------
+def load_stock_sets(path: str) -> List[List[str]]:
+    """random_selected_stocks_sets_nodup.csv (컬럼 = 세트) → 세트별 종목 리스트."""
+    df = pd.read_csv(path, encoding="utf-8-sig")
+    return [[str(s).strip() for s in df[c].dropna().tolist()] for c in df.columns]
+
+
+def _read_history(path: str, stocks: List[str]) -> pd.DataFrame:
+    cols = ["날짜", "종목명", *features]
+    if path.endswith(".parquet"):
+        df = pd.read_parquet(path, columns=cols)
+    else:
+        df = pd.read_csv(path, usecols=cols)
+    df["종목명"] = df["종목명"].astype(str).str.strip()
+    df = df[df["종목명"].isin(set(stocks))].copy()
+    for c in features:
+        if df[c].dtype == object:
+            df[c] = pd.to_numeric(df[c].astype(str).str.replace(",", ""), errors="coerce")
+    df["날짜"] = pd.to_datetime(df["날짜"])
+    return df
+
+
+def scale_history(g: pd.DataFrame) -> Optional[np.ndarray]:
+    """
+    한 종목 시세 → MinMax 스케일링된 (N, F) float32 (과거 → 최신).
+    노트북과 동일: 일 단위 달력으로 reindex 후 선형 보간, 종목 전체 구간으로 MinMax.
+    """
+    g = g.sort_values("날짜").drop_duplicates("날짜").set_index("날짜")
+    full_index = pd.date_range(g.index.min(), g.index.max(), freq="D")
+    values = g[features].reindex(full_index).interpolate(method="linear").bfill().ffill()
+    values = values.to_numpy(dtype=np.float64)
+    if np.isnan(values).any() or len(values) - window_size < min_sequences:
+        return None
+    lo, hi = values.min(axis=0), values.max(axis=0)
+    rng = np.where(hi - lo == 0, 1.0, hi - lo)  # sklearn MinMaxScaler 와 동일한 0 범위 처리
+    return ((values - lo) / rng).astype(np.float32)
+
+
+class WindowBank:
+    """
+    종목별 스케일링 시계열을 이어 붙인 (ΣN, F) 버퍼와 그 위의 (ΣN-T+1, T, F) strided view.
+    종목 g 의 i 번째 윈도우 = view[offsets[g] + i] (0 ≤ i < counts[g]), 종목 경계를 넘는 행은 쓰지 않는다.
+    """
+
+    def __init__(self, series: List[np.ndarray]):
+        self.buffer = np.ascontiguousarray(np.concatenate(series))
+        self.view = np.lib.stride_tricks.sliding_window_view(
+            self.buffer, window_size, axis=0
+        ).transpose(0, 2, 1)
+        lengths = np.array([len(s) for s in series], dtype=np.int64)
+        self.offsets = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+        # 노트북 create_sequences 와 같은 개수 (마지막 윈도우 제외)
+        self.counts = lengths - window_size
+
+    def gather(self, index: np.ndarray) -> np.ndarray:
+        """(G, B) 종목 내 윈도우 번호 → (G, B, T, F) 배치 (이 배치만 복사)."""
+        return self.view[self.offsets[:, None] + index]
+
+
+# ----------------------------
+# 그룹 모델 (G 개 LSTMAutoEncoder 를 모델 축으로 쌓음)
+# ----------------------------
+# state_dict 와 같은 이름/모양에 모델 축만 앞에 붙인다.
+PARAM_SHAPES = OrderedDict(
+    [
+        ("encoder.weight_ih_l0", (4 * hidden_dim, len(features))),
+        ("encoder.weight_hh_l0", (4 * hidden_dim, hidden_dim)),
+        ("encoder.bias_ih_l0", (4 * hidden_dim,)),
+        ("encoder.bias_hh_l0", (4 * hidden_dim,)),
+        ("latent.weight", (latent_dim, hidden_dim)),
+        ("latent.bias", (latent_dim,)),
+        ("decoder_input.weight", (hidden_dim, latent_dim)),
+        ("decoder_input.bias", (hidden_dim,)),
+        ("decoder.weight_ih_l0", (4 * len(features), hidden_dim)),
+        ("decoder.weight_hh_l0", (4 * len(features), len(features))),
+        ("decoder.bias_ih_l0", (4 * len(features),)),
+        ("decoder.bias_hh_l0", (4 * len(features),)),
+    ]
+)
+
+
+def _init_bound(name: str) -> float:
+    """torch.nn 기본 초기화 범위: LSTM 은 1/sqrt(hidden), Linear 는 1/sqrt(fan_in)."""
+    if name.startswith("encoder."):
+        return 1.0 / math.sqrt(hidden_dim)
+    if name.startswith("decoder."):
+        return 1.0 / math.sqrt(len(features))
+    if name.startswith("latent."):
+        return 1.0 / math.sqrt(hidden_dim)
+    return 1.0 / math.sqrt(latent_dim)  # decoder_input
+
+
+def init_params(n_models: int, generator):
+    import torch
+
+    return {
+        k: (torch.rand((n_models, *shape), generator=generator) * 2 - 1) * _init_bound(k)
+        for k, shape in PARAM_SHAPES.items()
+    }
+
+
+def _lstm(gates_x, w_hh, n_hidden: int):
+    """gates_x: (G, B, T, 4H) 또는 (G, B, 4H) (매 step 동일 입력) → 출력 (G, B, T, H)."""
+    import torch
+
+    G, B = gates_x.shape[:2]
+    h = gates_x.new_zeros((G, B, n_hidden))
+    c = gates_x.new_zeros((G, B, n_hidden))
+    w_hh_t = w_hh.transpose(1, 2)
+    # step 별 입력은 unbind 로 한 번에 나눈다 (t 마다 인덱싱하면 backward 에서 전체 크기 0 텐서가 T 번 생김)
+    steps = gates_x.unbind(2) if gates_x.dim() == 4 else [gates_x] * window_size
+    outs = []
+    for gx in steps:
+        i, f, g, o = (gx + torch.bmm(h, w_hh_t)).chunk(4, dim=-1)
+        c = torch.sigmoid(f) * c + torch.sigmoid(i) * torch.tanh(g)
+        h = torch.sigmoid(o) * torch.tanh(c)
+        outs.append(h)
+    return torch.stack(outs, dim=2)
+
+
+def group_forward(p, x):
+    """x: (G, B, T, F) → 재구성 (G, B, T, F). LSTMAutoEncoder.forward 와 같은 계산."""
+    import torch
+
+    enc_in = torch.matmul(x, p["encoder.weight_ih_l0"].transpose(1, 2)[:, None]) + (
+        p["encoder.bias_ih_l0"] + p["encoder.bias_hh_l0"]
+    )[:, None, None]
+    h_n = _lstm(enc_in, p["encoder.weight_hh_l0"], hidden_dim)[:, :, -1]
+    z = torch.bmm(h_n, p["latent.weight"].transpose(1, 2)) + p["latent.bias"][:, None]
+    d = torch.bmm(z, p["decoder_input.weight"].transpose(1, 2)) + p["decoder_input.bias"][:, None]
+    dec_in = torch.bmm(d, p["decoder.weight_ih_l0"].transpose(1, 2)) + (
+        p["decoder.bias_ih_l0"] + p["decoder.bias_hh_l0"]
+    )[:, None]
+    return _lstm(dec_in, p["decoder.weight_hh_l0"], len(features))
+
+
+class GroupAdam:
+    """모델별 step 수를 따로 세는 Adam (torch.optim.Adam 기본값과 같은 수식). 비활성 모델은 갱신하지 않는다."""
+
+    def __init__(self, params, lr: float = 1e-3, betas=(0.9, 0.999), eps: float = 1e-8):
+        import torch
+
+        self.params = params
+        self.lr, self.betas, self.eps = lr, betas, eps
+        n_models = next(iter(params.values())).shape[0]
+        self.m = {k: torch.zeros_like(v) for k, v in params.items()}
+        self.v = {k: torch.zeros_like(v) for k, v in params.items()}
+        self.steps = torch.zeros(n_models)
+
+    def step(self, active) -> None:
+        import torch
+
+        b1, b2 = self.betas
+        self.steps += active
+        t = self.steps.clamp(min=1)
+        bc1, bc2 = 1 - b1**t, 1 - b2**t
+        with torch.no_grad():
+            for k, p in self.params.items():
+                shape = (-1,) + (1,) * (p.dim() - 1)
+                a = active.view(shape).bool()
+                g = p.grad
+                self.m[k] = torch.where(a, b1 * self.m[k] + (1 - b1) * g, self.m[k])
+                self.v[k] = torch.where(a, b2 * self.v[k] + (1 - b2) * g * g, self.v[k])
+                denom = (self.v[k].sqrt() / bc2.sqrt().view(shape)) + self.eps
+                update = (self.lr / bc1).view(shape) * self.m[k] / denom
+                p -= torch.where(a, update, torch.zeros_like(update))
+                p.grad = None
+
+    def state(self) -> dict:
+        return {"m": self.m, "v": self.v, "steps": self.steps}
+
+    def load(self, state: dict) -> None:
+        self.m, self.v, self.steps = state["m"], state["v"], state["steps"]
+
+
+# ----------------------------
+# 그룹 학습 (워커 프로세스)
+# ----------------------------
+def _atomic_save(obj, path: str) -> None:
+    import torch
+
+    tmp = f"{path}.tmp{os.getpid()}"
+    torch.save(obj, tmp)
+    os.replace(tmp, path)
+
+
+def reconstruction_errors(p, bank: WindowBank, chunk: int = 256) -> List[np.ndarray]:
+    """종목별 전체 윈도우의 재구성 MSE (임계값 계산용)."""
+    import torch
+
+    n_max = int(bank.counts.max())
+    errors = np.zeros((len(bank.counts), n_max), dtype=np.float32)
+    with torch.no_grad():
+        for s in range(0, n_max, chunk):
+            idx = np.minimum(np.arange(s, min(s + chunk, n_max))[None, :], bank.counts[:, None] - 1)
+            x = torch.from_numpy(bank.gather(idx))
+            errors[:, s : s + idx.shape[1]] = ((x - group_forward(p, x)) ** 2).mean(dim=(2, 3)).numpy()
+    return [errors[g, :n] for g, n in enumerate(bank.counts)]
+
+
+def train_group(task: dict) -> dict:
+    """
+    task: {'gid', 'names', 'series', 'ckpt_dir', 'epochs', 'batch_size', 'lr', 'k', 'seed', 'threads'}
+    완료되면 group_{gid}.pt (종목별 state_dict/임계값) 를 쓰고 요약을 반환한다.
+    """
+    import torch
+
+    torch.set_num_threads(task["threads"])
+    gid, names = task["gid"], task["names"]
+    final_path = os.path.join(task["ckpt_dir"], f"group_{gid:04d}.pt")
+    partial_path = os.path.join(task["ckpt_dir"], f"group_{gid:04d}.partial.pt")
+    t0 = time.time()
+
+    bank = WindowBank(task["series"])
+    B = task["batch_size"]
+    gen = torch.Generator().manual_seed(task["seed"] * 100_003 + gid)
+    params = init_params(len(names), gen)
+    opt = GroupAdam(params, lr=task["lr"])
+    rng = np.random.default_rng([task["seed"], gid])
+    start_epoch = 0
+
+    if os.path.exists(partial_path):
+        ckpt = torch.load(partial_path, map_location="cpu")
+        params.update(ckpt["params"])
+        opt.params = params
+        opt.load(ckpt["adam"])
+        rng.bit_generator.state = ckpt["rng"]
+        start_epoch = ckpt["epoch"] + 1
+        print(f"[train_ensemble] group {gid}: resume after epoch {start_epoch}")
+
+    for p in params.values():
+        p.requires_grad_(True)
+
+    steps = np.ceil(bank.counts / B).astype(np.int64)
+    for epoch in range(start_epoch, task["epochs"]):
+        perms = [rng.permutation(n) for n in bank.counts]
+        total = np.zeros(len(names))
+        for s in range(int(steps.max())):
+            idx = np.zeros((len(names), B), dtype=np.int64)
+            mask = np.zeros((len(names), B), dtype=np.float32)
+            for g, perm in enumerate(perms):
+                part = perm[s * B : (s + 1) * B]
+                idx[g, : len(part)] = part
+                mask[g, : len(part)] = 1.0
+            x = torch.from_numpy(bank.gather(idx))
+            m = torch.from_numpy(mask)
+            n_valid = m.sum(dim=1)
+            sq = ((group_forward(params, x) - x) ** 2).mean(dim=(2, 3))  # (G, B)
+            loss_g = (sq * m).sum(dim=1) / n_valid.clamp(min=1)  # 모델별 배치 평균 MSE
+            loss_g.sum().backward()
+            opt.step((n_valid > 0).float())
+            total += loss_g.detach().numpy() * n_valid.numpy()
+
+        _atomic_save(
+            {
+                "epoch": epoch,
+                "params": {k: v.detach() for k, v in params.items()},
+                "adam": opt.state(),
+                "rng": rng.bit_generator.state,
+            },
+            partial_path,
+        )
+        mean_loss = float((total / np.maximum(bank.counts, 1)).mean())
+        print(f"[train_ensemble] group {gid} epoch {epoch + 1}/{task['epochs']} loss={mean_loss:.6f}")
+
+    params = {k: v.detach() for k, v in params.items()}
+    errors = reconstruction_errors(params, bank)
+    result = {
+        "names": names,
+        "state_dicts": [
+            OrderedDict((k, params[k][g].clone()) for k in PARAM_SHAPES) for g in range(len(names))
+        ],
+        "thresholds": [float(np.mean(e) + task["k"] * np.std(e)) for e in errors],
+        "n_windows": [int(n) for n in bank.counts],
+    }
+    _atomic_save(result, final_path)
+    if os.path.exists(partial_path):
+        os.remove(partial_path)
+    elapsed = time.time() - t0
+    print(f"[train_ensemble] group {gid}: {len(names)} models done in {elapsed:.1f}s")
+    return {"gid": gid, "models": len(names), "elapsed": round(elapsed, 2)}
+
+
+# ----------------------------
+# 전체 학습 + 저장
+# ----------------------------
+def _config_fingerprint(data_path: str, names: List[str], cfg: dict) -> dict:
+    st = os.stat(data_path)
+    h = hashlib.sha1("\n".join(names).encode("utf-8")).hexdigest()
+    return {**cfg, "data": os.path.abspath(data_path), "data_size": st.st_size,
+            "data_mtime": int(st.st_mtime), "stocks_sha1": h}
+
+
+def write_bundle(out_dir: str, stock_sets: List[List[str]], trained: Dict[str, tuple]) -> None:
+    """세트별 ensemble_weights_set{i}.pt / ensemble_thresholds_set{i}.csv 저장 (노트북과 같은 형식)."""
+    import torch
+
+    weight_dir = os.path.join(out_dir, "ensemble_weights")
+    thresh_dir = os.path.join(out_dir, "ensemble_thresholds")
+    os.makedirs(weight_dir, exist_ok=True)
+    os.makedirs(thresh_dir, exist_ok=True)
+    for set_idx, stocks in enumerate(stock_sets, 1):
+        members = [s for s in stocks if s in trained]
+        weights = {s: trained[s][0] for s in members}
+        torch.save(weights, os.path.join(weight_dir, f"ensemble_weights_set{set_idx}.pt"))
+        pd.DataFrame(
+            [(s, trained[s][1]) for s in members], columns=["종목명", "임계값"]
+        ).to_csv(
+            os.path.join(thresh_dir, f"ensemble_thresholds_set{set_idx}.csv"),
+            index=False,
+            encoding="utf-8-sig",
+        )
+        print(f"[train_ensemble] SET {set_idx}: {len(members)}/{len(stocks)} models saved")
+
+
+def train(
+    data_path: str,
+    sets_path: str,
+    out_dir: str,
+    epochs: int = 10,
+    batch_size: int = 32,
+    lr: float = 1e-3,
+    k: float = 3.0,
+    group_size: int = 50,
+    workers: int = 1,
+    threads: Optional[int] = None,
+    seed: int = 0,
+    fresh: bool = False,
+    store: bool = True,
+) -> dict:
+    t_start = time.time()
+    stock_sets = load_stock_sets(sets_path)
+    unique = list(dict.fromkeys(s for stocks in stock_sets for s in stocks))
+
+    df = _read_history(data_path, unique)
+    series, names = [], []
+    by_name = dict(tuple(df.groupby("종목명", sort=False)))
+    for stock in unique:
+        g = by_name.get(stock)
+        if g is None:
+            print(f"[{stock}] 데이터 없음 - 스킵")
+            continue
+        scaled = scale_history(g)
+        if scaled is None:
+            print(f"[{stock}] 시퀀스 부족 - 스킵")
+            continue
+        series.append(scaled)
+        names.append(stock)
+    del df, by_name
+    t_data = time.time() - t_start
+
+    cfg = {"epochs": epochs, "batch_size": batch_size, "lr": lr, "k": k,
+           "group_size": group_size, "seed": seed}
+    ckpt_dir = os.path.join(out_dir, ".train_ckpt")
+    cfg_path = os.path.join(ckpt_dir, "train_config.json")
+    fingerprint = _config_fingerprint(data_path, names, cfg)
+    if fresh and os.path.isdir(ckpt_dir):
+        shutil.rmtree(ckpt_dir)
+    os.makedirs(ckpt_dir, exist_ok=True)
+    if os.path.exists(cfg_path):
+        with open(cfg_path, encoding="utf-8") as f:
+            previous = json.load(f)
+        if previous != fingerprint:
+            raise ValueError(f"{ckpt_dir}: 기존 checkpoint 의 설정/데이터가 다름 (--fresh 로 새로 학습)")
+    else:
+        with open(cfg_path, "w", encoding="utf-8") as f:
+            json.dump(fingerprint, f, ensure_ascii=False, indent=2)
+
+    workers = max(1, workers)
+    threads = threads or max(1, (os.cpu_count() or 1) // workers)
+    tasks, done = [], []
+    for gid, s in enumerate(range(0, len(names), group_size)):
+        if os.path.exists(os.path.join(ckpt_dir, f"group_{gid:04d}.pt")):
+            done.append(gid)
+            continue
+        tasks.append(
+            {"gid": gid, "names": names[s : s + group_size], "series": series[s : s + group_size],
+             "ckpt_dir": ckpt_dir, "threads": threads, **{c: cfg[c] for c in
+             ("epochs", "batch_size", "lr", "k", "seed")}}
+        )
+    n_groups = len(tasks) + len(done)
+    print(f"[train_ensemble] models={len(names)} groups={n_groups} (done {len(done)}) "
+          f"workers={workers} threads={threads}")
+
+    if workers == 1:
+        summaries = [train_group(t) for t in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn")) as pool:
+            summaries = list(pool.map(train_group, tasks))
+
+    import torch
+
+    trained: Dict[str, tuple] = {}
+    for gid in range(n_groups):
+        res = torch.load(os.path.join(ckpt_dir, f"group_{gid:04d}.pt"), map_location="cpu")
+        for name, sd, th in zip(res["names"], res["state_dicts"], res["thresholds"]):
+            trained[name] = (sd, th)
+    write_bundle(out_dir, stock_sets, trained)
+
+    if store:
+        from weight_store import convert
+
+        convert(
+            os.path.join(out_dir, "ensemble_weights"),
+            os.path.join(out_dir, "ensemble_thresholds"),
+            len(stock_sets),
+            os.path.join(out_dir, "ensemble_store.bin"),
+        )
+
+    return {
+        "models": len(trained),
+        "groups": n_groups,
+        "resumed_groups": len(done),
+        "data_sec": round(t_data, 2),
+        "total_sec": round(time.time() - t_start, 2),
+        "groups_trained": summaries,
+        "out": out_dir,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="종목별 LSTM-AE 앙상블 배치 학습")
+    parser.add_argument("--data", required=True, help="전 종목 시세 parquet (krx_dataset_merge) 또는 CSV")
+    parser.add_argument(
+        "--sets", default=os.path.join(BASE_DIR, "data", "random_selected_stocks_sets_nodup.csv")
+    )
+    parser.add_argument("--out", default=os.path.join(BASE_DIR, "weights_trained"))
+    parser.add_argument("--epochs", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--lr", type=float, default=1e-3)
+    parser.add_argument("--k", type=float, default=3.0, help="임계값 = mean + k·std")
+    parser.add_argument("--group-size", type=int, default=50, help="한 번에 쌓아 학습할 모델 수")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--threads", type=int, default=None, help="워커당 torch 스레드 수")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--fresh", action="store_true", help="기존 checkpoint 무시하고 처음부터")
+    parser.add_argument(
+        "--no-store", dest="store", action="store_false", help="ensemble_store.bin 생성 생략 (기본: 생성)"
+    )
+    args = parser.parse_args()
+
+    result = train(
+        args.data,
+        args.sets,
+        args.out,
+        epochs=args.epochs,
+        batch_size=args.batch_size,
+        lr=args.lr,
+        k=args.k,
+        group_size=args.group_size,
+        workers=args.workers,
+        threads=args.threads,
+        seed=args.seed,
+        fresh=args.fresh,
+        store=args.store,
+    )
+    print(json.dumps(result, ensure_ascii=False, indent=2))
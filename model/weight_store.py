@@ -0,0 +1,66 @@
+# weight_store.py
+"""
+LSTM-AE 앙상블 단일 파일 가중치 저장소 (read-only memory map) — .pt/.csv → store 변환 CLI.
+
+파일 형식, 읽기/쓰기, 원본 staleness 검사는 agent 와 공용인 tools/lstm_model/weight_store.py 한 벌을 쓴다
+(위치는 ensemble_engine.shared_dir 참고). 여기에는 model/ 폴더 구조의 원본을 읽는 convert 만 있다.
+
+변환 (model/ 에서, torch 필요):
+    python weight_store.py [--out weights/ensemble_store.bin]
+"""
+import argparse
+import os
+
+from ensemble_engine import StackedEnsemble, stack_ensemble
+from tools.lstm_model.weight_store import (
+    bundle_sources,
+    open_store,
+    read_index,
+    source_stamps,
+    stale_sources,
+    write_store,
+)
+
+
+def convert(weight_dir: str, threshold_dir: str, n_sets: int, out_path: str) -> StackedEnsemble:
+    """ensemble_weights_set{i}.pt / ensemble_thresholds_set{i}.csv → store 파일 (1회성)."""
+    import pandas as pd
+    import torch
+
+    weights_per_set, thresholds_per_set = [], []
+    for i in range(1, n_sets + 1):
+        weights_per_set.append(
+            torch.load(
+                os.path.join(weight_dir, f"ensemble_weights_set{i}.pt"), map_location="cpu"
+            )
+        )
+        df_thresh = pd.read_csv(os.path.join(threshold_dir, f"ensemble_thresholds_set{i}.csv"))
+        thresholds_per_set.append(dict(zip(df_thresh["종목명"], df_thresh["임계값"])))
+
+    stacked = stack_ensemble(weights_per_set, thresholds_per_set)
+    sources = source_stamps(bundle_sources(weight_dir, threshold_dir, n_sets), out_path)
+    write_store(stacked, out_path, sources=sources)
+    print(f"[weight_store] {stacked.n_models} models / {stacked.n_sets} sets → {out_path}")
+    return stacked
+
+
+__all__ = [
+    "write_store",
+    "read_index",
+    "open_store",
+    "bundle_sources",
+    "source_stamps",
+    "stale_sources",
+    "convert",
+]
+
+
+if __name__ == "__main__":
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="LSTM-AE 앙상블 가중치 → weight store 변환")
+    parser.add_argument("--weight-dir", default=os.path.join(base_dir, "weights", "ensemble_weights"))
+    parser.add_argument("--threshold-dir", default=os.path.join(base_dir, "weights", "ensemble_thresholds"))
+    parser.add_argument("--n-sets", type=int, default=10)
+    parser.add_argument("--out", default=os.path.join(base_dir, "weights", "ensemble_store.bin"))
+    args = parser.parse_args()
+    convert(args.weight_dir, args.threshold_dir, args.n_sets, args.out)